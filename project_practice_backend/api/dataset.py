@@ -1,12 +1,21 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, send_file
 import os
-import pandas as pd
+import uuid
+import numpy as np
 from datetime import datetime
 import logging
 import jwt
 
 from database.db import db
-from database.models import Dataset, SystemLog
+from database.models import Dataset, Task, SystemLog
+from services.dataset_cache import dataset_cache
+from services.dataset_store import (
+    save_blob, columnar_dir_for, delete_dataset_files, read_preview, build_profile, CHUNK_ROWS, BLOB_DIR,
+    is_columnar, ensure_columnar, ensure_dataset_columnar, read_meta, select_time_range, read_rows, columns_to_json,
+    append_csv, copy_columnar
+)
+from services.downsample import METHODS as DOWNSAMPLE_METHODS, MIN_POINTS as MIN_DOWNSAMPLE_POINTS, downsample_indices
+from services.pagination import paginate_keyset, count_total
 
 # 创建蓝图
 dataset_bp = Blueprint('dataset', __name__)
@@ -17,6 +26,12 @@ logger = logging.getLogger(__name__)
 # 数据集存储目录
 DATASET_DIR = 'datasets'
 
+# 预览接口允许的最大行数
+MAX_PREVIEW_ROWS = 1000
+
+# 区间查询不降采样时允许返回的最大行数
+MAX_RANGE_ROWS = 100000
+
 @dataset_bp.route('/', methods=['GET'])
 def get_datasets():
     """
@@ -38,19 +53,35 @@ def get_datasets():
         if is_preset is not None:
             query = query.filter_by(is_preset=is_preset)
         
-        # 执行分页查询
-        pagination = query.paginate(page=page, per_page=per_page)
-        datasets = pagination.items
-        
-        # 格式化结果
-        result = {
-            'success': True,
-            'total': pagination.total,
-            'page': page,
-            'per_page': per_page,
-            'pages': pagination.pages,
-            'datasets': []
-        }
+        if 'cursor' in request.args:
+            # 游标分页：按 (created_at, id) 倒序从上一页末尾继续读取，总数按需统计（total=exact/approx）
+            try:
+                datasets, next_cursor = paginate_keyset(query, Dataset, per_page, request.args.get('cursor'))
+            except ValueError as e:
+                return jsonify({'success': False, 'message': str(e)}), 400
+            total, total_exact = count_total(query, request.args.get('total'))
+            result = {
+                'success': True,
+                'total': total,
+                'total_exact': total_exact,
+                'per_page': per_page,
+                'next_cursor': next_cursor,
+                'datasets': []
+            }
+        else:
+            # 执行分页查询
+            pagination = query.paginate(page=page, per_page=per_page)
+            datasets = pagination.items
+            
+            # 格式化结果
+            result = {
+                'success': True,
+                'total': pagination.total,
+                'page': page,
+                'per_page': per_page,
+                'pages': pagination.pages,
+                'datasets': []
+            }
         
         for dataset in datasets:
             result['datasets'].append({
@@ -82,12 +113,13 @@ def get_dataset(dataset_id):
         if not dataset:
             return jsonify({'success': False, 'message': '数据集不存在'}), 404
         
-        # 读取数据集预览数据
+        # 读取数据集预览数据（来自上传时生成的预览文件，不读取完整数据）
+        preview_rows = min(max(request.args.get('preview_rows', 10, type=int), 0), MAX_PREVIEW_ROWS)
         preview_data = None
+        schema = None
         if dataset.file_path and os.path.exists(dataset.file_path):
             try:
-                df = pd.read_csv(dataset.file_path)
-                preview_data = df.head(10).to_dict('records')
+                preview_data, schema = read_preview(dataset.file_path, preview_rows)
             except Exception as e:
                 logger.warning(f'读取数据集预览失败: {str(e)}')
         
@@ -104,6 +136,8 @@ def get_dataset(dataset_id):
                 'value_column': dataset.value_column,
                 'created_at': dataset.created_at.isoformat(),
                 'is_preset': dataset.is_preset,
+                'profile': dataset.profile,
+                'schema': schema,
                 'preview_data': preview_data
             }
         }), 200
@@ -112,6 +146,121 @@ def get_dataset(dataset_id):
         logger.error(f'获取数据集详情失败: {str(e)}')
         return jsonify({'success': False, 'message': f'获取数据集详情失败: {str(e)}'}), 500
 
+@dataset_bp.route('/<int:dataset_id>/range', methods=['GET'])
+def get_dataset_range(dataset_id):
+    """
+    按时间范围读取数据集片段
+    start/end 为时间（没有时间列时为行号），columns 指定返回的列（逗号分隔），
+    max_points 指定最大返回点数（超过时按 downsample 指定的方法降采样）
+    基于内存映射的时间索引二分查找，开销与返回的行数成正比
+    """
+    try:
+        dataset = Dataset.query.get(dataset_id)
+        if not dataset:
+            return jsonify({'success': False, 'message': '数据集不存在'}), 404
+        
+        if not dataset.file_path or not os.path.exists(dataset.file_path):
+            return jsonify({'success': False, 'message': '数据集文件不存在'}), 404
+        
+        # 导入功能上线前的数据集（CSV）在首次查询时生成列式存储
+        if not is_columnar(dataset.file_path):
+            ensure_dataset_columnar(dataset)
+            db.session.commit()
+        path = dataset.file_path
+        meta = read_meta(path)
+        
+        # 解析列参数
+        all_columns = [c['name'] for c in meta['columns']]
+        columns = request.args.get('columns')
+        if columns:
+            columns = [c.strip() for c in columns.split(',') if c.strip()]
+            unknown = [c for c in columns if c not in all_columns]
+            if unknown:
+                return jsonify({'success': False, 'message': f'列不存在: {", ".join(unknown)}'}), 400
+        
+        max_points = request.args.get('max_points', type=int)
+        if max_points is not None and max_points < MIN_DOWNSAMPLE_POINTS:
+            return jsonify({'success': False, 'message': f'max_points 不能小于{MIN_DOWNSAMPLE_POINTS}'}), 400
+        method = request.args.get('downsample', 'lttb')
+        if method not in DOWNSAMPLE_METHODS:
+            return jsonify({'success': False, 'message': '不支持的降采样方法'}), 400
+        
+        # 定位时间范围对应的行
+        try:
+            rows = select_time_range(path, request.args.get('start'), request.args.get('end'), meta)
+        except ValueError:
+            return jsonify({'success': False, 'message': '无效的时间范围'}), 400
+        row_numbers = np.arange(rows.start, rows.stop) if isinstance(rows, slice) else rows
+        total_points = len(row_numbers)
+        
+        # 降采样：以第一个数值列为基准选点，所有列使用相同的行
+        if max_points and total_points > max_points:
+            numeric = [c['name'] for c in meta['columns']
+                       if c['kind'] == 'numeric' and (not columns or c['name'] in columns)]
+            if numeric:
+                base = read_rows(path, rows, [numeric[0]], meta)[numeric[0]]
+                row_numbers = row_numbers[downsample_indices(base, max_points, method)]
+            else:
+                row_numbers = row_numbers[np.linspace(0, total_points - 1, max_points).astype(np.int64)]
+            rows = row_numbers
+        elif total_points > MAX_RANGE_ROWS:
+            return jsonify({'success': False, 'message': f'返回行数超过{MAX_RANGE_ROWS}，请缩小范围或指定max_points'}), 400
+        
+        data = read_rows(path, rows, columns, meta)
+        
+        return jsonify({
+            'success': True,
+            'dataset_id': dataset.id,
+            'time_column': meta.get('time_column'),
+            'total_points': total_points,
+            'points': len(row_numbers),
+            'data': columns_to_json(data)
+        }), 200
+        
+    except Exception as e:
+        logger.error(f'获取数据集区间数据失败: {str(e)}')
+        return jsonify({'success': False, 'message': f'获取数据集区间数据失败: {str(e)}'}), 500
+
+@dataset_bp.route('/<int:dataset_id>/download', methods=['GET'])
+def download_dataset(dataset_id):
+    """
+    下载数据集原始文件
+    """
+    try:
+        dataset = Dataset.query.get(dataset_id)
+        if not dataset:
+            return jsonify({'success': False, 'message': '数据集不存在'}), 404
+        
+        # 上传的数据集保留了原始CSV，预设数据集直接使用数据文件
+        path = dataset.source_path or dataset.file_path
+        if not path or not os.path.isfile(path):
+            return jsonify({'success': False, 'message': '数据集文件不存在'}), 404
+        
+        # 上传文件按内容哈希命名，下载时使用数据集名称
+        download_name = os.path.basename(path)
+        if dataset.source_path:
+            download_name = dataset.name if dataset.name.endswith('.csv') else f'{dataset.name}.csv'
+        return send_file(os.path.abspath(path), as_attachment=True, download_name=download_name)
+        
+    except Exception as e:
+        logger.error(f'下载数据集失败: {str(e)}')
+        return jsonify({'success': False, 'message': f'下载数据集失败: {str(e)}'}), 500
+
+@dataset_bp.route('/cache', methods=['GET'])
+def get_dataset_cache_stats():
+    """
+    获取数据集缓存统计信息（命中/未命中次数、内存占用）
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'cache': dataset_cache.stats()
+        }), 200
+        
+    except Exception as e:
+        logger.error(f'获取数据集缓存统计失败: {str(e)}')
+        return jsonify({'success': False, 'message': f'获取数据集缓存统计失败: {str(e)}'}), 500
+
 @dataset_bp.route('/', methods=['POST'])
 def create_dataset():
     """
@@ -152,30 +301,35 @@ def create_dataset():
         if not file.filename.endswith('.csv'):
             return jsonify({'success': False, 'message': '仅支持CSV文件'}), 400
         
-        # 保存文件
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        file_path = os.path.join(DATASET_DIR, f"{timestamp}_{file.filename}")
-        file.save(file_path)
+        # 按内容寻址保存原始文件（保留用于下载），写入时同时计算内容哈希
+        # 内容相同的文件只保存一份，新数据集直接引用已有文件和列式目录
+        source_path, content_hash, deduplicated = save_blob(file.stream)
         
-        # 解析CSV文件
+        # 分批流式转换为列式存储格式，后续读取不再解析CSV
         try:
-            df = pd.read_csv(file_path)
-            rows, columns = df.shape
+            chunk_rows = current_app.config.get('DATASET_INGEST_CHUNK_ROWS', CHUNK_ROWS)
+            file_path, meta = ensure_columnar(source_path, chunk_rows=chunk_rows, content_hash=content_hash)
+            rows = meta['rows']
+            columns = len(meta['columns'])
+            column_names = [c['name'] for c in meta['columns']]
             
             # 猜测时间列和值列
-            time_column = df.columns[0]  # 假设第一列是时间列
-            value_column = df.columns[1] if len(df.columns) > 1 else None  # 假设第二列是值列
+            time_column = column_names[0]  # 假设第一列是时间列
+            value_column = column_names[1] if len(column_names) > 1 else None  # 假设第二列是值列
             
             # 创建数据集记录
             dataset = Dataset(
                 name=request.form.get('name', file.filename),
                 description=request.form.get('description', ''),
                 file_path=file_path,
+                source_path=source_path,
+                content_hash=content_hash,
                 category=request.form.get('category', '其他'),
                 rows=rows,
                 columns=columns,
                 time_column=time_column,
                 value_column=value_column,
+                profile=build_profile(meta),
                 is_preset=False,
                 created_at=datetime.utcnow()
             )
@@ -200,14 +354,18 @@ def create_dataset():
                     'id': dataset.id,
                     'name': dataset.name,
                     'rows': rows,
-                    'columns': columns
+                    'columns': columns,
+                    'content_hash': content_hash,
+                    'deduplicated': deduplicated
                 }
             }), 201
             
         except Exception as e:
-            # 如果解析失败，删除已上传的文件
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            # 如果解析失败，删除已上传的文件（文件已被其他数据集引用时保留）
+            db.session.rollback()
+            file_path = columnar_dir_for(source_path)
+            if not is_data_referenced(file_path):
+                delete_dataset_files(file_path, source_path)
             logger.error(f'解析CSV文件失败: {str(e)}')
             return jsonify({'success': False, 'message': f'解析CSV文件失败: {str(e)}'}), 400
         
@@ -215,6 +373,115 @@ def create_dataset():
         logger.error(f'创建数据集失败: {str(e)}')
         return jsonify({'success': False, 'message': f'创建数据集失败: {str(e)}'}), 500
 
+@dataset_bp.route('/<int:dataset_id>/append', methods=['POST'])
+def append_dataset(dataset_id):
+    """
+    向已有数据集追加数据（上传只包含新行的CSV文件，列与数据集一致）
+    只写入新增的行，列统计、行数和数据集画像在原有状态上增量更新
+    每次追加写入数据集的新版本（写时复制），已有任务引用的数据文件和按其内容计算的缓存键保持不变
+    需要JWT认证
+    """
+    try:
+        # 获取用户ID
+        user_id = None
+        auth_header = request.headers.get('Authorization')
+        if auth_header and auth_header.startswith('Bearer '):
+            try:
+                token = auth_header.split(' ')[1]
+                payload = jwt.decode(
+                    token,
+                    current_app.config['SECRET_KEY'],
+                    algorithms=['HS256']
+                )
+                user_id = payload['user_id']
+            except Exception as e:
+                logger.warning(f'获取用户ID失败: {str(e)}')
+                return jsonify({'success': False, 'message': '认证失败'}), 401
+        else:
+            return jsonify({'success': False, 'message': '需要认证'}), 401
+        
+        # 查找数据集
+        dataset = Dataset.query.get(dataset_id)
+        if not dataset:
+            return jsonify({'success': False, 'message': '数据集不存在'}), 404
+        if dataset.is_preset or not is_columnar(dataset.file_path):
+            return jsonify({'success': False, 'message': '该数据集不支持追加数据'}), 400
+        
+        # 验证表单数据
+        if 'file' not in request.files:
+            return jsonify({'success': False, 'message': '未提供文件'}), 400
+        
+        file = request.files['file']
+        if file.filename == '' or not file.filename.endswith('.csv'):
+            return jsonify({'success': False, 'message': '仅支持CSV文件'}), 400
+        
+        # 复制当前版本后在副本上追加，任务的 data_path 和结果缓存引用的文件不会被修改
+        old_file_path, old_source_path = dataset.file_path, dataset.source_path
+        old_rows = dataset.rows
+        file_path, source_path = copy_columnar(old_file_path, old_source_path)
+        
+        # 上传文件先保存为临时文件，追加完成后删除
+        tmp_path = os.path.join(DATASET_DIR, f'.append.{uuid.uuid4().hex}.tmp')
+        try:
+            file.save(tmp_path)
+            chunk_rows = current_app.config.get('DATASET_INGEST_CHUNK_ROWS', CHUNK_ROWS)
+            meta = append_csv(file_path, tmp_path, chunk_rows=chunk_rows)
+        except ValueError as e:
+            delete_dataset_files(file_path, source_path)
+            return jsonify({'success': False, 'message': f'追加数据失败: {str(e)}'}), 400
+        except Exception:
+            delete_dataset_files(file_path, source_path)
+            raise
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        
+        # 数据文件路径和内容哈希一起更新；其他请求已先追加（版本已变化）时放弃本次追加
+        updated = Dataset.query.filter(Dataset.id == dataset.id, Dataset.file_path == old_file_path).update({
+            'file_path': file_path,
+            'source_path': source_path,
+            'rows': meta['rows'],
+            'content_hash': meta['content_hash'],
+            'profile': build_profile(meta)
+        }, synchronize_session=False)
+        db.session.commit()
+        if not updated:
+            delete_dataset_files(file_path, source_path)
+            return jsonify({'success': False, 'message': '数据集已被其他请求修改，请重试'}), 409
+        
+        # 旧版本不再被任何数据集或任务引用时删除（按内容寻址的共享文件保留）
+        if (not is_blob_data(old_file_path) and not is_data_referenced(old_file_path)
+                and not Task.query.filter_by(data_path=old_file_path).first()):
+            delete_dataset_files(old_file_path, old_source_path)
+        
+        # 记录系统日志
+        log = SystemLog(
+            level='INFO',
+            message=f'追加数据集数据: {dataset.name}，新增 {meta["rows"] - old_rows} 行',
+            source='dataset.append_dataset',
+            user_id=user_id
+        )
+        db.session.add(log)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': '数据追加成功',
+            'dataset': {
+                'id': dataset.id,
+                'name': dataset.name,
+                'rows': dataset.rows,
+                'appended_rows': meta['rows'] - old_rows,
+                'content_hash': dataset.content_hash,
+                'profile': dataset.profile
+            }
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f'追加数据集数据失败: {str(e)}')
+        return jsonify({'success': False, 'message': f'追加数据集数据失败: {str(e)}'}), 500
+
 @dataset_bp.route('/<int:dataset_id>', methods=['DELETE'])
 def delete_dataset(dataset_id):
     """
@@ -251,9 +518,9 @@ def delete_dataset(dataset_id):
         if dataset.is_preset and not is_admin:
             return jsonify({'success': False, 'message': '无权删除预设数据集'}), 403
         
-        # 删除文件
-        if dataset.file_path and os.path.exists(dataset.file_path) and not dataset.is_preset:
-            os.remove(dataset.file_path)
+        # 删除文件（列式目录和原始文件按内容共享，没有其他数据集或任务引用时才删除）
+        if not dataset.is_preset and not is_data_referenced(dataset.file_path, exclude_dataset_id=dataset.id):
+            delete_dataset_files(dataset.file_path, dataset.source_path)
         
         # 删除数据库记录
         db.session.delete(dataset)
@@ -276,4 +543,23 @@ def delete_dataset(dataset_id):
         
     except Exception as e:
         logger.error(f'删除数据集失败: {str(e)}')
-        return jsonify({'success': False, 'message': f'删除数据集失败: {str(e)}'}), 500
\ No newline at end of file
+        return jsonify({'success': False, 'message': f'删除数据集失败: {str(e)}'}), 500
+
+# 辅助函数
+def is_data_referenced(file_path, exclude_dataset_id=None):
+    """
+    数据文件是否仍被其他数据集或直接上传数据的预测任务引用
+    """
+    query = Dataset.query.filter(Dataset.file_path == file_path)
+    if exclude_dataset_id is not None:
+        query = query.filter(Dataset.id != exclude_dataset_id)
+    if query.first():
+        return True
+    return Task.query.filter(Task.data_path == file_path, Task.dataset_id.is_(None)).first() is not None
+
+
+def is_blob_data(file_path):
+    """
+    数据文件是否位于按内容寻址的共享存储（内容不可修改，可能被之后的上传复用）
+    """
+    return os.path.abspath(file_path).startswith(os.path.abspath(BLOB_DIR) + os.sep)
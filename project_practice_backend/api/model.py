@@ -5,6 +5,7 @@ from datetime import datetime
 
 from database.db import db
 from database.models import Model, SystemLog
+from services.pagination import paginate_keyset, count_total
 
 # 创建蓝图
 model_bp = Blueprint('model', __name__)
@@ -30,19 +31,35 @@ def get_models():
         if model_type:
             query = query.filter_by(model_type=model_type)
         
-        # 执行分页查询
-        pagination = query.paginate(page=page, per_page=per_page)
-        models = pagination.items
-        
-        # 格式化结果
-        result = {
-            'success': True,
-            'total': pagination.total,
-            'page': page,
-            'per_page': per_page,
-            'pages': pagination.pages,
-            'models': []
-        }
+        if 'cursor' in request.args:
+            # 游标分页：按 (created_at, id) 倒序从上一页末尾继续读取，总数按需统计（total=exact/approx）
+            try:
+                models, next_cursor = paginate_keyset(query, Model, per_page, request.args.get('cursor'))
+            except ValueError as e:
+                return jsonify({'success': False, 'message': str(e)}), 400
+            total, total_exact = count_total(query, request.args.get('total'))
+            result = {
+                'success': True,
+                'total': total,
+                'total_exact': total_exact,
+                'per_page': per_page,
+                'next_cursor': next_cursor,
+                'models': []
+            }
+        else:
+            # 执行分页查询
+            pagination = query.paginate(page=page, per_page=per_page)
+            models = pagination.items
+            
+            # 格式化结果
+            result = {
+                'success': True,
+                'total': pagination.total,
+                'page': page,
+                'per_page': per_page,
+                'pages': pagination.pages,
+                'models': []
+            }
         
         for model in models:
             result['models'].append({
@@ -1,15 +1,21 @@
 import jwt
 from flask import Blueprint, request, jsonify, current_app
 import os
-import json
-import numpy as np
-import pandas as pd
+import uuid
 from datetime import datetime
 import logging
-import time
 
 from database.db import db
 from database.models import Task, Dataset, Model, SystemLog, User
+from services.task_queue import task_queue
+from services.prediction_service import complete_from_cache, DEFAULT_SWEEP_MAX_TRIALS
+from services.scheduler import PRIORITIES, PRIORITY_INTERACTIVE, PRIORITY_BATCH
+from services.sweep import build_trials, DEFAULT_METRIC
+from services.backtest import parse_config as parse_backtest_config, count_folds
+from services.dataset_store import save_blob, ensure_columnar, ensure_dataset_columnar, resolve_value_columns, numeric_columns
+from services.downsample import METHODS as DOWNSAMPLE_METHODS, MIN_POINTS as MIN_DOWNSAMPLE_POINTS
+from services.result_store import result_exists, load_result, load_downsampled
+from services.task_events import TERMINAL_STATUSES
 
 # 创建蓝图
 prediction_bp = Blueprint('prediction', __name__)
@@ -17,24 +23,23 @@ prediction_bp = Blueprint('prediction', __name__)
 # 创建日志记录器
 logger = logging.getLogger(__name__)
 
-# 预测结果保存目录
-RESULT_DIR = 'results'
-
 @prediction_bp.route('/predict', methods=['POST'])
 def predict():
     """
     执行时间序列预测
     """
     try:
-        # 确保结果目录存在
-        os.makedirs(RESULT_DIR, exist_ok=True)
-        
         data = request.get_json()
         
         # 验证必要字段
         required_fields = ['taskName', 'modelType', 'hyperParams']
         if not all(k in data for k in required_fields):
             return jsonify({'success': False, 'message': '缺少必要字段'}), 400
+        try:
+            timeout = parse_timeout(data.get('timeout'))
+            priority = parse_priority(data.get('priority'), PRIORITY_INTERACTIVE)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
         
         # 获取用户ID（如果有认证）
         user_id = None
@@ -51,13 +56,16 @@ def predict():
             except Exception as e:
                 logger.warning(f'获取用户ID失败: {str(e)}')
         
-        # 创建预测任务记录
+        # 创建预测任务记录（进入队列，由后台工作线程执行）
         task = Task(
             name=data['taskName'],
             user_id=user_id,
             model_id=get_model_id(data['modelType']),
-            status='running',
+            status='pending',
             hyperparams=data['hyperParams'],
+            use_cache=data.get('useCache', True),
+            timeout=timeout,
+            priority=priority,
             created_at=datetime.utcnow()
         )
         
@@ -67,17 +75,24 @@ def predict():
             dataset = Dataset.query.get(data['datasetId'])
             if not dataset:
                 return jsonify({'success': False, 'message': '数据集不存在'}), 404
-            data_file = dataset.file_path
+            # 导入功能上线前的数据集（CSV）在首次使用时生成列式存储，随任务一起提交
+            data_file = ensure_dataset_columnar(dataset)
         elif data.get('dataSourceType') == 'upload' and request.files.get('file'):
-            # 保存上传的文件
+            # 按内容寻址保存上传的文件，内容相同时复用已有文件和列式目录
             file = request.files['file']
-            upload_dir = 'uploads'
-            os.makedirs(upload_dir, exist_ok=True)
-            file_path = os.path.join(upload_dir, f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{file.filename}")
-            file.save(file_path)
-            data_file = file_path
+            file_path, content_hash, _ = save_blob(file.stream)
+            data_file, _ = ensure_columnar(file_path, content_hash=content_hash)
         else:
             return jsonify({'success': False, 'message': '无效的数据源'}), 400
+        task.data_path = data_file
+        
+        # 多列预测：提交时将目标列解析为具体列名
+        value_columns = data.get('valueColumns') or data['hyperParams'].get('valueColumns')
+        if value_columns:
+            try:
+                task.hyperparams = resolve_hyperparams(data['hyperParams'], value_columns, data_file)
+            except ValueError as e:
+                return jsonify({'success': False, 'message': str(e)}), 400
         
         # 保存任务到数据库
         db.session.add(task)
@@ -93,44 +108,450 @@ def predict():
         db.session.add(log)
         db.session.commit()
         
-        # 执行预测（这里是模拟，实际应用中可能需要异步处理）
-        start_time = time.time()
+        # 相同输入已有缓存结果时直接完成，否则提交到后台任务队列，立即返回任务ID
+        # 客户端通过 /api/task/<id> 查询任务状态和结果
+        if not complete_from_cache(task):
+            task_queue.submit(task.id, task.user_id, task.priority)
+        
+        return jsonify({
+            'success': True,
+            'message': '预测任务已提交',
+            'taskId': task.id,
+            'status': task.status,
+            'cacheHit': bool(task.cache_hit)
+        }), 202
+        
+    except Exception as e:
+        logger.error(f'预测失败: {str(e)}')
+        return jsonify({'success': False, 'message': f'预测失败: {str(e)}'}), 500
+
+@prediction_bp.route('/batch', methods=['POST'])
+def predict_batch():
+    """
+    批量提交预测作业（每个作业为 数据集 + 值列 + 模型 + 超参数）
+    所有任务在一次批量插入中创建，按数据集分组提交到队列，使同一数据集的作业共享工作进程中的缓存
+    """
+    try:
+        data = request.get_json()
+        
+        # 验证必要字段
+        jobs = data.get('jobs') if data else None
+        if not isinstance(jobs, list) or not jobs:
+            return jsonify({'success': False, 'message': '缺少预测作业列表'}), 400
+        max_jobs = current_app.config.get('PREDICTION_BATCH_MAX_JOBS', 1000)
+        if len(jobs) > max_jobs:
+            return jsonify({'success': False, 'message': f'单次最多提交{max_jobs}个预测作业'}), 400
+        required_fields = ['datasetId', 'modelType']
+        if not all(isinstance(job, dict) and all(k in job for k in required_fields) for job in jobs):
+            return jsonify({'success': False, 'message': '预测作业缺少必要字段'}), 400
+        
+        # 获取用户ID（如果有认证）
+        user_id = None
+        auth_header = request.headers.get('Authorization')
+        if auth_header and auth_header.startswith('Bearer '):
+            try:
+                token = auth_header.split(' ')[1]
+                payload = jwt.decode(
+                    token,
+                    current_app.config['SECRET_KEY'],
+                    algorithms=['HS256']
+                )
+                user_id = payload['user_id']
+            except Exception as e:
+                logger.warning(f'获取用户ID失败: {str(e)}')
+        
+        # 一次查询取出所有涉及的数据集和模型
+        dataset_ids = {job['datasetId'] for job in jobs}
+        datasets = {d.id: d for d in Dataset.query.filter(Dataset.id.in_(dataset_ids)).all()}
+        missing = sorted(dataset_ids - set(datasets))
+        if missing:
+            return jsonify({'success': False, 'message': f'数据集不存在: {missing}'}), 404
+        for dataset in datasets.values():
+            ensure_dataset_columnar(dataset)
+        model_types = {job['modelType'] for job in jobs}
+        model_ids = {m.model_type: m.id for m in Model.query.filter(Model.model_type.in_(model_types)).all()}
+        
+        batch_id = uuid.uuid4().hex
+        batch_name = data.get('batchName') or f'批量预测_{datetime.now().strftime("%Y%m%d%H%M%S")}'
+        created_at = datetime.utcnow()
+        rows = []
+        for i, job in enumerate(jobs):
+            dataset = datasets[job['datasetId']]
+            try:
+                timeout = parse_timeout(job.get('timeout', data.get('timeout')))
+                priority = parse_priority(job.get('priority', data.get('priority')), PRIORITY_BATCH)
+            except ValueError as e:
+                return jsonify({'success': False, 'message': f'第{i + 1}个作业: {str(e)}'}), 400
+            hyperparams = dict(job.get('hyperParams') or {})
+            if job.get('valueColumn'):
+                hyperparams['valueColumn'] = job['valueColumn']
+            if job.get('valueColumns') or hyperparams.get('valueColumns'):
+                try:
+                    hyperparams = resolve_hyperparams(hyperparams, job.get('valueColumns'), dataset.file_path)
+                except ValueError as e:
+                    return jsonify({'success': False, 'message': f'第{i + 1}个作业: {str(e)}'}), 400
+            rows.append({
+                'name': job.get('taskName') or f'{batch_name}_{i + 1}',
+                'user_id': user_id,
+                'dataset_id': dataset.id,
+                'model_id': model_ids.get(job['modelType']),
+                'status': 'pending',
+                'batch_id': batch_id,
+                'hyperparams': hyperparams,
+                'use_cache': job.get('useCache', data.get('useCache', True)),
+                'timeout': timeout,
+                'priority': priority,
+                'data_path': dataset.file_path,
+                'created_at': created_at
+            })
+        
+        # 批量插入任务记录（单条多行INSERT，一次提交）
+        db.session.execute(db.insert(Task), rows)
+        db.session.commit()
         
-        # 读取数据
-        df = pd.read_csv(data_file)
+        # 记录系统日志
+        log = SystemLog(
+            level='INFO',
+            message=f'创建批量预测任务: {batch_name} ({len(rows)}个作业)',
+            source='prediction.predict_batch',
+            user_id=user_id
+        )
+        db.session.add(log)
+        db.session.commit()
         
-        # 模拟预测过程
-        time.sleep(2)  # 模拟计算时间
+        # 按数据集和模型类型排序后提交到后台任务队列（命中结果缓存的任务直接完成）
+        tasks = Task.query.filter_by(batch_id=batch_id).order_by(Task.dataset_id, Task.model_id, Task.id).all()
+        cache_hits = 0
+        for task in tasks:
+            if complete_from_cache(task):
+                cache_hits += 1
+            else:
+                task_queue.submit(task.id, task.user_id, task.priority)
+        
+        return jsonify({
+            'success': True,
+            'message': '批量预测任务已提交',
+            'batchId': batch_id,
+            'taskIds': sorted(task.id for task in tasks),
+            'total': len(tasks),
+            'cacheHits': cache_hits
+        }), 202
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f'批量预测失败: {str(e)}')
+        return jsonify({'success': False, 'message': f'批量预测失败: {str(e)}'}), 500
+
+@prediction_bp.route('/batch/<batch_id>', methods=['GET'])
+def get_batch(batch_id):
+    """
+    获取批量预测的整体进度
+    """
+    try:
+        # 按状态聚合计数，不加载任务记录
+        counts = dict(
+            db.session.query(Task.status, db.func.count(Task.id))
+            .filter(Task.batch_id == batch_id)
+            .group_by(Task.status)
+            .all()
+        )
+        total = sum(counts.values())
+        if not total:
+            return jsonify({'success': False, 'message': '批次不存在'}), 404
+        
+        finished = sum(counts.get(status, 0) for status in TERMINAL_STATUSES)
+        result = {
+            'success': True,
+            'batchId': batch_id,
+            'total': total,
+            'status_counts': counts,
+            'progress': round(finished / total, 4),
+            'finished': finished == total
+        }
+        
+        # 可选返回每个任务的状态
+        if request.args.get('include_tasks', 'false').lower() == 'true':
+            tasks = Task.query.filter_by(batch_id=batch_id).order_by(Task.id).all()
+            result['tasks'] = [{
+                'id': task.id,
+                'name': task.name,
+                'status': task.status,
+                'dataset_id': task.dataset_id,
+                'value_column': (task.hyperparams or {}).get('valueColumn'),
+                'metrics': task.metrics,
+                'error_message': task.error_message
+            } for task in tasks]
+        
+        return jsonify(result), 200
+        
+    except Exception as e:
+        logger.error(f'获取批量预测进度失败: {str(e)}')
+        return jsonify({'success': False, 'message': f'获取批量预测进度失败: {str(e)}'}), 500
+
+@prediction_bp.route('/sweep', methods=['POST'])
+def create_sweep():
+    """
+    创建超参数扫描任务
+    搜索空间为网格或随机搜索配置，每个超参数组合作为一个子任务执行，结果汇总到父任务
+    """
+    try:
+        data = request.get_json()
+        
+        # 验证必要字段
+        required_fields = ['taskName', 'modelType', 'datasetId', 'search']
+        if not data or not all(k in data for k in required_fields):
+            return jsonify({'success': False, 'message': '缺少必要字段'}), 400
+        if data.get('mode', 'min') not in ('min', 'max'):
+            return jsonify({'success': False, 'message': '优化方向必须是 min 或 max'}), 400
+        try:
+            timeout = parse_timeout(data.get('timeout'))
+            priority = parse_priority(data.get('priority'), PRIORITY_BATCH)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        
+        # 提前校验搜索配置
+        max_trials = current_app.config.get('SWEEP_MAX_TRIALS', DEFAULT_SWEEP_MAX_TRIALS)
+        try:
+            trials = build_trials(data['search'], max_trials)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        
+        # 获取用户ID（如果有认证）
+        user_id = None
+        auth_header = request.headers.get('Authorization')
+        if auth_header and auth_header.startswith('Bearer '):
+            try:
+                token = auth_header.split(' ')[1]
+                payload = jwt.decode(
+                    token,
+                    current_app.config['SECRET_KEY'],
+                    algorithms=['HS256']
+                )
+                user_id = payload['user_id']
+            except Exception as e:
+                logger.warning(f'获取用户ID失败: {str(e)}')
         
-        # 生成模拟预测结果
-        result = generate_mock_prediction(df, data['hyperParams'])
+        dataset = Dataset.query.get(data['datasetId'])
+        if not dataset:
+            return jsonify({'success': False, 'message': '数据集不存在'}), 404
+        ensure_dataset_columnar(dataset)
         
-        # 计算执行时长
-        duration = time.time() - start_time
+        base_params = dict(data.get('hyperParams') or {})
+        if data.get('valueColumn'):
+            base_params['valueColumn'] = data['valueColumn']
+        if data.get('valueColumns') or base_params.get('valueColumns'):
+            try:
+                base_params = resolve_hyperparams(base_params, data.get('valueColumns'), dataset.file_path)
+            except ValueError as e:
+                return jsonify({'success': False, 'message': str(e)}), 400
         
-        # 保存预测结果
-        result_file = os.path.join(RESULT_DIR, f"task_{task.id}_result.json")
-        with open(result_file, 'w') as f:
-            json.dump(result, f)
+        # 创建扫参父任务，子任务在执行时生成
+        task = Task(
+            name=data['taskName'],
+            user_id=user_id,
+            dataset_id=dataset.id,
+            model_id=get_model_id(data['modelType']),
+            task_type='sweep',
+            status='pending',
+            hyperparams={
+                'search': data['search'],
+                'hyperParams': base_params,
+                'metric': data.get('metric', DEFAULT_METRIC),
+                'mode': data.get('mode', 'min'),
+                'maxConcurrency': data.get('maxConcurrency'),
+                'earlyStopping': data.get('earlyStopping')
+            },
+            data_path=dataset.file_path,
+            use_cache=data.get('useCache', True),
+            timeout=timeout,
+            priority=priority,
+            created_at=datetime.utcnow()
+        )
+        db.session.add(task)
+        db.session.commit()
         
-        # 更新任务状态
-        task.status = 'completed'
-        task.completed_at = datetime.utcnow()
-        task.duration = duration
-        task.result_path = result_file
-        task.metrics = result['metrics']
+        # 记录系统日志
+        log = SystemLog(
+            level='INFO',
+            message=f'创建扫参任务: {data["taskName"]} ({len(trials)}个试验)',
+            source='prediction.create_sweep',
+            user_id=user_id
+        )
+        db.session.add(log)
         db.session.commit()
         
+        task_queue.submit(task.id, task.user_id, task.priority)
+        
         return jsonify({
             'success': True,
-            'message': '预测完成',
+            'message': '扫参任务已提交',
             'taskId': task.id,
-            'result': result
+            'trials': len(trials),
+            'status': task.status
+        }), 202
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f'创建扫参任务失败: {str(e)}')
+        return jsonify({'success': False, 'message': f'创建扫参任务失败: {str(e)}'}), 500
+
+@prediction_bp.route('/sweep/<int:task_id>', methods=['GET'])
+def get_sweep(task_id):
+    """
+    获取扫参任务进度和各试验结果（已完成的试验按分数排序）
+    """
+    try:
+        task = Task.query.get(task_id)
+        if not task or task.task_type != 'sweep':
+            return jsonify({'success': False, 'message': '扫参任务不存在'}), 404
+        
+        spec = task.hyperparams or {}
+        metric = spec.get('metric', DEFAULT_METRIC)
+        reverse = spec.get('mode', 'min') == 'max'
+        
+        trials = []
+        counts = {}
+        for child in task.children.order_by(Task.id).all():
+            counts[child.status] = counts.get(child.status, 0) + 1
+            trials.append({
+                'id': child.id,
+                'name': child.name,
+                'status': child.status,
+                'hyperparams': child.hyperparams,
+                'score': (child.metrics or {}).get(metric),
+                'duration': child.duration,
+                'cache_hit': bool(child.cache_hit),
+                'error_message': child.error_message
+            })
+        scored = sorted((t for t in trials if t['score'] is not None), key=lambda t: t['score'], reverse=reverse)
+        unscored = [t for t in trials if t['score'] is None]
+        
+        finished = sum(n for status, n in counts.items() if status in ('completed', 'failed', 'cancelled'))
+        return jsonify({
+            'success': True,
+            'sweep': {
+                'id': task.id,
+                'name': task.name,
+                'status': task.status,
+                'metric': metric,
+                'mode': spec.get('mode', 'min'),
+                'search': spec.get('search'),
+                'total': len(trials),
+                'status_counts': counts,
+                'progress': round(finished / len(trials), 4) if trials else 0,
+                'summary': task.metrics,
+                'error_message': task.error_message,
+                'trials': scored + unscored
+            }
         }), 200
         
     except Exception as e:
-        logger.error(f'预测失败: {str(e)}')
-        return jsonify({'success': False, 'message': f'预测失败: {str(e)}'}), 500
+        logger.error(f'获取扫参任务失败: {str(e)}')
+        return jsonify({'success': False, 'message': f'获取扫参任务失败: {str(e)}'}), 500
+
+@prediction_bp.route('/backtest', methods=['POST'])
+def create_backtest():
+    """
+    创建滚动起点回测任务
+    window 为训练窗口长度，horizon 为每折预测步长，step 为相邻两折的间隔（默认等于horizon）
+    逐折指标和汇总指标保存在任务指标中，逐折的真实值和预测值保存为结果文件
+    """
+    try:
+        data = request.get_json()
+        
+        # 验证必要字段
+        required_fields = ['taskName', 'modelType', 'datasetId', 'window']
+        if not data or not all(k in data for k in required_fields):
+            return jsonify({'success': False, 'message': '缺少必要字段'}), 400
+        
+        hyperparams = dict(data.get('hyperParams') or {})
+        try:
+            config = parse_backtest_config(
+                {k: data[k] for k in ('window', 'step', 'horizon', 'season') if k in data},
+                hyperparams.get('predictionLength', 24)
+            )
+            timeout = parse_timeout(data.get('timeout'))
+            priority = parse_priority(data.get('priority'), PRIORITY_INTERACTIVE)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        
+        # 获取用户ID（如果有认证）
+        user_id = None
+        auth_header = request.headers.get('Authorization')
+        if auth_header and auth_header.startswith('Bearer '):
+            try:
+                token = auth_header.split(' ')[1]
+                payload = jwt.decode(
+                    token,
+                    current_app.config['SECRET_KEY'],
+                    algorithms=['HS256']
+                )
+                user_id = payload['user_id']
+            except Exception as e:
+                logger.warning(f'获取用户ID失败: {str(e)}')
+        
+        dataset = Dataset.query.get(data['datasetId'])
+        if not dataset:
+            return jsonify({'success': False, 'message': '数据集不存在'}), 404
+        ensure_dataset_columnar(dataset)
+        
+        # 校验目标列和折数
+        value_column = data.get('valueColumn') or dataset.value_column
+        if value_column not in numeric_columns(dataset.file_path):
+            return jsonify({'success': False, 'message': f'数值列不存在: {value_column}'}), 400
+        hyperparams['valueColumn'] = value_column
+        if dataset.rows:
+            folds = count_folds(dataset.rows, config['window'], config['horizon'], config['step'])
+            if folds == 0:
+                return jsonify({'success': False, 'message': '数据长度不足以构成一个回测折'}), 400
+            max_folds = current_app.config.get('BACKTEST_MAX_FOLDS', 10000)
+            if folds > max_folds:
+                return jsonify({'success': False, 'message': f'回测折数 {folds} 超过上限 {max_folds}，请增大step'}), 400
+            config['folds'] = folds
+        hyperparams['backtest'] = config
+        
+        task = Task(
+            name=data['taskName'],
+            user_id=user_id,
+            dataset_id=dataset.id,
+            model_id=get_model_id(data['modelType']),
+            task_type='backtest',
+            status='pending',
+            hyperparams=hyperparams,
+            data_path=dataset.file_path,
+            use_cache=data.get('useCache', True),
+            timeout=timeout,
+            priority=priority,
+            created_at=datetime.utcnow()
+        )
+        db.session.add(task)
+        db.session.commit()
+        
+        # 记录系统日志
+        log = SystemLog(
+            level='INFO',
+            message=f'创建回测任务: {data["taskName"]}',
+            source='prediction.create_backtest',
+            user_id=user_id
+        )
+        db.session.add(log)
+        db.session.commit()
+        
+        if not complete_from_cache(task):
+            task_queue.submit(task.id, task.user_id, task.priority)
+        
+        return jsonify({
+            'success': True,
+            'message': '回测任务已提交',
+            'taskId': task.id,
+            'folds': config.get('folds'),
+            'status': task.status
+        }), 202
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f'创建回测任务失败: {str(e)}')
+        return jsonify({'success': False, 'message': f'创建回测任务失败: {str(e)}'}), 500
 
 @prediction_bp.route('/tasks', methods=['GET'])
 def get_tasks():
@@ -154,8 +575,12 @@ def get_tasks():
             except Exception as e:
                 logger.warning(f'获取用户ID失败: {str(e)}')
         
-        # 查询任务
-        query = Task.query
+        # 查询任务（数据集、模型和用户在同一查询中连接加载，避免逐行懒加载）
+        query = Task.query.options(
+            db.joinedload(Task.dataset),
+            db.joinedload(Task.model),
+            db.joinedload(Task.user)
+        )
         
         # 如果不是管理员，只显示自己的任务
         if user_id and not is_admin:
@@ -228,11 +653,20 @@ def get_task(task_id):
         model_name = task.model.name if task.model else None
         username = task.user.username if task.user else None
         
-        # 读取预测结果
+        # 读取预测结果（指定max_points时返回降采样后的结果）
+        max_points = request.args.get('max_points', type=int)
+        if max_points is not None and max_points < MIN_DOWNSAMPLE_POINTS:
+            return jsonify({'success': False, 'message': f'max_points 不能小于{MIN_DOWNSAMPLE_POINTS}'}), 400
+        method = request.args.get('downsample', 'lttb')
+        if method not in DOWNSAMPLE_METHODS:
+            return jsonify({'success': False, 'message': '不支持的降采样方法'}), 400
         result = None
-        if task.result_path and os.path.exists(task.result_path):
-            with open(task.result_path, 'r') as f:
-                result = json.load(f)
+        if result_exists(task.result_path):
+            if max_points:
+                result, total_points = load_downsampled(task.result_path, max_points, method=method)
+                result['total_points'] = total_points
+            else:
+                result = load_result(task.result_path)
         
         return jsonify({
             'success': True,
@@ -248,6 +682,7 @@ def get_task(task_id):
                 'completed_at': task.completed_at.isoformat() if task.completed_at else None,
                 'duration': task.duration,
                 'metrics': task.metrics,
+                'error_message': task.error_message,
                 'result': result
             }
         }), 200
@@ -266,50 +701,29 @@ def get_model_id(model_type):
         return model.id
     return None
 
-def generate_mock_prediction(df, hyperparams):
+def resolve_hyperparams(hyperparams, value_columns, data_path):
     """
-    生成模拟预测结果
-    实际应用中应替换为真实的预测逻辑
+    将多列预测的目标列（列名列表或 'all'）解析为具体列名后写入超参数
     """
-    # 获取数据长度
-    data_length = len(df)
-    
-    # 获取预测长度
-    prediction_length = hyperparams.get('predictionLength', 24)
-    
-    # 生成模拟的真实值和预测值
-    real_values = np.sin(np.linspace(0, 10, data_length)).tolist()
-    predicted_values = np.sin(np.linspace(0.1, 10.1, data_length)).tolist()
-    print(real_values)
-    print(predicted_values)
-    
-    # 生成预测区间的上下界
-    upper_bound = [v + 0.2 for v in predicted_values]
-    lower_bound = [v - 0.2 for v in predicted_values]
-    
-    # 计算误差指标
-    errors = [abs(r - p) for r, p in zip(real_values, predicted_values)]
-    mse = np.mean(np.square(errors))
-    mae = np.mean(errors)
-    rmse = np.sqrt(mse)
-    
-    # 构建结果
-    result = {
-        'data': {
-            'timestamps': df.iloc[:, 0].tolist(),  # 假设第一列是时间戳
-            'real_values': real_values,
-            'predicted_values': predicted_values,
-            'upper_bound': upper_bound,
-            'lower_bound': lower_bound
-        },
-        'metrics': {
-            'mse': round(mse, 4),
-            'mae': round(mae, 4),
-            'rmse': round(rmse, 4),
-            'duration': round(np.random.uniform(1.5, 5.0), 2),
-            'dataPoints': data_length,
-            'confidence': round(np.random.uniform(0.85, 0.98), 2)
-        }
-    }
-    
-    return result
\ No newline at end of file
+    value_columns = value_columns or hyperparams.get('valueColumns')
+    return {**hyperparams, 'valueColumns': resolve_value_columns(data_path, value_columns)}
+
+def parse_timeout(value):
+    """
+    校验任务的执行超时（秒），未指定时返回None
+    """
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        raise ValueError('timeout 必须是正数（秒）')
+    return float(value)
+
+def parse_priority(value, default):
+    """
+    校验任务的调度优先级，未指定时返回该接口的默认优先级
+    """
+    if value is None:
+        return default
+    if value not in PRIORITIES:
+        raise ValueError(f'priority 必须是 {" 或 ".join(PRIORITIES)}')
+    return value
@@ -1,12 +1,22 @@
-from flask import Blueprint, request, jsonify, current_app
-import os
-import json
+from flask import Blueprint, request, jsonify, current_app, Response
 import logging
 import jwt
+import uuid
 from datetime import datetime
 
 from database.db import db
-from database.models import Task, SystemLog
+from database.models import Task, Model, SystemLog
+from services.downsample import METHODS as DOWNSAMPLE_METHODS, MIN_POINTS as MIN_DOWNSAMPLE_POINTS
+from services.result_store import (
+    result_exists, load_result, load_downsampled, time_range_to_index, delete_result, read_meta
+)
+from services.forecasters import supports_update
+from services.result_cache import result_cache
+from services.prediction_service import complete_from_cache, publish_status, request_cancel
+from services.task_queue import task_queue
+from services.task_events import task_events
+from services.scheduler import PRIORITY_BATCH
+from services.pagination import paginate_keyset, count_total
 
 # 创建蓝图
 task_bp = Blueprint('task', __name__)
@@ -37,8 +47,12 @@ def get_tasks():
             except Exception as e:
                 logger.warning(f'获取用户ID失败: {str(e)}')
         
-        # 查询任务
-        query = Task.query
+        # 查询任务（数据集、模型和用户在同一查询中连接加载，避免逐行懒加载）
+        query = Task.query.options(
+            db.joinedload(Task.dataset),
+            db.joinedload(Task.model),
+            db.joinedload(Task.user)
+        )
         
         # 如果不是管理员，只显示自己的任务
         if user_id and not is_admin:
@@ -55,26 +69,45 @@ def get_tasks():
         sort_by = request.args.get('sort_by', 'created_at')
         sort_order = request.args.get('sort_order', 'desc')
         
-        # 应用排序
-        if hasattr(Task, sort_by):
-            if sort_order.lower() == 'desc':
-                query = query.order_by(getattr(Task, sort_by).desc())
-            else:
-                query = query.order_by(getattr(Task, sort_by))
-        
-        # 执行分页查询
-        pagination = query.paginate(page=page, per_page=per_page)
-        tasks = pagination.items
-        
-        # 格式化结果
-        result = {
-            'success': True,
-            'total': pagination.total,
-            'page': page,
-            'per_page': per_page,
-            'pages': pagination.pages,
-            'tasks': []
-        }
+        if 'cursor' in request.args:
+            # 游标分页：按 (created_at, id) 从上一页末尾继续读取，总数按需统计（total=exact/approx）
+            if sort_by != 'created_at':
+                return jsonify({'success': False, 'message': '游标分页只支持按创建时间排序'}), 400
+            try:
+                tasks, next_cursor = paginate_keyset(query, Task, per_page, request.args.get('cursor'),
+                                                     descending=sort_order.lower() == 'desc')
+            except ValueError as e:
+                return jsonify({'success': False, 'message': str(e)}), 400
+            total, total_exact = count_total(query, request.args.get('total'))
+            result = {
+                'success': True,
+                'total': total,
+                'total_exact': total_exact,
+                'per_page': per_page,
+                'next_cursor': next_cursor,
+                'tasks': []
+            }
+        else:
+            # 应用排序
+            if hasattr(Task, sort_by):
+                if sort_order.lower() == 'desc':
+                    query = query.order_by(getattr(Task, sort_by).desc())
+                else:
+                    query = query.order_by(getattr(Task, sort_by))
+            
+            # 执行分页查询
+            pagination = query.paginate(page=page, per_page=per_page)
+            tasks = pagination.items
+            
+            # 格式化结果
+            result = {
+                'success': True,
+                'total': pagination.total,
+                'page': page,
+                'per_page': per_page,
+                'pages': pagination.pages,
+                'tasks': []
+            }
         
         for task in tasks:
             # 获取关联的数据集和模型信息
@@ -116,11 +149,20 @@ def get_task(task_id):
         model_name = task.model.name if task.model else None
         username = task.user.username if task.user else None
         
-        # 读取预测结果
+        # 读取预测结果（指定max_points时返回降采样后的结果）
+        max_points = request.args.get('max_points', type=int)
+        if max_points is not None and max_points < MIN_DOWNSAMPLE_POINTS:
+            return jsonify({'success': False, 'message': f'max_points 不能小于{MIN_DOWNSAMPLE_POINTS}'}), 400
+        method = request.args.get('downsample', 'lttb')
+        if method not in DOWNSAMPLE_METHODS:
+            return jsonify({'success': False, 'message': '不支持的降采样方法'}), 400
         result = None
-        if task.result_path and os.path.exists(task.result_path):
-            with open(task.result_path, 'r') as f:
-                result = json.load(f)
+        if result_exists(task.result_path):
+            if max_points:
+                result, total_points = load_downsampled(task.result_path, max_points, method=method)
+                result['total_points'] = total_points
+            else:
+                result = load_result(task.result_path)
         
         return jsonify({
             'success': True,
@@ -136,6 +178,7 @@ def get_task(task_id):
                 'completed_at': task.completed_at.isoformat() if task.completed_at else None,
                 'duration': task.duration,
                 'metrics': task.metrics,
+                'error_message': task.error_message,
                 'result': result
             }
         }), 200
@@ -144,6 +187,125 @@ def get_task(task_id):
         logger.error(f'获取任务详情失败: {str(e)}')
         return jsonify({'success': False, 'message': f'获取任务详情失败: {str(e)}'}), 500
 
+@task_bp.route('/<int:task_id>/result', methods=['GET'])
+def get_task_result(task_id):
+    """
+    按区间读取任务预测结果
+    支持下标区间(start, end)或时间区间(start_time, end_time)，fields指定返回字段（逗号分隔）
+    多列结果可通过columns指定返回的列（逗号分隔）
+    max_points指定最大返回点数，downsample指定降采样方法(lttb/minmax)
+    只读取请求的区间，不加载完整结果
+    """
+    try:
+        task = Task.query.get(task_id)
+        if not task:
+            return jsonify({'success': False, 'message': '任务不存在'}), 404
+        
+        if not result_exists(task.result_path):
+            return jsonify({'success': False, 'message': '任务结果不存在'}), 404
+        
+        # 解析区间参数
+        start = request.args.get('start', type=int)
+        end = request.args.get('end', type=int)
+        start_time = request.args.get('start_time')
+        end_time = request.args.get('end_time')
+        if start_time or end_time:
+            start, end = time_range_to_index(task.result_path, start_time, end_time)
+        
+        fields = request.args.get('fields')
+        if fields:
+            fields = [f.strip() for f in fields.split(',') if f.strip()]
+            if 'timestamps' not in fields:
+                fields.append('timestamps')
+        
+        # 多列结果只返回指定列
+        columns = request.args.get('columns')
+        if columns:
+            columns = [c.strip() for c in columns.split(',') if c.strip()]
+        
+        # 指定max_points时对区间内的数据降采样
+        max_points = request.args.get('max_points', type=int)
+        if max_points is not None and max_points < MIN_DOWNSAMPLE_POINTS:
+            return jsonify({'success': False, 'message': f'max_points 不能小于{MIN_DOWNSAMPLE_POINTS}'}), 400
+        method = request.args.get('downsample', 'lttb')
+        if method not in DOWNSAMPLE_METHODS:
+            return jsonify({'success': False, 'message': '不支持的降采样方法'}), 400
+        try:
+            if max_points:
+                result, total_points = load_downsampled(task.result_path, max_points, start=start, end=end,
+                                                        fields=fields, method=method, columns=columns)
+                result['total_points'] = total_points
+            else:
+                result = load_result(task.result_path, start=start, end=end, fields=fields, columns=columns)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        
+        return jsonify({
+            'success': True,
+            'task_id': task.id,
+            'start': start,
+            'end': end,
+            'result': result
+        }), 200
+        
+    except Exception as e:
+        logger.error(f'获取任务结果失败: {str(e)}')
+        return jsonify({'success': False, 'message': f'获取任务结果失败: {str(e)}'}), 500
+
+@task_bp.route('/<int:task_id>/events', methods=['GET'])
+def stream_task_events(task_id):
+    """
+    任务进度事件流（Server-Sent Events）
+    推送任务的状态变化、进度百分比和部分结果（扫参试验、分片执行的分片结果），任务结束后关闭连接
+    EventSource 不能设置请求头，认证令牌可通过查询参数 token 传递
+    """
+    try:
+        payload = get_event_token_payload()
+        if payload is None:
+            return jsonify({'success': False, 'message': '需要认证'}), 401
+        
+        # 先订阅再读取当前状态，避免错过两者之间发布的事件
+        subscription = task_events.subscribe(task_id=task_id)
+        task = Task.query.get(task_id)
+        if not task or (not payload.get('is_admin', False) and task.user_id != payload['user_id']):
+            task_events.unsubscribe(subscription)
+            return jsonify({'success': False, 'message': '任务不存在'}), 404
+        
+        # 任务在其他进程执行时本进程收不到事件，空闲时从数据库读取任务状态
+        app = current_app._get_current_object()
+        
+        def poll():
+            with app.app_context():
+                current = Task.query.get(task_id)
+                return task_snapshot(current) if current else None
+        
+        return event_stream_response(task_events.stream(subscription, [task_snapshot(task)], poll=poll))
+        
+    except Exception as e:
+        logger.error(f'订阅任务事件失败: {str(e)}')
+        return jsonify({'success': False, 'message': f'订阅任务事件失败: {str(e)}'}), 500
+
+@task_bp.route('/events', methods=['GET'])
+def stream_user_events():
+    """
+    当前用户所有任务的进度事件流（Server-Sent Events）
+    管理员指定 all=true 时接收所有用户的任务事件
+    """
+    try:
+        payload = get_event_token_payload()
+        if payload is None:
+            return jsonify({'success': False, 'message': '需要认证'}), 401
+        
+        user_id = payload['user_id']
+        if payload.get('is_admin', False) and request.args.get('all', 'false').lower() == 'true':
+            user_id = None
+        subscription = task_events.subscribe(user_id=user_id)
+        return event_stream_response(task_events.stream(subscription))
+        
+    except Exception as e:
+        logger.error(f'订阅任务事件失败: {str(e)}')
+        return jsonify({'success': False, 'message': f'订阅任务事件失败: {str(e)}'}), 500
+
 @task_bp.route('/<int:task_id>', methods=['DELETE'])
 def delete_task(task_id):
     """
@@ -180,12 +342,16 @@ def delete_task(task_id):
         if not is_admin and task.user_id != user_id:
             return jsonify({'success': False, 'message': '无权删除此任务'}), 403
         
-        # 删除结果文件
-        if task.result_path and os.path.exists(task.result_path):
-            os.remove(task.result_path)
+        # 删除数据库记录（扫参任务同时删除其全部试验）
+        tasks = task.children.all() + [task]
+        for t in tasks:
+            db.session.delete(t)
+        db.session.flush()
         
-        # 删除数据库记录
-        db.session.delete(task)
+        # 删除结果文件（结果目录可能与其他任务或结果缓存共享，仍被引用时保留）
+        for result_path in {t.result_path for t in tasks if t.result_path}:
+            if not result_cache.is_referenced(result_path):
+                delete_result(result_path)
         db.session.commit()
         
         # 记录系统日志
@@ -249,14 +415,23 @@ def rerun_task(task_id):
             user_id=user_id,
             dataset_id=task.dataset_id,
             model_id=task.model_id,
+            task_type=task.task_type,
             status='pending',
             hyperparams=task.hyperparams,
+            data_path=task.data_path or (task.dataset.file_path if task.dataset else None),
+            use_cache=(request.get_json(silent=True) or {}).get('useCache', True),
+            timeout=task.timeout,
+            priority=task.priority,
             created_at=datetime.utcnow()
         )
         
         db.session.add(new_task)
         db.session.commit()
         
+        # 输入与原任务相同，命中结果缓存时直接完成，否则提交到后台任务队列执行
+        if not complete_from_cache(new_task):
+            task_queue.submit(new_task.id, new_task.user_id, new_task.priority)
+        
         # 记录系统日志
         log = SystemLog(
             level='INFO',
@@ -267,19 +442,342 @@ def rerun_task(task_id):
         db.session.add(log)
         db.session.commit()
         
-        # 这里应该调用预测服务来执行任务
-        # 为简化示例，这里只返回新创建的任务ID
-        
         return jsonify({
             'success': True,
             'message': '任务已重新提交',
-            'task_id': new_task.id
+            'task_id': new_task.id,
+            'status': new_task.status,
+            'cache_hit': bool(new_task.cache_hit)
         }), 200
         
     except Exception as e:
         logger.error(f'重新运行任务失败: {str(e)}')
         return jsonify({'success': False, 'message': f'重新运行任务失败: {str(e)}'}), 500
 
+@task_bp.route('/<int:task_id>/cancel', methods=['POST'])
+def cancel_task(task_id):
+    """
+    取消任务
+    排队中的任务直接取消；执行中的任务由执行它的工作线程终止预测后标记为cancelled
+    需要JWT认证，且只有管理员或任务创建者可以取消
+    """
+    try:
+        # 获取用户ID和管理员状态
+        user_id = None
+        is_admin = False
+        auth_header = request.headers.get('Authorization')
+        if auth_header and auth_header.startswith('Bearer '):
+            try:
+                token = auth_header.split(' ')[1]
+                payload = jwt.decode(
+                    token,
+                    current_app.config['SECRET_KEY'],
+                    algorithms=['HS256']
+                )
+                user_id = payload['user_id']
+                is_admin = payload.get('is_admin', False)
+            except Exception as e:
+                logger.warning(f'获取用户ID失败: {str(e)}')
+                return jsonify({'success': False, 'message': '认证失败'}), 401
+        else:
+            return jsonify({'success': False, 'message': '需要认证'}), 401
+        
+        # 查找任务
+        task = Task.query.get(task_id)
+        if not task:
+            return jsonify({'success': False, 'message': '任务不存在'}), 404
+        
+        # 检查权限
+        if not is_admin and task.user_id != user_id:
+            return jsonify({'success': False, 'message': '无权取消此任务'}), 403
+        
+        if task.status not in ('pending', 'running'):
+            return jsonify({'success': False, 'message': f'任务已结束（{task.status}），不能取消'}), 400
+        
+        # 排队中的任务用带 status='pending' 条件的 UPDATE 直接取消，与工作线程的认领互斥，
+        # 出队时认领失败会被跳过；已被认领的任务只记录取消请求
+        cancelled = Task.query.filter(Task.id == task.id, Task.status == 'pending').update({
+            'status': 'cancelled',
+            'cancel_requested': True,
+            'error_message': '任务已取消',
+            'completed_at': datetime.utcnow()
+        }, synchronize_session=False)
+        if not cancelled:
+            Task.query.filter(Task.id == task.id).update({'cancel_requested': True}, synchronize_session=False)
+        db.session.commit()
+        if task.status == 'cancelled':
+            publish_status(task)
+        elif task.status == 'running':
+            # 执行该任务的工作进程（本进程或其他进程）在心跳时读取 cancel_requested 后终止
+            request_cancel(task.id)
+        else:
+            return jsonify({'success': False, 'message': f'任务已结束（{task.status}），不能取消'}), 400
+        
+        # 记录系统日志
+        log = SystemLog(
+            level='INFO',
+            message=f'取消任务: {task.name}',
+            source='task.cancel_task',
+            user_id=user_id
+        )
+        db.session.add(log)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': '任务已取消' if task.status == 'cancelled' else '正在取消任务',
+            'task_id': task.id,
+            'status': task.status
+        }), 200 if task.status == 'cancelled' else 202
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f'取消任务失败: {str(e)}')
+        return jsonify({'success': False, 'message': f'取消任务失败: {str(e)}'}), 500
+
+@task_bp.route('/<int:task_id>/update', methods=['POST'])
+def update_task_forecast(task_id):
+    """
+    数据集追加数据后增量更新任务的预测结果
+    创建新任务，只对源任务之后新增的数据点调用模型，与源任务的结果拼接（模型需支持增量更新）
+    需要JWT认证，且只有管理员或任务创建者可以更新
+    """
+    try:
+        # 获取用户ID和管理员状态
+        user_id = None
+        is_admin = False
+        auth_header = request.headers.get('Authorization')
+        if auth_header and auth_header.startswith('Bearer '):
+            try:
+                token = auth_header.split(' ')[1]
+                payload = jwt.decode(
+                    token,
+                    current_app.config['SECRET_KEY'],
+                    algorithms=['HS256']
+                )
+                user_id = payload['user_id']
+                is_admin = payload.get('is_admin', False)
+            except Exception as e:
+                logger.warning(f'获取用户ID失败: {str(e)}')
+                return jsonify({'success': False, 'message': '认证失败'}), 401
+        else:
+            return jsonify({'success': False, 'message': '需要认证'}), 401
+        
+        # 查找任务
+        task = Task.query.get(task_id)
+        if not task:
+            return jsonify({'success': False, 'message': '任务不存在'}), 404
+        
+        # 检查权限
+        if not is_admin and task.user_id != user_id:
+            return jsonify({'success': False, 'message': '无权更新此任务'}), 403
+        
+        # 只有已完成的单序列/多列预测任务可以增量更新
+        hyperparams = task.hyperparams or {}
+        if task.task_type not in ('prediction', 'update') or task.status != 'completed':
+            return jsonify({'success': False, 'message': '只能增量更新已完成的预测任务'}), 400
+        if not (hyperparams.get('valueColumn') or hyperparams.get('valueColumns')):
+            return jsonify({'success': False, 'message': '任务未指定预测的值列，不能增量更新'}), 400
+        if not task.dataset:
+            return jsonify({'success': False, 'message': '任务没有关联数据集'}), 400
+        if not task.model or not supports_update(task.model.model_type):
+            return jsonify({'success': False, 'message': '该模型不支持增量更新'}), 400
+        if not result_exists(task.result_path):
+            return jsonify({'success': False, 'message': '任务结果不存在'}), 404
+        
+        # 源结果覆盖的行数之后的数据为新增数据
+        start_row = read_meta(task.result_path)['length']
+        if task.dataset.rows <= start_row:
+            return jsonify({'success': False, 'message': '数据集没有新增数据'}), 400
+        
+        # 创建增量更新任务
+        new_task = Task(
+            name=f"{task.name} (增量更新)",
+            user_id=user_id,
+            dataset_id=task.dataset_id,
+            model_id=task.model_id,
+            task_type='update',
+            status='pending',
+            hyperparams={**hyperparams, 'update': {
+                'sourceTaskId': task.id,
+                'sourceResult': task.result_path,
+                'startRow': start_row
+            }},
+            data_path=task.dataset.file_path,
+            use_cache=(request.get_json(silent=True) or {}).get('useCache', True),
+            timeout=task.timeout,
+            priority=task.priority,
+            created_at=datetime.utcnow()
+        )
+        
+        db.session.add(new_task)
+        db.session.commit()
+        
+        if not complete_from_cache(new_task):
+            task_queue.submit(new_task.id, new_task.user_id, new_task.priority)
+        
+        # 记录系统日志
+        log = SystemLog(
+            level='INFO',
+            message=f'增量更新任务: {task.name}，新增 {task.dataset.rows - start_row} 个数据点',
+            source='task.update_task_forecast',
+            user_id=user_id
+        )
+        db.session.add(log)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': '增量更新任务已提交',
+            'task_id': new_task.id,
+            'status': new_task.status,
+            'start_row': start_row,
+            'new_rows': task.dataset.rows - start_row,
+            'cache_hit': bool(new_task.cache_hit)
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f'增量更新任务失败: {str(e)}')
+        return jsonify({'success': False, 'message': f'增量更新任务失败: {str(e)}'}), 500
+
+@task_bp.route('/rerun', methods=['POST'])
+def rerun_tasks():
+    """
+    按条件批量重新运行任务（用于故障恢复）
+    过滤条件: status（默认failed，可为列表）、model（模型类型）、start_date/end_date（创建时间范围）
+    匹配的任务被复制为新任务（同一批次），分批入队并根据队列积压限流；
+    status为pending时直接重新入队原任务（修复未执行的积压任务）
+    需要JWT认证，非管理员只能重新运行自己的任务
+    """
+    try:
+        # 获取用户ID和管理员状态
+        user_id = None
+        is_admin = False
+        auth_header = request.headers.get('Authorization')
+        if auth_header and auth_header.startswith('Bearer '):
+            try:
+                token = auth_header.split(' ')[1]
+                payload = jwt.decode(
+                    token,
+                    current_app.config['SECRET_KEY'],
+                    algorithms=['HS256']
+                )
+                user_id = payload['user_id']
+                is_admin = payload.get('is_admin', False)
+            except Exception as e:
+                logger.warning(f'获取用户ID失败: {str(e)}')
+                return jsonify({'success': False, 'message': '认证失败'}), 401
+        else:
+            return jsonify({'success': False, 'message': '需要认证'}), 401
+        
+        data = request.get_json(silent=True) or {}
+        statuses = data.get('status', 'failed')
+        statuses = statuses if isinstance(statuses, list) else [statuses]
+        if 'running' in statuses:
+            return jsonify({'success': False, 'message': '不能重新运行执行中的任务'}), 400
+        if 'pending' in statuses and len(statuses) > 1:
+            return jsonify({'success': False, 'message': 'pending状态不能与其他状态同时重新运行'}), 400
+        
+        # 构建查询（扫参试验随扫参任务重新运行，不单独匹配）
+        query = Task.query.filter(Task.status.in_(statuses), Task.parent_id.is_(None))
+        if not is_admin:
+            query = query.filter(Task.user_id == user_id)
+        if data.get('model'):
+            query = query.join(Model, Task.model_id == Model.id).filter(Model.model_type == data['model'])
+        try:
+            if data.get('start_date'):
+                query = query.filter(Task.created_at >= datetime.fromisoformat(data['start_date']))
+            if data.get('end_date'):
+                query = query.filter(Task.created_at <= datetime.fromisoformat(data['end_date']))
+        except ValueError:
+            return jsonify({'success': False, 'message': '日期格式无效'}), 400
+        
+        max_tasks = current_app.config.get('TASK_RERUN_MAX_TASKS', 10000)
+        tasks = query.order_by(Task.created_at, Task.id).limit(max_tasks + 1).all()
+        if len(tasks) > max_tasks:
+            return jsonify({'success': False, 'message': f'匹配的任务超过{max_tasks}个，请缩小过滤范围'}), 400
+        if not tasks:
+            return jsonify({'success': True, 'message': '没有匹配的任务', 'total': 0}), 200
+        
+        batch_size = current_app.config.get('TASK_RERUN_BATCH_SIZE', 100)
+        batch_id = None
+        if statuses == ['pending']:
+            # 积压的任务直接重新入队，保留原优先级
+            queued = [(task.id, task.user_id, task.priority) for task in tasks]
+        else:
+            # 批量复制为新任务，每批一次插入
+            batch_id = uuid.uuid4().hex
+            created_at = datetime.utcnow()
+            for i in range(0, len(tasks), batch_size):
+                rows = [{
+                    'name': f"{task.name} (重新运行)",
+                    'user_id': user_id,
+                    'dataset_id': task.dataset_id,
+                    'model_id': task.model_id,
+                    'task_type': task.task_type,
+                    'status': 'pending',
+                    'batch_id': batch_id,
+                    'hyperparams': task.hyperparams,
+                    'data_path': task.data_path or (task.dataset.file_path if task.dataset else None),
+                    'use_cache': data.get('useCache', True),
+                    'timeout': task.timeout,
+                    'priority': PRIORITY_BATCH,
+                    'created_at': created_at
+                } for task in tasks[i:i + batch_size]]
+                db.session.execute(db.insert(Task), rows)
+            db.session.commit()
+            queued = [tuple(t) for t in Task.query.with_entities(Task.id, Task.user_id, Task.priority)
+                      .filter_by(batch_id=batch_id).order_by(Task.id)]
+        
+        # 记录系统日志
+        log = SystemLog(
+            level='INFO',
+            message=f'批量重新运行任务: {len(queued)}个 (状态: {",".join(statuses)})',
+            source='task.rerun_tasks',
+            user_id=user_id
+        )
+        db.session.add(log)
+        db.session.commit()
+        
+        # 分批入队，队列积压超过一批时暂停入队
+        task_queue.submit_throttled(queued, batch_size)
+        
+        return jsonify({
+            'success': True,
+            'message': '任务已批量重新提交',
+            'batch_id': batch_id,
+            'total': len(queued),
+            'batch_size': batch_size
+        }), 202
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f'批量重新运行任务失败: {str(e)}')
+        return jsonify({'success': False, 'message': f'批量重新运行任务失败: {str(e)}'}), 500
+
+@task_bp.route('/cache', methods=['GET'])
+def get_result_cache_stats():
+    """
+    获取预测结果缓存统计信息
+    """
+    try:
+        return jsonify({'success': True, 'cache': result_cache.stats()}), 200
+    except Exception as e:
+        logger.error(f'获取结果缓存统计失败: {str(e)}')
+        return jsonify({'success': False, 'message': f'获取结果缓存统计失败: {str(e)}'}), 500
+
+@task_bp.route('/queue', methods=['GET'])
+def get_task_queue_stats():
+    """
+    获取任务队列统计信息（各优先级排队数、各用户执行中的任务数、等待时间）
+    """
+    try:
+        return jsonify({'success': True, 'queue': task_queue.stats()}), 200
+    except Exception as e:
+        logger.error(f'获取任务队列统计失败: {str(e)}')
+        return jsonify({'success': False, 'message': f'获取任务队列统计失败: {str(e)}'}), 500
+
 @task_bp.route('/statistics', methods=['GET'])
 def get_task_statistics():
     """
@@ -315,7 +813,7 @@ def get_task_statistics():
         
         # 统计各状态任务数
         status_counts = {}
-        for status in ['pending', 'running', 'completed', 'failed']:
+        for status in ['pending', 'running', 'completed', 'failed', 'cancelled']:
             status_counts[status] = query.filter_by(status=status).count()
         
         # 统计各模型使用次数
@@ -344,4 +842,49 @@ def get_task_statistics():
         
     except Exception as e:
         logger.error(f'获取任务统计信息失败: {str(e)}')
-        return jsonify({'success': False, 'message': f'获取任务统计信息失败: {str(e)}'}), 500
\ No newline at end of file
+        return jsonify({'success': False, 'message': f'获取任务统计信息失败: {str(e)}'}), 500
+
+# 辅助函数
+def get_event_token_payload():
+    """
+    解析事件流请求的认证令牌（Authorization请求头或查询参数token），无效时返回None
+    """
+    token = request.args.get('token')
+    auth_header = request.headers.get('Authorization')
+    if auth_header and auth_header.startswith('Bearer '):
+        token = auth_header.split(' ')[1]
+    if not token:
+        return None
+    try:
+        return jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
+    except Exception as e:
+        logger.warning(f'获取用户ID失败: {str(e)}')
+        return None
+
+
+def task_snapshot(task):
+    """
+    任务当前状态的事件（事件流的初始事件）
+    """
+    return {
+        'type': 'status',
+        'task_id': task.id,
+        'user_id': task.user_id,
+        'parent_id': task.parent_id,
+        'batch_id': task.batch_id,
+        'task_type': task.task_type,
+        'status': task.status,
+        'progress': 100.0 if task.status == 'completed' else None,
+        'metrics': task.metrics,
+        'error_message': task.error_message
+    }
+
+
+def event_stream_response(stream):
+    """
+    构造SSE响应（禁用缓存和反向代理缓冲）
+    """
+    return Response(stream, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
@@ -26,13 +26,16 @@ class Dataset(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
-    file_path = db.Column(db.String(255))
+    file_path = db.Column(db.String(255))  # 列式存储目录（或预设数据集的CSV文件）
+    source_path = db.Column(db.String(255))  # 原始上传文件，用于下载
+    content_hash = db.Column(db.String(64), index=True)  # 原始文件内容的SHA-256
     category = db.Column(db.String(50))  # 电力、交通、气候等
     rows = db.Column(db.Integer)
     columns = db.Column(db.Integer)
     time_column = db.Column(db.String(50))
     value_column = db.Column(db.String(50))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    profile = db.Column(db.JSON)  # 导入时计算的统计画像（列统计、时间范围、采样频率、缺口）
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)  # 列表按 (created_at, id) 游标分页
     is_preset = db.Column(db.Boolean, default=False)
     
     # 关联关系
@@ -50,7 +53,7 @@ class Model(db.Model):
     description = db.Column(db.Text)
     model_type = db.Column(db.String(50))  # CrossGNN, HDMixer, LeRet等
     default_params = db.Column(db.JSON)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)  # 列表按 (created_at, id) 游标分页
     
     # 关联关系
     tasks = db.relationship('Task', backref='model', lazy='dynamic')
@@ -61,23 +64,61 @@ class Model(db.Model):
 class Task(db.Model):
     """预测任务"""
     __tablename__ = 'tasks'
+    __table_args__ = (
+        db.Index('ix_tasks_user_id_created_at', 'user_id', 'created_at'),  # 按用户过滤的任务列表分页
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     dataset_id = db.Column(db.Integer, db.ForeignKey('datasets.id'))
     model_id = db.Column(db.Integer, db.ForeignKey('models.id'))
-    status = db.Column(db.String(20), default='pending')  # pending, running, completed, failed
+    status = db.Column(db.String(20), default='pending', index=True)  # pending, running, completed, failed, cancelled
+    batch_id = db.Column(db.String(32), index=True)  # 批量提交的批次ID
+    task_type = db.Column(db.String(20), default='prediction')  # prediction, sweep, backtest, update
+    parent_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), index=True)  # 扫参试验所属的扫参任务
     hyperparams = db.Column(db.JSON)
+    data_path = db.Column(db.String(255))  # 任务输入数据文件路径
     result_path = db.Column(db.String(255))
     metrics = db.Column(db.JSON)  # 存储MSE, MAE, RMSE等指标
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)  # 列表按 (created_at, id) 游标分页
     completed_at = db.Column(db.DateTime)
     duration = db.Column(db.Float)  # 执行时长（秒）
+    error_message = db.Column(db.Text)  # 失败原因
+    use_cache = db.Column(db.Boolean, default=True)  # 是否允许复用缓存的预测结果
+    cache_key = db.Column(db.String(64), index=True)  # 预测结果缓存键
+    cache_hit = db.Column(db.Boolean, default=False)  # 结果是否来自缓存
+    timeout = db.Column(db.Float)  # 执行超时（秒），为空时只受模型类型的超时限制
+    attempts = db.Column(db.Integer, default=0)  # 已开始执行的次数
+    cancel_requested = db.Column(db.Boolean, default=False)  # 执行中的任务是否已请求取消
+    priority = db.Column(db.String(20), default='interactive')  # 调度优先级: interactive, batch
+    worker_id = db.Column(db.String(64))  # 认领任务的工作进程（数据库任务队列）
+    heartbeat_at = db.Column(db.DateTime)  # 工作进程最近一次心跳时间
+    lease_expires_at = db.Column(db.DateTime, index=True)  # 租约到期时间，过期未续约的任务由其他工作进程回收
+    
+    # 关联关系
+    children = db.relationship('Task', backref=db.backref('parent', remote_side=[id]), lazy='dynamic')
     
     def __repr__(self):
         return f'<Task {self.name}>'
 
+class ResultCacheEntry(db.Model):
+    """预测结果缓存"""
+    __tablename__ = 'result_cache'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    cache_key = db.Column(db.String(64), unique=True, nullable=False)  # 数据内容、模型类型、模型版本和超参数的哈希
+    model_type = db.Column(db.String(50))
+    result_path = db.Column(db.String(255), nullable=False)
+    metrics = db.Column(db.JSON)
+    source_task_id = db.Column(db.Integer)  # 生成该结果的任务
+    hit_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f'<ResultCacheEntry {self.cache_key}>'
+
 # Template模型已移除，改为直接使用Task模型作为模板
 
 class SystemLog(db.Model):
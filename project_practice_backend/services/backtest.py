@@ -0,0 +1,106 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from services.metrics import compute_metrics, per_horizon_errors, to_json_metrics
+
+# 每个折计算的误差指标
+METRIC_NAMES = ('mse', 'mae', 'rmse', 'mape', 'smape', 'mase')
+
+
+def parse_config(config, default_horizon=24):
+    """
+    解析并校验回测配置，返回 {window, step, horizon, season}
+    window: 训练窗口长度；horizon: 每折预测步长；step: 相邻两折起点的间隔（默认等于horizon）
+    """
+    config = config or {}
+    horizon = config.get('horizon', default_horizon)
+    window = config.get('window')
+    step = config.get('step', horizon)
+    season = config.get('season', 1)
+    for name, value in (('window', window), ('horizon', horizon), ('step', step), ('season', season)):
+        if not isinstance(value, int) or value <= 0:
+            raise ValueError(f'回测参数 {name} 必须是正整数')
+    return {'window': window, 'step': step, 'horizon': horizon, 'season': season}
+
+
+def count_folds(length, window, horizon, step):
+    """
+    数据长度为 length 时可构成的折数
+    """
+    last = length - window - horizon
+    return 0 if last < 0 else last // step + 1
+
+
+def run_backtest(forecaster, df, hyperparams):
+    """
+    滚动起点回测（walk-forward）
+    通过 sliding_window_view 以视图方式构造所有折的 [训练窗口 | 预测区间]，不为每折复制数据；
+    支持批量预测的模型一次预测所有折，否则逐折调用
+    hyperparams['backtest'] 中的 foldRange=[start, end) 用于在多个进程间按折分片
+    """
+    config = parse_config(hyperparams.get('backtest'), hyperparams.get('predictionLength', 24))
+    window, step, horizon = config['window'], config['step'], config['horizon']
+
+    column = hyperparams.get('valueColumn') or _first_numeric_column(df)
+    series = df[column].to_numpy(dtype=np.float64)
+    folds = count_folds(len(series), window, horizon, step)
+    if folds == 0:
+        raise ValueError(f'数据长度 {len(series)} 不足以构成一个回测折')
+
+    # (折数, window + horizon) 的只读视图，按步长取切片仍是视图
+    start, end = (hyperparams['backtest'].get('foldRange') or [0, folds])
+    windows = sliding_window_view(series, window + horizon)[start * step:(end - 1) * step + 1:step]
+    history = windows[:, :window]
+    actual = windows[:, window:]
+
+    if getattr(forecaster, 'vectorized', False):
+        predicted = forecaster.forecast_windows(history, horizon, hyperparams)
+    else:
+        predicted = np.stack([forecaster.forecast(h, horizon, hyperparams) for h in history])
+
+    # 每折一列：对 (horizon, 折数) 的转置计算，按列指标即每折指标
+    fold_metrics = compute_metrics(actual.T, predicted.T, insample=history.T, season=config['season'])['per_column']
+
+    # 每折的预测起点时间
+    timestamps = df.iloc[:, 0].to_numpy()[np.arange(start, end) * step + window]
+
+    return summarize({
+        'timestamps': timestamps,
+        'actual': np.ascontiguousarray(actual),
+        'predicted': predicted,
+        **{f'fold_{name}': fold_metrics[name] for name in METRIC_NAMES}
+    }, {**config, 'column': column})
+
+
+def merge_backtest_results(results):
+    """
+    合并按折分片执行的回测结果
+    """
+    data = {name: np.concatenate([np.asarray(r['data'][name]) for r in results])
+            for name in results[0]['data']}
+    return summarize(data, results[0]['info'])
+
+
+def summarize(data, info):
+    """
+    由逐折结果计算汇总指标：各指标取所有折的平均，并给出按预测步的误差分解
+    """
+    errors = np.asarray(data['actual'], dtype=np.float64) - np.asarray(data['predicted'], dtype=np.float64)
+    metrics = {name: np.nanmean(data[f'fold_{name}']) for name in METRIC_NAMES}
+    metrics['per_horizon'] = per_horizon_errors(errors.T, info['horizon'])
+    metrics['per_fold'] = {name: data[f'fold_{name}'] for name in METRIC_NAMES}
+    metrics.update({
+        'folds': len(errors),
+        'window': info['window'],
+        'step': info['step'],
+        'horizon': info['horizon'],
+        'column': info['column']
+    })
+    return {'data': data, 'info': info, 'metrics': to_json_metrics(metrics)}
+
+
+def _first_numeric_column(df):
+    for name in df.columns:
+        if np.issubdtype(df[name].dtype, np.number):
+            return name
+    raise ValueError('数据集中没有数值列')
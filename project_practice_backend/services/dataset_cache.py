@@ -0,0 +1,122 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+
+from services.dataset_store import META_FILE, load_frame
+
+# 创建日志记录器
+logger = logging.getLogger(__name__)
+
+# 默认缓存内存上限（字节）
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class DatasetCache:
+    """
+    已解析数据集的进程内LRU缓存
+    键为 (文件路径, 文件大小, 修改时间)，文件被替换或修改后自动失效
+    缓存的DataFrame由所有调用方共享，调用方不得原地修改
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def init_app(self, app):
+        """
+        从应用配置读取缓存上限
+        """
+        self.max_bytes = app.config.get('DATASET_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)
+        app.extensions['dataset_cache'] = self
+
+    def get(self, path, loader=load_frame):
+        """
+        获取解析后的数据集，未命中时调用loader加载并放入缓存
+        列式数据集目录以其元数据文件的大小和修改时间作为版本
+        """
+        stat_path = os.path.join(path, META_FILE) if os.path.isdir(path) else path
+        stat = os.stat(stat_path)
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # 在锁外解析文件，避免阻塞其他读取
+        df = loader(path)
+        nbytes = int(df.memory_usage(deep=True).sum())
+
+        with self._lock:
+            # 同一文件的旧版本不再可能命中，直接移除
+            for old_key in [k for k in self._entries if k[0] == key[0] and k != key]:
+                self._remove(old_key)
+            if nbytes > self.max_bytes:
+                logger.info(f'数据集过大，不放入缓存: {path} ({nbytes} bytes)')
+                return df
+            if key not in self._entries:
+                self._entries[key] = (df, nbytes)
+                self.current_bytes += nbytes
+            self._evict()
+        return df
+
+    def stats(self):
+        """
+        缓存统计信息
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'current_bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / total, 4) if total else None
+            }
+
+    def clear(self):
+        """
+        清空缓存
+        """
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _evict(self):
+        while self.current_bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+    def _remove(self, key):
+        _, nbytes = self._entries.pop(key)
+        self.current_bytes -= nbytes
+
+
+# 全局数据集缓存实例（每个进程一份）
+dataset_cache = DatasetCache()
+
+
+def read_dataset(path):
+    """
+    读取数据集（经过缓存）
+    """
+    return dataset_cache.get(path)
+
+
+def init_dataset_cache(app):
+    """
+    初始化数据集缓存
+    """
+    dataset_cache.init_app(app)
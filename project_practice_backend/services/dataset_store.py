@@ -0,0 +1,941 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+import threading
+import uuid
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+# 创建日志记录器
+logger = logging.getLogger(__name__)
+
+# 列式数据集元数据文件名
+META_FILE = 'meta.json'
+
+# 列式存储格式版本
+FORMAT_VERSION = 1
+
+# 时间索引文件名
+TIME_INDEX_FILE = 'time_index.bin'
+
+# 数值列统一存储类型
+NUMERIC_DTYPE = '<f8'
+
+# 类别（字符串）列编码类型
+CATEGORY_DTYPE = '<i4'
+
+# 时间索引存储类型（纳秒时间戳）
+TIME_DTYPE = '<i8'
+
+# 预览数据文件名（上传时生成，详情接口不再读取数据文件）
+PREVIEW_FILE = 'preview.json'
+
+# 预览文件保存的行数
+PREVIEW_ROWS = 50
+
+# 流式导入时每批读取的行数
+CHUNK_ROWS = 100000
+
+# 计算内容哈希时每次读取的字节数
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# 按内容寻址存储上传文件的目录（<内容哈希>.csv 及其列式目录 <内容哈希>/）
+BLOB_DIR = os.path.join('datasets', 'blobs')
+
+# 追加过数据的数据集的独立存储目录（按内容寻址的文件不可修改，追加前先复制到这里）
+APPEND_DIR = os.path.join('datasets', 'appended')
+
+# 采样间隔统计最多保留的不同间隔数
+MAX_INTERVAL_KEYS = 1000
+
+# 间隔超过采样频率的该倍数时视为缺口
+GAP_FACTOR = 1.5
+
+# 时间列候选格式，按顺序尝试，均不匹配时由pandas自动推断
+TIME_FORMATS = [
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d',
+    '%Y/%m/%d %H:%M:%S',
+    '%Y/%m/%d %H:%M',
+    '%Y/%m/%d',
+    '%m/%d/%Y %H:%M',
+    '%m/%d/%Y',
+]
+
+
+def is_columnar(path):
+    """
+    判断路径是否为列式数据集目录
+    """
+    return bool(path) and os.path.isdir(path) and os.path.exists(os.path.join(path, META_FILE))
+
+
+def columnar_dir_for(csv_path):
+    """
+    原始CSV文件对应的列式数据集目录
+    """
+    return os.path.splitext(csv_path)[0]
+
+
+def ingest_csv(csv_path, out_dir=None, chunk_rows=CHUNK_ROWS, content_hash=None):
+    """
+    将CSV文件流式转换为列式二进制格式，返回 (目录路径, 元数据)
+    目录结构: meta.json + 每列一个 .bin 文件 + 解析后的时间索引 time_index.bin
+    数值列存为 float64，字符串列按字典编码为 int32，第一列能解析为时间时生成时间索引
+    按 chunk_rows 行分批读取，内存占用与文件大小无关；行列数、列类型、时间格式和
+    汇总统计在读取过程中累积得到
+    原始文件的内容哈希记录在元数据中（调用方已计算时可直接传入）
+    """
+    out_dir = out_dir or columnar_dir_for(csv_path)
+
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir)
+    try:
+        writer = ColumnarWriter(out_dir, csv_path, content_hash or file_hash(csv_path))
+        head = None
+        for chunk in pd.read_csv(csv_path, chunksize=chunk_rows):
+            if head is None:
+                head = chunk.head(PREVIEW_ROWS)
+            writer.append(chunk)
+        meta = writer.close()
+        write_preview(out_dir, head if head is not None else pd.DataFrame(), meta)
+    except Exception:
+        shutil.rmtree(out_dir, ignore_errors=True)
+        raise
+    return out_dir, meta
+
+
+def append_csv(out_dir, csv_path, chunk_rows=CHUNK_ROWS):
+    """
+    将CSV文件中的新行追加到已有的列式目录，返回更新后的元数据
+    只写入新增的数据：列统计、类别字典、时间索引的有序性和采样间隔分布在导入时的状态上继续累积，
+    原始CSV同时追加新行（不含表头）；新的内容哈希由原哈希和追加内容的哈希链式计算
+    追加的列必须与数据集一致；失败时各文件截断回追加前的长度，元数据保持不变
+    """
+    with _append_lock(out_dir):
+        meta = read_meta(out_dir)
+        names = [c['name'] for c in meta['columns']]
+        source_path = meta.get('source')
+        files = [os.path.join(out_dir, c['file']) for c in meta['columns'] if c.get('file')]
+        if meta.get('time_index'):
+            files.append(os.path.join(out_dir, meta['time_index']['file']))
+        if source_path and os.path.isfile(source_path):
+            files.append(source_path)
+        sizes = {path: os.path.getsize(path) for path in files if os.path.exists(path)}
+
+        writer = ColumnarWriter.resume(out_dir, meta)
+        head = None
+        try:
+            for chunk in pd.read_csv(csv_path, chunksize=chunk_rows):
+                if [str(name) for name in chunk.columns] != names:
+                    raise ValueError(f'追加数据的列与数据集不一致，应为: {names}')
+                if head is None:
+                    head = chunk.head(PREVIEW_ROWS)
+                writer.append(chunk)
+            if writer.rows == meta['rows']:
+                raise ValueError('追加的数据为空')
+            if source_path in sizes:
+                _append_csv_rows(source_path, csv_path)
+            writer.content_hash = hashlib.sha256(
+                f'{meta.get("content_hash") or content_hash(out_dir)}:{file_hash(csv_path)}'.encode('utf-8')
+            ).hexdigest()
+            new_meta = writer.close()
+        except Exception:
+            writer.abort()
+            for path, size in sizes.items():
+                with open(path, 'r+b') as f:
+                    f.truncate(size)
+            raise
+
+        _update_preview(out_dir, head, new_meta)
+    return new_meta
+
+
+def copy_columnar(out_dir, source_path=None, dest_dir=APPEND_DIR):
+    """
+    将列式目录和原始CSV复制到新的独立目录，返回 (目录路径, 原始文件路径)
+    用于追加数据前脱离按内容寻址、可能被多个数据集共享的文件
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    name = uuid.uuid4().hex
+    new_source = None
+    if source_path and os.path.isfile(source_path):
+        new_source = os.path.join(dest_dir, f'{name}.csv')
+        shutil.copyfile(source_path, new_source)
+    new_dir = columnar_dir_for(new_source) if new_source else os.path.join(dest_dir, name)
+    try:
+        shutil.copytree(out_dir, new_dir)
+        meta = read_meta(new_dir)
+        meta['source'] = new_source
+        _write_meta(new_dir, meta)
+    except Exception:
+        shutil.rmtree(new_dir, ignore_errors=True)
+        if new_source:
+            os.remove(new_source)
+        raise
+    return new_dir, new_source
+
+
+def read_meta(path):
+    """
+    读取列式数据集元数据
+    """
+    with open(os.path.join(path, META_FILE), 'r') as f:
+        return json.load(f)
+
+
+def open_column(path, column, rows):
+    """
+    以内存映射方式打开单列数据
+    """
+    file_path = os.path.join(path, column['file'])
+    if rows == 0:
+        return np.empty(0, dtype=column['dtype'])
+    return np.memmap(file_path, dtype=column['dtype'], mode='r', shape=(rows,))
+
+
+def open_time_index(path, meta=None):
+    """
+    以内存映射方式打开时间索引（纳秒时间戳），没有时间索引时返回None
+    """
+    meta = meta or read_meta(path)
+    if not meta.get('time_index'):
+        return None
+    return open_column(path, meta['time_index'], meta['rows'])
+
+
+def load_frame(path, columns=None, nrows=None):
+    """
+    读取数据集为DataFrame，支持列式目录和CSV文件
+    nrows 指定时只读取前 nrows 行
+    """
+    if not is_columnar(path):
+        return pd.read_csv(path, usecols=columns, nrows=nrows)
+
+    meta = read_meta(path)
+    rows = meta['rows'] if nrows is None else min(nrows, meta['rows'])
+    data = {}
+    for column in meta['columns']:
+        if columns is not None and column['name'] not in columns:
+            continue
+        data[column['name']] = _decode_column(path, column, meta, slice(0, rows))
+    return pd.DataFrame(data)
+
+
+def select_time_range(path, start=None, end=None, meta=None):
+    """
+    查找时间范围 [start, end] 内的行，返回切片（时间有序）或行号数组（时间无序）
+    时间有序时在内存映射的时间索引上二分查找，只访问 O(log n) 个元素；
+    没有时间索引时 start/end 按行号处理
+    """
+    meta = meta or read_meta(path)
+    rows = meta['rows']
+    time_index = open_time_index(path, meta)
+
+    if time_index is None:
+        start_row = 0 if start in (None, '') else max(int(start), 0)
+        end_row = rows if end in (None, '') else min(int(end), rows)
+        return slice(start_row, max(start_row, end_row))
+
+    start_ns = None if start in (None, '') else pd.Timestamp(start).value
+    end_ns = None if end in (None, '') else pd.Timestamp(end).value
+
+    if meta['time_index'].get('sorted', False) and not meta['time_index'].get('nulls'):
+        start_row = 0 if start_ns is None else int(np.searchsorted(time_index, start_ns, side='left'))
+        end_row = rows if end_ns is None else int(np.searchsorted(time_index, end_ns, side='right'))
+        return slice(start_row, max(start_row, end_row))
+
+    # 时间无序或存在缺失时退化为全量扫描
+    mask = time_index != np.iinfo(np.int64).min
+    if start_ns is not None:
+        mask &= time_index >= start_ns
+    if end_ns is not None:
+        mask &= time_index <= end_ns
+    return np.flatnonzero(mask)
+
+
+def read_rows(path, rows, columns=None, meta=None):
+    """
+    读取指定行（切片或行号数组）的若干列，返回 {列名: 数组}
+    """
+    meta = meta or read_meta(path)
+    data = {}
+    for column in meta['columns']:
+        if columns is not None and column['name'] not in columns and column['kind'] != 'time':
+            continue
+        data[column['name']] = _decode_column(path, column, meta, rows)
+    return data
+
+
+def ensure_columnar(csv_path, chunk_rows=CHUNK_ROWS, content_hash=None):
+    """
+    确保CSV文件存在对应的列式目录，已存在时直接复用，返回 (目录路径, 元数据)
+    用于导入功能上线前已存在的预设数据集和按内容寻址存储的上传文件
+    先写入临时目录再重命名，并发请求不会读到不完整的数据
+    """
+    out_dir = columnar_dir_for(csv_path)
+    if is_columnar(out_dir):
+        return out_dir, read_meta(out_dir)
+
+    logger.info(f'为数据集生成列式存储: {csv_path}')
+    tmp_dir = f'{out_dir}.{os.getpid()}.{threading.get_ident()}.tmp'
+    _, meta = ingest_csv(csv_path, tmp_dir, chunk_rows=chunk_rows, content_hash=content_hash)
+    try:
+        os.rename(tmp_dir, out_dir)
+    except OSError:
+        # 其他请求已生成
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        meta = read_meta(out_dir)
+    return out_dir, meta
+
+
+def ensure_dataset_columnar(dataset):
+    """
+    导入功能上线前的数据集（CSV）在首次使用时生成列式存储，并更新数据集的文件路径，返回数据文件路径
+    由调用方提交事务
+    """
+    if dataset.file_path and not is_columnar(dataset.file_path) and os.path.exists(dataset.file_path):
+        csv_path = dataset.file_path
+        dataset.file_path, meta = ensure_columnar(csv_path)
+        dataset.source_path = dataset.source_path or csv_path
+        dataset.profile = dataset.profile or build_profile(meta)
+    return dataset.file_path
+
+
+def save_blob(stream, blob_dir=BLOB_DIR):
+    """
+    将上传文件流写入按内容寻址的存储，写入过程中同时计算SHA-256
+    返回 (文件路径, 内容哈希, 是否已存在)，内容相同的文件只保存一份
+    """
+    os.makedirs(blob_dir, exist_ok=True)
+    tmp_path = os.path.join(blob_dir, f'.upload.{uuid.uuid4().hex}.tmp')
+    digest = hashlib.sha256()
+    try:
+        with open(tmp_path, 'wb') as f:
+            for block in iter(lambda: stream.read(HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+                f.write(block)
+        content_hash = digest.hexdigest()
+        blob_path = os.path.join(blob_dir, f'{content_hash}.csv')
+        if os.path.exists(blob_path):
+            os.remove(tmp_path)
+            return blob_path, content_hash, True
+        os.replace(tmp_path, blob_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return blob_path, content_hash, False
+
+
+def file_hash(path):
+    """
+    流式计算文件内容的SHA-256
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_hash(path):
+    """
+    数据集内容哈希（内容相同的数据集哈希相同，与文件名和存储位置无关）
+    列式目录优先使用导入时记录的原始文件哈希，按 (路径, 大小, 修改时间) 缓存计算结果
+    """
+    stat_path = os.path.join(path, META_FILE) if os.path.isdir(path) else path
+    stat = os.stat(stat_path)
+    return _cached_content_hash(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+@lru_cache(maxsize=256)
+def _cached_content_hash(path, size, mtime_ns):
+    if not os.path.isdir(path):
+        return file_hash(path)
+
+    meta = read_meta(path)
+    if meta.get('content_hash'):
+        return meta['content_hash']
+    # 早期导入的目录没有记录哈希：对元数据中的列定义和各列数据文件计算哈希
+    digest = hashlib.sha256()
+    digest.update(json.dumps(meta['columns'], sort_keys=True).encode('utf-8'))
+    files = [c['file'] for c in meta['columns'] if c.get('file')]
+    if meta.get('time_index'):
+        files.append(meta['time_index']['file'])
+    for name in files:
+        with open(os.path.join(path, name), 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def numeric_columns(path):
+    """
+    数据集中可作为预测目标的数值列名（列式目录只读取元数据，CSV只读取前几行推断类型）
+    """
+    if is_columnar(path):
+        return [c['name'] for c in read_meta(path)['columns'] if c['kind'] == 'numeric']
+    head = pd.read_csv(path, nrows=PREVIEW_ROWS)
+    return [str(name) for name in head.columns if pd.api.types.is_numeric_dtype(head[name])]
+
+
+def resolve_value_columns(path, value_columns):
+    """
+    将多列预测的目标列解析为具体列名：'all' 表示全部数值列，否则校验给定的列名列表
+    """
+    available = numeric_columns(path)
+    if value_columns == 'all':
+        if not available:
+            raise ValueError('数据集中没有数值列')
+        return available
+    if not isinstance(value_columns, list) or not value_columns:
+        raise ValueError("valueColumns 必须是列名列表或 'all'")
+    missing = [c for c in value_columns if c not in available]
+    if missing:
+        raise ValueError(f'数值列不存在: {missing}')
+    return list(dict.fromkeys(value_columns))
+
+
+def columns_to_json(data):
+    """
+    将 read_rows 返回的列数据转换为可JSON序列化的列表（时间转为字符串，NaN转为None）
+    """
+    result = {}
+    for name, values in data.items():
+        if isinstance(values, pd.DatetimeIndex) or np.asarray(values).dtype.kind == 'M':
+            strings = np.datetime_as_string(np.asarray(values, dtype='datetime64[s]'), unit='s')
+            result[name] = [None if v == 'NaT' else v.replace('T', ' ') for v in strings.tolist()]
+        elif np.asarray(values).dtype.kind == 'f':
+            array = np.asarray(values)
+            result[name] = np.where(np.isnan(array), None, array).tolist()
+        else:
+            result[name] = list(values)
+    return result
+
+
+def write_preview(out_dir, head, meta):
+    """
+    写入预览文件：前若干行数据、列结构和总行数
+    """
+    preview = {
+        'rows': meta['rows'],
+        'schema': [{'name': c['name'], 'kind': c['kind']} for c in meta['columns']],
+        'preview': frame_to_records(head)
+    }
+    with open(os.path.join(out_dir, PREVIEW_FILE), 'w') as f:
+        json.dump(preview, f, ensure_ascii=False)
+
+
+def read_preview(path, preview_rows=10):
+    """
+    读取数据集预览，返回 (预览记录, 列结构)
+    优先使用上传时生成的预览文件；预览文件缺失或行数不足时只读取前 preview_rows 行
+    """
+    preview_file = os.path.join(path, PREVIEW_FILE) if os.path.isdir(path) else None
+    if preview_file and os.path.exists(preview_file):
+        with open(preview_file, 'r') as f:
+            preview = json.load(f)
+        # 预览文件只保存前 PREVIEW_ROWS 行，请求的行数（不超过总行数）都在其中时才使用
+        if len(preview['preview']) >= min(preview_rows, preview['rows']):
+            return preview['preview'][:preview_rows], preview['schema']
+
+    head = load_frame(path, nrows=preview_rows)
+    schema = [{'name': str(name), 'kind': _column_kind(head[name])} for name in head.columns]
+    return frame_to_records(head), schema
+
+
+def frame_to_records(df):
+    """
+    将DataFrame转换为可JSON序列化的记录列表（时间转为ISO字符串，缺失值转为None）
+    """
+    df = df.copy()
+    for name in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[name]):
+            df[name] = df[name].dt.strftime('%Y-%m-%d %H:%M:%S')
+    df = df.astype(object).where(pd.notna(df), None)
+    return df.to_dict('records')
+
+
+def build_profile(meta):
+    """
+    根据导入时累积的统计信息生成数据集画像（不读取数据文件）
+    包括每列的缺失数/最小值/最大值/均值/标准差、时间范围、采样频率和缺口
+    """
+    columns = {}
+    for column in meta['columns']:
+        if column['kind'] == 'numeric':
+            columns[column['name']] = dict(RunningStats(column.get('stats')).summary(), kind='numeric')
+        elif column['kind'] == 'category':
+            columns[column['name']] = {
+                'kind': 'category',
+                'nulls': column.get('nulls', 0),
+                'distinct': len(column.get('categories', []))
+            }
+
+    profile = {'rows': meta['rows'], 'columns': columns, 'time': None}
+
+    time_index = meta.get('time_index')
+    if time_index:
+        columns[meta['time_column']] = {'kind': 'time', 'nulls': time_index.get('nulls', 0)}
+        profile['time'] = dict(
+            column=meta['time_column'],
+            start=_format_ns(time_index.get('min')),
+            end=_format_ns(time_index.get('max')),
+            nulls=time_index.get('nulls', 0),
+            sorted=time_index.get('sorted', False),
+            **_interval_profile(time_index.get('intervals') or {})
+        )
+    return profile
+
+
+def _interval_profile(intervals):
+    """
+    由间隔分布推断采样频率（出现最多的间隔）和缺口
+    """
+    if not intervals:
+        return {'frequency': None, 'frequency_seconds': None, 'gaps': None}
+    counts = {int(k): v for k, v in intervals.items()}
+    frequency = max(counts, key=counts.get)
+    gap_intervals = {k: v for k, v in counts.items() if k > frequency * GAP_FACTOR}
+    missing_points = sum((round(k / frequency) - 1) * v for k, v in gap_intervals.items())
+    try:
+        frequency_str = pd.tseries.frequencies.to_offset(pd.Timedelta(frequency, unit='ns')).freqstr
+    except ValueError:
+        frequency_str = str(pd.Timedelta(frequency, unit='ns'))
+    return {
+        'frequency': frequency_str,
+        'frequency_seconds': frequency / 1e9,
+        'gaps': {
+            'count': sum(gap_intervals.values()),
+            'missing_points': int(missing_points),
+            'largest_seconds': max(gap_intervals) / 1e9 if gap_intervals else None
+        }
+    }
+
+
+def _format_ns(value):
+    if value is None:
+        return None
+    return pd.Timestamp(value, unit='ns').isoformat()
+
+
+def delete_dataset_files(file_path, source_path=None):
+    """
+    删除数据集的列式目录和原始文件
+    """
+    for path in (file_path, source_path):
+        if not path or not os.path.exists(path):
+            continue
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+
+
+def _write_meta(out_dir, meta):
+    """
+    写入元数据：先写临时文件再替换，读取方不会读到不完整的元数据
+    """
+    tmp_file = os.path.join(out_dir, f'{META_FILE}.{os.getpid()}.{threading.get_ident()}.tmp')
+    with open(tmp_file, 'w') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp_file, os.path.join(out_dir, META_FILE))
+
+
+def _update_preview(out_dir, head, meta):
+    """
+    追加数据后更新预览文件的总行数，原预览不足 PREVIEW_ROWS 行时用新行补足
+    """
+    preview_file = os.path.join(out_dir, PREVIEW_FILE)
+    if not os.path.exists(preview_file):
+        return
+    with open(preview_file, 'r') as f:
+        preview = json.load(f)
+    preview['rows'] = meta['rows']
+    missing = PREVIEW_ROWS - len(preview['preview'])
+    if missing > 0 and head is not None:
+        preview['preview'].extend(frame_to_records(head.head(missing)))
+    with open(preview_file, 'w') as f:
+        json.dump(preview, f, ensure_ascii=False)
+
+
+def _append_csv_rows(source_path, csv_path):
+    """
+    将CSV文件除表头外的内容追加到原始CSV末尾
+    """
+    with open(source_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        needs_newline = False
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b'\n'
+    with open(csv_path, 'rb') as src, open(source_path, 'ab') as dst:
+        src.readline()
+        if needs_newline:
+            dst.write(b'\n')
+        shutil.copyfileobj(src, dst, HASH_BLOCK_SIZE)
+
+
+# 列式目录 -> 追加数据时使用的锁，同一数据集的追加串行执行
+_append_locks = {}
+_append_locks_guard = threading.Lock()
+
+
+def _append_lock(out_dir):
+    with _append_locks_guard:
+        return _append_locks.setdefault(os.path.abspath(out_dir), threading.Lock())
+
+
+def _last_valid_time(values):
+    """
+    时间索引中最后一个非缺失的时间点（从末尾向前分块查找）
+    """
+    missing = np.iinfo(np.int64).min
+    end = len(values)
+    while end > 0:
+        start = max(0, end - CHUNK_ROWS)
+        valid = np.flatnonzero(np.asarray(values[start:end]) != missing)
+        if len(valid):
+            return values[start + valid[-1]]
+        end = start
+    return None
+
+
+def _decode_column(path, column, meta, rows):
+    """
+    将列式存储的单列还原为pandas可用的数组
+    rows 为切片或行号数组，只读取内存映射中对应的部分
+    """
+    kind = column['kind']
+    if kind == 'time':
+        values = open_time_index(path, meta)[rows]
+        return pd.to_datetime(np.asarray(values), unit='ns')
+    values = open_column(path, column, meta['rows'])[rows]
+    if kind == 'category':
+        categories = np.asarray(column['categories'], dtype=object)
+        codes = np.asarray(values)
+        decoded = np.empty(len(codes), dtype=object)
+        valid = codes >= 0
+        decoded[valid] = categories[codes[valid]]
+        decoded[~valid] = None
+        return decoded
+    return np.asarray(values)
+
+
+class RunningStats:
+    """
+    数值列流式统计
+    按批合并均值和二阶中心矩（Chan等人的并行算法），内存占用为常数；
+    状态可序列化保存，后续追加数据时可继续累积
+    """
+
+    def __init__(self, state=None):
+        state = state or {}
+        self.count = state.get('count', 0)
+        self.nulls = state.get('nulls', 0)
+        self.mean = state.get('mean', 0.0)
+        self.m2 = state.get('m2', 0.0)
+        self.min = state.get('min')
+        self.max = state.get('max')
+
+    def update(self, values):
+        """
+        合并一批数据（NaN计为缺失值）
+        """
+        values = np.asarray(values, dtype=np.float64)
+        valid = values[~np.isnan(values)]
+        self.nulls += len(values) - len(valid)
+        if len(valid) == 0:
+            return
+        batch_count = len(valid)
+        batch_mean = float(valid.mean())
+        batch_m2 = float(np.square(valid - batch_mean).sum())
+        total = self.count + batch_count
+        delta = batch_mean - self.mean
+        self.mean += delta * batch_count / total
+        self.m2 += batch_m2 + delta * delta * self.count * batch_count / total
+        self.count = total
+        batch_min, batch_max = float(valid.min()), float(valid.max())
+        self.min = batch_min if self.min is None else min(self.min, batch_min)
+        self.max = batch_max if self.max is None else max(self.max, batch_max)
+
+    def state(self):
+        return {
+            'count': self.count,
+            'nulls': self.nulls,
+            'mean': self.mean,
+            'm2': self.m2,
+            'min': self.min,
+            'max': self.max
+        }
+
+    def summary(self):
+        """
+        汇总统计: 非空数、缺失数、最小值、最大值、均值、样本标准差
+        """
+        return {
+            'count': self.count,
+            'nulls': self.nulls,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.mean if self.count else None,
+            'std': float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else None
+        }
+
+
+class ColumnarWriter:
+    """
+    列式数据集写入器
+    按批追加DataFrame，列类型和时间格式由第一批数据确定，
+    之后批次中无法按该类型解析的值记为缺失值
+    """
+
+    def __init__(self, out_dir, source_path=None, content_hash=None):
+        self.out_dir = out_dir
+        self.source_path = source_path
+        self.content_hash = content_hash
+        self.columns = None
+        self.rows = 0
+        self.time_column = None
+        self.time_format = None
+        self.time_sorted = True
+        self.time_nulls = 0
+        self.time_min = None
+        self.time_max = None
+        self.time_intervals = {}
+        self._last_time = None
+        self._files = {}
+        self._category_maps = {}
+        self._stats = {}
+
+    @classmethod
+    def resume(cls, out_dir, meta):
+        """
+        从已有的列式目录恢复写入状态，之后的 append 追加到已有数据之后
+        """
+        writer = cls(out_dir, meta.get('source'), meta.get('content_hash'))
+        writer.columns = meta['columns']
+        writer.rows = meta['rows']
+        writer.time_column = meta.get('time_column')
+        time_index = meta.get('time_index')
+        if time_index:
+            writer.time_format = time_index.get('format')
+            writer.time_sorted = time_index.get('sorted', True)
+            writer.time_nulls = time_index.get('nulls', 0)
+            writer.time_min = time_index.get('min')
+            writer.time_max = time_index.get('max')
+            writer.time_intervals = {int(k): v for k, v in (time_index.get('intervals') or {}).items()}
+            writer._last_time = _last_valid_time(open_column(out_dir, time_index, meta['rows']))
+        for column in writer.columns:
+            if column['kind'] == 'numeric':
+                writer._stats[column['name']] = RunningStats(column.get('stats'))
+            elif column['kind'] == 'category':
+                categories = column.get('categories', [])
+                writer._category_maps[column['name']] = {value: i for i, value in enumerate(categories)}
+        return writer
+
+    def append(self, df):
+        """
+        追加一批数据
+        """
+        if self.columns is None:
+            self._init_columns(df)
+
+        for column in self.columns:
+            series = df[column['name']]
+            kind = column['kind']
+            if kind == 'time':
+                values = self._parse_time(series)
+                self._track_time(values)
+                self._write(TIME_INDEX_FILE, values.astype(TIME_DTYPE))
+            elif kind == 'numeric':
+                values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64)
+                self._stats[column['name']].update(values)
+                self._write(column['file'], values.astype(NUMERIC_DTYPE))
+            else:
+                codes = self._encode(column['name'], series)
+                column['nulls'] = column.get('nulls', 0) + int(np.count_nonzero(codes < 0))
+                self._write(column['file'], codes)
+
+        self.rows += len(df)
+
+    def close(self):
+        """
+        关闭文件并写入元数据
+        """
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+        columns = self.columns or []
+        for column in columns:
+            if column['kind'] == 'category':
+                mapping = self._category_maps[column['name']]
+                column['categories'] = sorted(mapping, key=mapping.get)
+            elif column['kind'] == 'numeric':
+                column['stats'] = self._stats[column['name']].state()
+
+        time_index = None
+        if self.time_column:
+            time_index = {
+                'file': TIME_INDEX_FILE,
+                'dtype': TIME_DTYPE,
+                'unit': 'ns',
+                'format': self.time_format,
+                'sorted': self.time_sorted,
+                'nulls': self.time_nulls,
+                'min': self.time_min,
+                'max': self.time_max,
+                'intervals': {str(k): v for k, v in self.time_intervals.items()}
+            }
+
+        meta = {
+            'version': FORMAT_VERSION,
+            'rows': self.rows,
+            'columns': columns,
+            'time_column': self.time_column,
+            'time_index': time_index,
+            'source': self.source_path,
+            'content_hash': self.content_hash
+        }
+        _write_meta(self.out_dir, meta)
+        return meta
+
+    def abort(self):
+        """
+        关闭文件，不写入元数据
+        """
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+    def _init_columns(self, df):
+        self.columns = []
+        for i, name in enumerate(df.columns):
+            series = df[name]
+            if i == 0 and _is_time_column(series):
+                self.time_column = str(name)
+                self.time_format = _infer_time_format(series)
+                self.columns.append({'name': str(name), 'kind': 'time', 'source_dtype': str(series.dtype)})
+            elif pd.api.types.is_numeric_dtype(series):
+                self.columns.append({'name': str(name), 'kind': 'numeric', 'dtype': NUMERIC_DTYPE,
+                                     'source_dtype': str(series.dtype), 'file': f'col_{i}.bin'})
+                self._stats[str(name)] = RunningStats()
+            else:
+                self.columns.append({'name': str(name), 'kind': 'category', 'dtype': CATEGORY_DTYPE,
+                                     'source_dtype': str(series.dtype), 'file': f'col_{i}.bin'})
+                self._category_maps[str(name)] = {}
+
+    def _parse_time(self, series):
+        if self.time_format:
+            parsed = pd.to_datetime(series, format=self.time_format, errors='coerce')
+        else:
+            parsed = pd.to_datetime(series, errors='coerce')
+        return parsed.to_numpy('datetime64[ns]').view('i8')
+
+    def _track_time(self, values):
+        """
+        累积时间列的缺失数、最小/最大值和有序性
+        """
+        valid = values[values != np.iinfo(np.int64).min]
+        self.time_nulls += len(values) - len(valid)
+        if len(valid) == 0:
+            return
+        batch_min, batch_max = int(valid.min()), int(valid.max())
+        self.time_min = batch_min if self.time_min is None else min(self.time_min, batch_min)
+        self.time_max = batch_max if self.time_max is None else max(self.time_max, batch_max)
+        self._track_intervals(valid)
+        self._track_order(valid)
+
+    def _track_intervals(self, values):
+        """
+        统计相邻时间点的间隔分布（包括与上一批最后一个点的间隔），用于推断采样频率和缺口
+        """
+        if self._last_time is not None:
+            values = np.concatenate([[self._last_time], values])
+        diffs = np.diff(values)
+        diffs = diffs[diffs > 0]
+        if len(diffs) == 0:
+            return
+        uniques, counts = np.unique(diffs, return_counts=True)
+        for interval, count in zip(uniques.tolist(), counts.tolist()):
+            self.time_intervals[interval] = self.time_intervals.get(interval, 0) + count
+        if len(self.time_intervals) > MAX_INTERVAL_KEYS:
+            top = sorted(self.time_intervals.items(), key=lambda item: item[1], reverse=True)[:MAX_INTERVAL_KEYS]
+            self.time_intervals = dict(top)
+
+    def _encode(self, name, series):
+        """
+        字符串列字典编码，缺失值编码为-1
+        """
+        mapping = self._category_maps[name]
+        codes, uniques = pd.factorize(series.astype(object))
+        remap = np.empty(len(uniques), dtype=np.int32)
+        for i, value in enumerate(uniques):
+            value = str(value)
+            if value not in mapping:
+                mapping[value] = len(mapping)
+            remap[i] = mapping[value]
+        encoded = np.where(codes >= 0, remap[np.maximum(codes, 0)] if len(remap) else -1, -1)
+        return encoded.astype(CATEGORY_DTYPE)
+
+    def _track_order(self, values):
+        if len(values) == 0:
+            return
+        if self._last_time is not None and values[0] < self._last_time:
+            self.time_sorted = False
+        if self.time_sorted and len(values) > 1 and np.any(values[1:] < values[:-1]):
+            self.time_sorted = False
+        self._last_time = values[-1]
+
+    def _write(self, file_name, values):
+        f = self._files.get(file_name)
+        if f is None:
+            f = open(os.path.join(self.out_dir, file_name), 'ab')
+            self._files[file_name] = f
+        values.tofile(f)
+
+
+def _column_kind(series):
+    if pd.api.types.is_datetime64_any_dtype(series) or _is_time_column(series):
+        return 'time'
+    if pd.api.types.is_numeric_dtype(series):
+        return 'numeric'
+    return 'category'
+
+
+def _infer_time_format(series):
+    """
+    推断时间列格式，返回第一个能解析全部样本的候选格式
+    """
+    sample = series.dropna().astype(str).head(100)
+    for fmt in TIME_FORMATS:
+        try:
+            pd.to_datetime(sample, format=fmt, errors='raise')
+            return fmt
+        except (ValueError, TypeError):
+            continue
+    return None
+
+
+def _is_time_column(series):
+    """
+    判断列是否可解析为时间（数值列不视为时间）
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return False
+    sample = series.dropna().head(100)
+    if sample.empty:
+        return False
+    try:
+        pd.to_datetime(sample, errors='raise')
+        return True
+    except (ValueError, TypeError):
+        return False
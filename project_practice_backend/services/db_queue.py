@@ -0,0 +1,233 @@
+import time
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+
+from sqlalchemy.orm import aliased
+
+from database.db import db
+from database.models import Task
+from services.task_lease import TaskLeases
+from services.scheduler import PRIORITIES, PRIORITY_INTERACTIVE, DEFAULT_WEIGHTS, DEFAULT_USER_MAX_RUNNING, WAIT_SAMPLES, summarize_waits
+
+# 创建日志记录器
+logger = logging.getLogger(__name__)
+
+# 没有可认领的任务时轮询数据库的间隔（秒）
+DEFAULT_POLL_INTERVAL = 1.0
+
+# 每次认领时按调度顺序取出的候选任务数
+CLAIM_CANDIDATES = 10
+
+
+class DatabaseQueue:
+    """
+    基于 tasks 表的任务队列，多台机器上的工作进程共享同一数据库时水平扩展，不需要外部消息代理
+    pending 状态的顶层任务即为排队中的任务；工作线程按优先级权重、用户当前执行中的任务数和创建时间
+    选出候选任务，以 SELECT ... FOR UPDATE SKIP LOCKED（MySQL/PostgreSQL）锁定后用带
+    status='pending' 条件的 UPDATE 认领，SQLite 不支持行锁时由条件 UPDATE 保证同一任务只被认领一次
+    认领的任务带有租约（TaskLeases），工作进程定期心跳续约并同步取消请求；租约过期的任务由任一
+    工作进程回收，按最大尝试次数重新执行或标记为失败
+    与 FairScheduler 接口相同，由 TaskQueue 的工作线程调用
+    """
+
+    # 任务保存在数据库中，服务重启后由工作进程直接认领
+    persistent = True
+
+    def __init__(self, app=None):
+        self.app = None
+        self.leases = TaskLeases()
+        self.weights = dict(DEFAULT_WEIGHTS)
+        self.user_max_running = DEFAULT_USER_MAX_RUNNING
+        self.poll_interval = DEFAULT_POLL_INTERVAL
+        self._pass = {priority: 0.0 for priority in PRIORITIES}
+        self._closed = 0
+        self._waits = {priority: deque(maxlen=WAIT_SAMPLES) for priority in PRIORITIES}
+        self._dispatched = {priority: 0 for priority in PRIORITIES}
+        self._condition = threading.Condition()
+        self._claim_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    @property
+    def worker_id(self):
+        return self.leases.worker_id
+
+    def init_app(self, app):
+        """
+        从应用配置读取轮询间隔，启动租约的心跳线程
+        """
+        self.app = app
+        self.poll_interval = app.config.get('TASK_QUEUE_POLL_INTERVAL', DEFAULT_POLL_INTERVAL)
+        self.leases.init_app(app)
+        logger.info(f'数据库任务队列已启用，工作进程: {self.worker_id}')
+
+    def put(self, item, user_id=None, priority=PRIORITY_INTERACTIVE):
+        """
+        任务提交时已写入数据库，只唤醒本进程空闲的工作线程
+        """
+        with self._condition:
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        """
+        认领下一个可执行的任务，返回 (任务ID, 用户ID)；没有可认领的任务时按轮询间隔重试
+        close() 之后返回 None，超时返回 None
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            with self._condition:
+                if self._closed:
+                    self._closed -= 1
+                    return None
+            try:
+                with self.app.app_context():
+                    entry = self.claim()
+            except Exception as e:
+                logger.error(f'认领任务失败: {str(e)}')
+                entry = None
+            if entry is not None:
+                return entry
+            remaining = None if deadline is None else deadline - time.time()
+            if remaining is not None and remaining <= 0:
+                return None
+            with self._condition:
+                if not self._closed:
+                    self._condition.wait(self.poll_interval if remaining is None else min(remaining, self.poll_interval))
+
+    def done(self, item, user_id):
+        """
+        任务执行结束，不再为该任务续约
+        """
+        self.leases.untrack(item)
+
+    def close(self, count=1):
+        """
+        让 count 个工作线程的 get() 返回 None（用于停止工作线程）
+        """
+        with self._condition:
+            self._closed += count
+            self._condition.notify_all()
+
+    def qsize(self):
+        with self.app.app_context():
+            return _pending_query().count()
+
+    def claim(self):
+        """
+        按优先级类别的虚拟时间顺序尝试认领任务（与 FairScheduler 相同的加权公平调度，各工作进程独立计算）
+        需要在应用上下文中调用
+        """
+        # 同一进程的工作线程依次认领，减少对同一批候选行的争用
+        with self._claim_lock:
+            skipped = []
+            for priority in sorted(PRIORITIES, key=lambda p: self._pass[p]):
+                entry = self._claim_priority(priority)
+                if entry is None:
+                    skipped.append(priority)
+                    continue
+                # 没有可认领任务的类别不累积份额
+                for other in skipped:
+                    self._pass[other] = max(self._pass[other], self._pass[priority])
+                self._pass[priority] += 1.0 / max(self.weights.get(priority, 1), 1e-6)
+                return entry
+            return None
+
+    def _claim_priority(self, priority):
+        running = aliased(Task)
+        query = _pending_query()
+        if priority == PRIORITY_INTERACTIVE:
+            query = query.filter(db.or_(Task.priority == priority, Task.priority.is_(None)))
+        else:
+            query = query.filter(Task.priority == priority)
+
+        # 跳过执行中的任务数已达到上限的用户（多个工作进程同时认领时可能短暂超出）
+        if self.user_max_running:
+            busy = (db.session.query(running.user_id)
+                    .filter(running.status == 'running', running.parent_id.is_(None), running.user_id.isnot(None))
+                    .group_by(running.user_id)
+                    .having(db.func.count(running.id) >= self.user_max_running))
+            query = query.filter(db.or_(Task.user_id.is_(None), Task.user_id.notin_(busy)))
+
+        # 执行中任务少的用户优先，同一用户按创建时间先后
+        load = (db.select(db.func.count(running.id))
+                .where(running.user_id == Task.user_id, running.status == 'running', running.parent_id.is_(None))
+                .correlate(Task)
+                .scalar_subquery())
+        candidates = [row.id for row in query.with_entities(Task.id)
+                      .order_by(load, Task.created_at, Task.id).limit(CLAIM_CANDIDATES)]
+        if not candidates:
+            return None
+
+        # 只锁定候选行，其他工作进程已锁定的行直接跳过
+        locked = {row.id: row for row in Task.query
+                  .with_entities(Task.id, Task.user_id, Task.created_at)
+                  .filter(Task.id.in_(candidates), Task.status == 'pending')
+                  .with_for_update(skip_locked=True)}
+        now = datetime.utcnow()
+        for task_id in candidates:
+            row = locked.get(task_id)
+            if row is None:
+                continue
+            claimed = Task.query.filter(Task.id == task_id, Task.status == 'pending').update({
+                'status': 'running',
+                'worker_id': self.worker_id,
+                'heartbeat_at': now,
+                'lease_expires_at': self.leases.expires_at(now)
+            }, synchronize_session=False)
+            if not claimed:
+                continue
+            db.session.commit()
+            self.leases.track(task_id)
+            self._waits[priority].append((now - row.created_at).total_seconds() if row.created_at else 0.0)
+            self._dispatched[priority] += 1
+            logger.info(f'工作进程 {self.worker_id} 认领任务: {task_id}')
+            return task_id, row.user_id
+        db.session.rollback()
+        return None
+
+    def stats(self):
+        """
+        数据库中排队/执行中的任务数（所有工作进程），以及本进程认领任务的等待时间统计
+        """
+        with self.app.app_context():
+            now = datetime.utcnow()
+            priority = db.func.coalesce(Task.priority, PRIORITY_INTERACTIVE)
+            queued = {p: 0 for p in PRIORITIES}
+            oldest = {p: 0.0 for p in PRIORITIES}
+            for name, count, created_at in (_pending_query()
+                                            .with_entities(priority, db.func.count(Task.id), db.func.min(Task.created_at))
+                                            .group_by(priority)):
+                queued[name] = count
+                oldest[name] = (now - created_at).total_seconds() if created_at else 0.0
+            users = {}
+            for user_id, status, count in (db.session.query(Task.user_id, Task.status, db.func.count(Task.id))
+                                           .filter(Task.status.in_(('pending', 'running')), Task.parent_id.is_(None))
+                                           .group_by(Task.user_id, Task.status)):
+                key = 'queued' if status == 'pending' else 'running'
+                users.setdefault(user_id, {'queued': 0, 'running': 0})[key] = count
+            workers = dict(db.session.query(Task.worker_id, db.func.count(Task.id))
+                           .filter(Task.status == 'running', Task.parent_id.is_(None), Task.worker_id.isnot(None))
+                           .group_by(Task.worker_id))
+        return {
+            'backend': 'database',
+            'worker_id': self.worker_id,
+            'queued': dict(queued, total=sum(queued.values())),
+            'running': sum(u['running'] for u in users.values()),
+            'running_local': self.leases.running(),
+            'running_by_worker': workers,
+            'dispatched': dict(self._dispatched),
+            'oldest_wait_seconds': oldest,
+            'wait_seconds': {p: summarize_waits(list(samples)) for p, samples in self._waits.items()},
+            'users': users,
+            'weights': dict(self.weights),
+            'user_max_running': self.user_max_running
+        }
+
+
+def _pending_query():
+    """
+    排队中的顶层任务（扫参试验由所属的扫参任务执行，不单独认领）
+    """
+    return Task.query.filter(Task.status == 'pending', Task.parent_id.is_(None))
@@ -0,0 +1,86 @@
+import numpy as np
+
+# 支持的降采样方法
+METHODS = ('lttb', 'minmax')
+
+# 降采样最少保留的点数（首尾两点）
+MIN_POINTS = 2
+
+
+def downsample_indices(values, max_points, method='lttb'):
+    """
+    计算降采样后保留的下标（升序），所有字段共用同一组下标以保持对齐
+    多列序列 (n, k) 以各行的列均值作为降采样基准
+    """
+    values = np.asarray(values)
+    if values.ndim == 2:
+        values = np.nan_to_num(values.astype(np.float64)).mean(axis=1)
+    if method == 'minmax':
+        return minmax_indices(values, max_points)
+    return lttb_indices(values, max_points)
+
+
+def lttb_indices(values, max_points):
+    """
+    Largest-Triangle-Three-Buckets 降采样
+    保留首尾点，其余每个桶选出与前一个选中点、下一个桶均值构成三角形面积最大的点
+    """
+    y = np.nan_to_num(np.asarray(values, dtype=np.float64))
+    n = len(y)
+    if max_points >= n:
+        return np.arange(n)
+    if max_points < 3:
+        return np.array([0, n - 1][:max(max_points, 0)], dtype=np.int64)
+
+    # 首尾点之外划分 max_points-2 个桶，每个桶至少包含一个点
+    edges = np.floor(np.linspace(1, n - 1, max_points - 1)).astype(np.int64)
+    indices = np.empty(max_points, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    selected = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        # 下一个桶的均值点（最后一个桶使用末尾点）
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = (next_start + next_end - 1) / 2.0
+        avg_y = y[next_start:next_end].mean()
+
+        x = np.arange(start, end, dtype=np.float64)
+        area = np.abs(
+            (selected - avg_x) * (y[start:end] - y[selected])
+            - (selected - x) * (avg_y - y[selected])
+        )
+        selected = start + int(np.argmax(area))
+        indices[i + 1] = selected
+
+    return indices
+
+
+def minmax_indices(values, max_points):
+    """
+    最小最大值降采样
+    每个桶保留最小值和最大值两个点，适合保留尖峰
+    """
+    y = np.nan_to_num(np.asarray(values, dtype=np.float64))
+    n = len(y)
+    if max_points >= n:
+        return np.arange(n)
+    if max_points < 2:
+        return np.array([0][:max(max_points, 0)], dtype=np.int64)
+    # 每个桶保留两个点，桶数取 max_points // 2，返回点数不超过 max_points
+    num_buckets = max_points // 2
+    edges = np.floor(np.linspace(0, n, num_buckets + 1)).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+    starts, ends = starts[ends > starts], ends[ends > starts]
+
+    # 按桶计算最小/最大值位置
+    bucket_ids = np.repeat(np.arange(len(starts)), ends - starts)
+    order = np.lexsort((y, bucket_ids))
+    min_idx = order[starts]
+    max_idx = order[ends - 1]
+
+    return np.unique(np.concatenate([min_idx, max_idx]))
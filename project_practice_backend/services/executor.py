@@ -0,0 +1,360 @@
+import os
+import logging
+import numpy as np
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import resource
+except ImportError:  # Windows不支持进程资源限制
+    resource = None
+
+from services.forecasters import load_forecaster, is_vectorized, run_forecast, merge_column_results
+from services.backtest import merge_backtest_results
+from services.dataset_cache import dataset_cache, read_dataset, DEFAULT_MAX_BYTES
+
+# 创建日志记录器
+logger = logging.getLogger(__name__)
+
+# 每种模型类型默认的工作进程数
+DEFAULT_WORKERS_PER_MODEL = 2
+
+# 工作进程内常驻的模型实例，只在进程启动时初始化一次
+_worker_state = {
+    'model_type': None,
+    'forecaster': None,
+    'memory_limit_mb': None
+}
+
+
+def _init_worker(model_type, preset_paths, cache_max_bytes, memory_limit_mb=None):
+    """
+    工作进程初始化：设置内存上限，导入并构建模型，将预设数据集预加载到进程内数据集缓存
+    """
+    if memory_limit_mb and resource is not None:
+        # 限制虚拟地址空间，超出时分配内存失败（MemoryError），不会影响主进程和其他工作进程
+        limit = int(memory_limit_mb) * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    _worker_state['memory_limit_mb'] = memory_limit_mb
+    _worker_state['model_type'] = model_type
+    _worker_state['forecaster'] = load_forecaster(model_type)
+    dataset_cache.max_bytes = cache_max_bytes
+    for path in preset_paths:
+        try:
+            read_dataset(path)
+        except Exception as e:
+            logger.warning(f'预加载数据集失败 {path}: {str(e)}')
+
+
+def _warmup():
+    """
+    空任务，用于提前拉起工作进程
+    """
+    return os.getpid()
+
+
+def _run_prediction(data_path, hyperparams):
+    """
+    在工作进程中执行预测，数据集经过进程内缓存，热点数据集每个进程只解析一次
+    """
+    try:
+        return run_forecast(_worker_state['forecaster'], read_dataset(data_path), hyperparams)
+    except MemoryError:
+        # 释放进程内缓存的数据集，避免后续预测继续受内存不足影响
+        dataset_cache.clear()
+        raise MemoryError(f'预测超出工作进程内存上限 ({_worker_state["memory_limit_mb"]}MB)')
+
+
+class InferenceExecutor:
+    """
+    预测执行引擎
+    每种模型类型独占一个进程池，工作进程常驻模型和预设数据，避免每次请求重复初始化
+    取消预测时终止进程池，同一进程池中其他执行中和排队中的调用在重新创建的进程池中自动重新执行
+    """
+
+    def __init__(self, app=None):
+        self.workers_per_model = DEFAULT_WORKERS_PER_MODEL
+        self.model_workers = {}
+        self.start_method = 'spawn'
+        self.preset_paths = []
+        self.cache_max_bytes = DEFAULT_MAX_BYTES
+        self.memory_limit_mb = None
+        self.model_memory_limits = {}
+        self._pools = {}
+        self._contexts = {}
+        # 每种模型类型提交到进程池、尚未完成的调用（调用方持有的Future）
+        self._inflight = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        读取配置并预热指定模型的进程池
+        """
+        self.workers_per_model = app.config.get('INFERENCE_WORKERS', DEFAULT_WORKERS_PER_MODEL)
+        self.model_workers = app.config.get('INFERENCE_MODEL_WORKERS', {})
+        # 应用中存在后台线程，fork可能导致死锁，默认使用spawn
+        self.start_method = app.config.get('INFERENCE_START_METHOD', 'spawn')
+        self.cache_max_bytes = app.config.get('DATASET_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)
+        self.memory_limit_mb = app.config.get('INFERENCE_MEMORY_LIMIT_MB')
+        self.model_memory_limits = app.config.get('INFERENCE_MODEL_MEMORY_LIMITS_MB', {})
+        if app.config.get('INFERENCE_WARM_PRESETS', True):
+            with app.app_context():
+                self.preset_paths = _get_preset_paths()
+        for model_type in app.config.get('INFERENCE_PREWARM_MODELS', []):
+            self.prewarm(model_type)
+        app.extensions['inference_executor'] = self
+
+    def submit(self, model_type, data_path, hyperparams, progress=None):
+        """
+        提交预测请求，返回Future
+        工作进程数为0时在当前线程中直接执行
+        多列任务和回测任务遇到不支持批量预测的模型时，按列或按折分片到进程池的各个工作进程并行执行，
+        每个分片完成时调用 progress(已完成分片数, 分片总数, 分片结果)
+        """
+        pool = self._get_pool(model_type)
+        if pool is None:
+            future = Future()
+            try:
+                forecaster = load_forecaster(model_type)
+                future.set_result(run_forecast(forecaster, read_dataset(data_path), hyperparams))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        # 回测任务按折分片
+        backtest = hyperparams.get('backtest')
+        if backtest and backtest.get('folds') and not is_vectorized(model_type):
+            num_shards = min(self.worker_count(model_type), backtest['folds'])
+            if num_shards > 1:
+                bounds = np.linspace(0, backtest['folds'], num_shards + 1).astype(int)
+                futures = [self._submit(model_type, data_path,
+                                        {**hyperparams, 'backtest': {**backtest, 'foldRange': [int(a), int(b)]}})
+                           for a, b in zip(bounds[:-1], bounds[1:])]
+                return _tag(_gather(futures, merge_backtest_results, progress), model_type, futures)
+
+        value_columns = hyperparams.get('valueColumns') or []
+        num_shards = min(self.worker_count(model_type), len(value_columns))
+        if num_shards > 1 and not is_vectorized(model_type) and not backtest and not hyperparams.get('update'):
+            shards = [list(shard) for shard in np.array_split(value_columns, num_shards)]
+            futures = [self._submit(model_type, data_path, {**hyperparams, 'valueColumns': shard})
+                       for shard in shards]
+            combined = _gather(futures, lambda results: merge_column_results(results, hyperparams), progress)
+            return _tag(combined, model_type, futures)
+        future = self._submit(model_type, data_path, hyperparams)
+        return _tag(future, model_type, [future])
+
+    def cancel(self, future):
+        """
+        取消预测，返回是否终止了进程池
+        ProcessPoolExecutor 不能中断单个正在执行的调用，任一工作进程退出都会使整个进程池失效，
+        因此终止该模型类型的整个进程池，下次提交时重新创建；被取消的预测以 BrokenProcessPool 失败，
+        同一进程池中其他未完成的调用标记为中断，在新的进程池中重新执行，调用方的Future不会因此失败
+        排队中的分片也不单独调用 Future.cancel()：已取消的排队项在进程池终止时会导致
+        进程池的管理线程异常退出（Python 3.11），其余预测的Future永远不会完成
+        """
+        shards = getattr(future, 'shards', None)
+        if shards is None or all(f.done() for f in shards):
+            return False
+        self._terminate_pool(future.model_type, cancelled=shards)
+        return True
+
+    def memory_limit(self, model_type):
+        """
+        模型类型对应的工作进程内存上限（MB），None表示不限制
+        """
+        return self.model_memory_limits.get(model_type, self.memory_limit_mb)
+
+    def worker_count(self, model_type):
+        """
+        模型类型对应的工作进程数
+        """
+        return self.model_workers.get(model_type, self.workers_per_model)
+
+    def prewarm(self, model_type):
+        """
+        提前启动模型类型对应的全部工作进程
+        """
+        pool = self._get_pool(model_type)
+        if pool is None:
+            return
+        for _ in range(self.worker_count(model_type)):
+            pool.submit(_warmup)
+
+    def shutdown(self, wait=True):
+        """
+        关闭所有进程池
+        """
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.shutdown(wait=wait)
+
+    def _get_pool(self, model_type):
+        if self.worker_count(model_type) <= 0:
+            return None
+        with self._lock:
+            return self._create_pool(model_type)
+
+    def _create_pool(self, model_type):
+        """
+        返回模型类型的进程池，不存在时创建，需要持有 self._lock
+        """
+        pool = self._pools.get(model_type)
+        if pool is None:
+            num_workers = self.worker_count(model_type)
+            context = _TrackingContext(multiprocessing.get_context(self.start_method))
+            pool = ProcessPoolExecutor(
+                max_workers=num_workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(model_type, list(self.preset_paths), self.cache_max_bytes,
+                          self.memory_limit(model_type))
+            )
+            self._pools[model_type] = pool
+            self._contexts[model_type] = context
+            logger.info(f'创建模型进程池: {model_type}，工作进程数: {num_workers}')
+        return pool
+
+    def _submit(self, model_type, data_path, hyperparams, future=None):
+        """
+        提交一次预测调用到模型类型的进程池，返回调用方持有的Future
+        进程池因取消其他预测被终止时，调用在重新创建的进程池中重新执行（见 _on_done）
+        """
+        future = future or Future()
+        with self._lock:
+            pool = self._create_pool(model_type)
+            self._inflight.setdefault(model_type, set()).add(future)
+        try:
+            pool_future = pool.submit(_run_prediction, data_path, hyperparams)
+        except Exception as e:
+            # 获取进程池后、提交前进程池已被终止
+            pool_future = Future()
+            pool_future.set_exception(e)
+        pool_future.add_done_callback(
+            lambda f: self._on_done(model_type, data_path, hyperparams, future, f))
+        return future
+
+    def _on_done(self, model_type, data_path, hyperparams, future, pool_future):
+        """
+        进程池中的调用结束：因取消其他预测而中断时重新提交，否则将结果传给调用方的Future
+        """
+        with self._lock:
+            self._inflight.get(model_type, set()).discard(future)
+            interrupted = getattr(future, 'interrupted', False)
+            future.interrupted = False
+        if pool_future.cancelled():
+            future.cancel()
+            return
+        error = pool_future.exception()
+        if interrupted and isinstance(error, (BrokenProcessPool, RuntimeError)):
+            logger.info(f'进程池因取消其他预测被终止，重新执行中断的预测: {model_type}')
+            self._submit(model_type, data_path, hyperparams, future)
+        elif error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(pool_future.result())
+
+    def _terminate_pool(self, model_type, cancelled=()):
+        """
+        终止模型类型的进程池，除 cancelled 之外未完成的调用标记为中断（结束后重新提交）
+        """
+        with self._lock:
+            pool = self._pools.pop(model_type, None)
+            context = self._contexts.pop(model_type, None)
+            for future in self._inflight.get(model_type, set()):
+                future.interrupted = future not in cancelled
+        if pool is None:
+            return
+        logger.warning(f'终止模型进程池: {model_type}')
+        # 进程池没有提供终止正在执行的调用的接口，直接终止创建时记录的工作进程；
+        # 不使用 cancel_futures=True，原因见 cancel()
+        for process in context.processes if context else []:
+            if process.is_alive():
+                process.terminate()
+        pool.shutdown(wait=False)
+
+
+class _TrackingContext:
+    """
+    包装 multiprocessing 上下文，记录进程池通过它创建的工作进程，用于终止进程池
+    其他属性（队列、锁、启动方式等）直接转发给原上下文
+    """
+
+    def __init__(self, context):
+        self._context = context
+        self.processes = []
+
+    def Process(self, *args, **kwargs):
+        process = self._context.Process(*args, **kwargs)
+        self.processes.append(process)
+        return process
+
+    def __getattr__(self, name):
+        return getattr(self._context, name)
+
+
+def _tag(future, model_type, shards):
+    """
+    记录Future对应的模型类型和实际提交到进程池的分片，用于取消
+    """
+    future.model_type = model_type
+    future.shards = shards
+    return future
+
+
+def _gather(futures, combine, progress=None):
+    """
+    所有分片完成后合并结果，任一分片失败时整体失败
+    """
+    combined = Future()
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def on_done(future):
+        with lock:
+            remaining[0] -= 1
+            done = len(futures) - remaining[0]
+        if progress is not None and future.exception() is None:
+            try:
+                progress(done, len(futures), future.result())
+            except Exception as e:
+                logger.warning(f'发布分片进度失败: {str(e)}')
+        if done < len(futures):
+            return
+        try:
+            combined.set_result(combine([f.result() for f in futures]))
+        except Exception as e:
+            combined.set_exception(e)
+
+    for future in futures:
+        future.add_done_callback(on_done)
+    return combined
+
+
+def _get_preset_paths():
+    """
+    获取所有存在的预设数据集文件路径
+    """
+    from database.models import Dataset
+
+    try:
+        datasets = Dataset.query.filter_by(is_preset=True).all()
+    except Exception as e:
+        logger.warning(f'获取预设数据集失败: {str(e)}')
+        return []
+    return [d.file_path for d in datasets if d.file_path and os.path.exists(d.file_path)]
+
+
+# 全局预测执行引擎实例
+inference_executor = InferenceExecutor()
+
+
+def init_inference_executor(app):
+    """
+    初始化预测执行引擎
+    """
+    inference_executor.init_app(app)
@@ -0,0 +1,209 @@
+import time
+import logging
+import numpy as np
+
+from services.metrics import compute_metrics, to_json_metrics
+from services.backtest import run_backtest
+from services.incremental import run_update
+
+# 创建日志记录器
+logger = logging.getLogger(__name__)
+
+
+class MockForecaster:
+    """
+    模拟预测模型
+    实际应用中应替换为真实的模型实现（加载权重、构建网络等只在初始化时执行一次）
+    """
+
+    # 模型版本，模型实现或权重变化时需要更新（预测结果缓存键的一部分）
+    version = '1.0'
+
+    # 是否支持批量预测（一次预测多列或多个回测窗口），不支持时按列或按折拆分到多个工作进程执行
+    vectorized = True
+
+    # 是否支持增量更新（数据集追加数据后只对新增的数据点预测，不重新拟合全部历史）
+    supports_update = True
+
+    # 增量更新需要的新增数据之前的历史点数
+    update_context = 1
+
+    def __init__(self, model_type):
+        self.model_type = model_type
+
+    def predict(self, df, hyperparams):
+        """
+        对数据集执行预测
+        """
+        # 模拟预测过程
+        time.sleep(2)  # 模拟计算时间
+        return generate_mock_prediction(df, hyperparams)
+
+    def forecast(self, history, horizon, hyperparams):
+        """
+        根据单个历史窗口预测未来 horizon 步
+        """
+        return self.forecast_windows(history[np.newaxis, :], horizon, hyperparams)[0]
+
+    def forecast_windows(self, histories, horizon, hyperparams):
+        """
+        批量预测多个历史窗口 (窗口数, 窗口长度)，返回 (窗口数, horizon)
+        模拟实现：朴素预测（重复窗口最后一个值）
+        """
+        time.sleep(2)  # 模拟计算时间
+        return np.repeat(histories[:, -1:], horizon, axis=1)
+
+    def update(self, df, hyperparams):
+        """
+        增量预测：df 为新增的行及其之前 update_context 个历史点，返回新增行的预测值
+        模拟实现：朴素预测（上一时刻的值）
+        """
+        column = hyperparams.get('valueColumns') or hyperparams.get('valueColumn')
+        values = df[column].to_numpy(dtype=np.float64)
+        return values[self.update_context - 1:-1]
+
+
+# 模型类型 -> 模型实现
+FORECASTERS = {
+    'CrossGNN': MockForecaster,
+    'HDMixer': MockForecaster,
+    'LeRet': MockForecaster,
+}
+
+
+def load_forecaster(model_type):
+    """
+    根据模型类型创建模型实例，未注册的类型使用模拟模型
+    """
+    forecaster_cls = FORECASTERS.get(model_type, MockForecaster)
+    logger.info(f'加载模型: {model_type}')
+    return forecaster_cls(model_type)
+
+
+def supports_update(model_type):
+    """
+    模型实现是否支持增量更新
+    """
+    forecaster_cls = FORECASTERS.get(model_type, MockForecaster)
+    return getattr(forecaster_cls, 'supports_update', False)
+
+
+def is_vectorized(model_type):
+    """
+    模型实现是否支持批量预测
+    """
+    forecaster_cls = FORECASTERS.get(model_type, MockForecaster)
+    return getattr(forecaster_cls, 'vectorized', False)
+
+
+def run_forecast(forecaster, df, hyperparams):
+    """
+    执行预测或回测（超参数中包含 backtest 配置时为滚动回测，包含 update 配置时为增量更新）
+    """
+    if hyperparams.get('update'):
+        return run_update(forecaster, df, hyperparams)
+    if hyperparams.get('backtest'):
+        return run_backtest(forecaster, df, hyperparams)
+    return predict_columns(forecaster, df, hyperparams)
+
+
+def predict_columns(forecaster, df, hyperparams):
+    """
+    执行预测；多列任务遇到不支持多列的模型时逐列预测后合并
+    """
+    value_columns = hyperparams.get('valueColumns')
+    if not value_columns or len(value_columns) == 1 or getattr(forecaster, 'vectorized', False):
+        return forecaster.predict(df, hyperparams)
+    results = [forecaster.predict(df, {**hyperparams, 'valueColumns': [c]}) for c in value_columns]
+    return merge_column_results(results, hyperparams)
+
+
+def merge_column_results(results, hyperparams):
+    """
+    合并按列拆分执行的预测结果：多列字段按列拼接，误差指标按合并后的数组重新计算
+    """
+    data = {}
+    for name, values in results[0]['data'].items():
+        if np.ndim(values) == 2:
+            data[name] = np.concatenate([np.asarray(r['data'][name]) for r in results], axis=1)
+        else:
+            data[name] = values
+
+    columns = [c for r in results for c in r.get('columns', [])]
+    metrics = compute_metrics(data['real_values'], data['predicted_values'],
+                              horizon=hyperparams.get('predictionLength', 24))
+    # 误差以外的指标（耗时、数据量等）取第一个分片的值
+    for key, value in results[0]['metrics'].items():
+        if key not in metrics and key != 'columns':
+            metrics[key] = value
+    metrics['columns'] = columns
+    return {'data': data, 'columns': columns, 'metrics': to_json_metrics(metrics)}
+
+
+def get_forecaster_version(model_type):
+    """
+    获取模型类型对应实现的版本号
+    """
+    forecaster_cls = FORECASTERS.get(model_type, MockForecaster)
+    return getattr(forecaster_cls, 'version', '0')
+
+
+def generate_mock_prediction(df, hyperparams):
+    """
+    生成模拟预测结果
+    实际应用中应替换为真实的预测逻辑
+    序列以NumPy数组返回，由结果存储直接写入，不再逐元素转换为列表
+    """
+    # 获取数据长度
+    data_length = len(df)
+
+    # 获取预测长度
+    prediction_length = hyperparams.get('predictionLength', 24)
+
+    value_columns = hyperparams.get('valueColumns')
+    value_column = hyperparams.get('valueColumn')
+    if value_columns:
+        # 多列预测：结果为 (数据长度, 列数) 的二维数组，每列独立计算预测区间
+        real_values = df[value_columns].to_numpy(dtype=np.float64)
+        predicted_values = np.vstack([real_values[:1], real_values[:-1]])
+        interval = 1.96 * np.nanstd(real_values - predicted_values, axis=0)
+    elif value_column and value_column in df.columns:
+        # 指定值列时使用真实数据，预测值为朴素预测（上一时刻的值）
+        real_values = df[value_column].to_numpy(dtype=np.float64)
+        predicted_values = np.concatenate([real_values[:1], real_values[:-1]])
+        interval = 1.96 * np.nanstd(real_values - predicted_values)
+    else:
+        # 生成模拟的真实值和预测值
+        real_values = np.sin(np.linspace(0, 10, data_length))
+        predicted_values = np.sin(np.linspace(0.1, 10.1, data_length))
+        interval = 0.2
+
+    # 生成预测区间的上下界
+    upper_bound = predicted_values + interval
+    lower_bound = predicted_values - interval
+
+    # 计算误差指标
+    metrics = compute_metrics(real_values, predicted_values, horizon=prediction_length)
+    metrics.update({
+        'duration': round(np.random.uniform(1.5, 5.0), 2),
+        'dataPoints': data_length,
+        'confidence': round(np.random.uniform(0.85, 0.98), 2)
+    })
+    if value_columns:
+        metrics['columns'] = list(value_columns)
+
+    # 构建结果
+    result = {
+        'data': {
+            'timestamps': df.iloc[:, 0].to_numpy(),  # 假设第一列是时间戳
+            'real_values': real_values,
+            'predicted_values': predicted_values,
+            'upper_bound': upper_bound,
+            'lower_bound': lower_bound
+        },
+        'metrics': to_json_metrics(metrics)
+    }
+    if value_columns:
+        result['columns'] = list(value_columns)
+
+    return result
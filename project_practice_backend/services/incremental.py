@@ -0,0 +1,61 @@
+import numpy as np
+
+from services.metrics import compute_metrics, to_json_metrics
+from services.result_store import read_meta, open_series, result_exists, to_stored_array
+
+# 增量更新时从源结果沿用、由模型对新增数据点计算的字段
+UPDATE_FIELDS = ('timestamps', 'real_values', 'predicted_values', 'upper_bound', 'lower_bound')
+
+
+def run_update(forecaster, df, hyperparams):
+    """
+    增量更新预测结果（数据集追加数据后）
+    hyperparams['update'] = {'sourceResult': 源任务结果目录, 'startRow': 源结果覆盖的行数}
+    模型只接收新增的行及其之前 update_context 个历史点，不重新拟合全部历史；
+    新增部分与源结果拼接，预测区间沿用源结果最后一个点的区间宽度，误差指标按完整序列重新计算
+    """
+    update = hyperparams['update']
+    source, start = update['sourceResult'], update['startRow']
+    if not getattr(forecaster, 'supports_update', False):
+        raise ValueError('模型不支持增量更新')
+    if not result_exists(source):
+        raise ValueError('源任务的预测结果不存在')
+
+    meta = read_meta(source)
+    if meta['length'] != start or any(name not in meta['fields'] for name in UPDATE_FIELDS):
+        raise ValueError('源任务的预测结果与数据集不一致')
+    if start >= len(df):
+        raise ValueError('数据集没有新增数据')
+    context = getattr(forecaster, 'update_context', 0)
+    if start < context:
+        raise ValueError(f'增量更新至少需要 {context} 个历史点')
+
+    column = hyperparams.get('valueColumns') or hyperparams.get('valueColumn')
+    predicted = np.asarray(forecaster.update(df.iloc[start - context:], hyperparams), dtype=np.float64)
+    real = df[column].iloc[start:].to_numpy(dtype=np.float64)
+    if predicted.shape != real.shape:
+        raise ValueError(f'增量预测结果形状 {predicted.shape} 与新增数据 {real.shape} 不一致')
+
+    previous = {name: open_series(source, name) for name in UPDATE_FIELDS}
+    width = np.asarray(previous['upper_bound'][-1]) - np.asarray(previous['predicted_values'][-1])
+    appended = {
+        'timestamps': to_stored_array(df.iloc[start:, 0].to_numpy()),
+        'real_values': real,
+        'predicted_values': predicted,
+        'upper_bound': predicted + width,
+        'lower_bound': predicted - width
+    }
+    data = {name: np.concatenate([previous[name], appended[name]]) for name in UPDATE_FIELDS}
+
+    metrics = compute_metrics(data['real_values'], data['predicted_values'],
+                              horizon=hyperparams.get('predictionLength', 24))
+    # 误差以外的指标沿用源结果
+    for key, value in (meta.get('metrics') or {}).items():
+        if key not in metrics:
+            metrics[key] = value
+    metrics.update({'dataPoints': len(df), 'updatedPoints': len(df) - start})
+
+    result = {'data': data, 'metrics': to_json_metrics(metrics)}
+    if meta.get('columns'):
+        result['columns'] = meta['columns']
+    return result
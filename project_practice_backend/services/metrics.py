@@ -0,0 +1,134 @@
+import numpy as np
+
+# 指标保留的小数位数
+PRECISION = 4
+
+
+def compute_metrics(real, predicted, insample=None, season=1, horizon=None):
+    """
+    计算预测误差指标（全部基于NumPy向量化计算）
+    real/predicted 为一维数组 (n,) 或多列数组 (n, k)，多列时按列计算并给出列平均
+    insample 为计算MASE缩放因子所用的历史序列，缺省时使用 real
+    horizon 指定预测步长时额外给出按预测步的误差分解
+    返回值仍为NumPy类型，由 to_json_metrics 在输出时统一转换
+    """
+    real = np.asarray(real, dtype=np.float64)
+    predicted = np.asarray(predicted, dtype=np.float64)
+    errors = real - predicted
+    abs_errors = np.abs(errors)
+    sq_errors = np.square(errors)
+
+    mse = np.nanmean(sq_errors, axis=0)
+    mae = np.nanmean(abs_errors, axis=0)
+    rmse = np.sqrt(mse)
+
+    # MAPE: 忽略真实值为0的点
+    abs_real = np.abs(real)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ape = np.where(abs_real > 0, abs_errors / abs_real, np.nan)
+        mape = np.nanmean(ape, axis=0) * 100
+
+        # sMAPE: 分母为 (|y| + |ŷ|) / 2
+        denom = (abs_real + np.abs(predicted)) / 2
+        sape = np.where(denom > 0, abs_errors / denom, np.nan)
+        smape = np.nanmean(sape, axis=0) * 100
+
+        # MASE: 以历史序列的季节性朴素预测误差作为缩放因子
+        history = real if insample is None else np.asarray(insample, dtype=np.float64)
+        if len(history) > season:
+            scale = np.nanmean(np.abs(history[season:] - history[:-season]), axis=0)
+            mase = mae / scale
+        else:
+            mase = np.full_like(mae, np.nan)
+
+    metrics = {
+        'mse': mse,
+        'mae': mae,
+        'rmse': rmse,
+        'mape': mape,
+        'smape': smape,
+        'mase': mase
+    }
+
+    if horizon:
+        metrics['per_horizon'] = per_horizon_errors(errors, horizon)
+
+    # 多列数据：保留按列指标，汇总指标取列平均
+    if errors.ndim == 2:
+        metrics['per_column'] = {name: metrics[name] for name in ('mse', 'mae', 'rmse', 'mape', 'smape', 'mase')}
+        for name in ('mse', 'mae', 'rmse', 'mape', 'smape', 'mase'):
+            metrics[name] = np.nanmean(metrics[name])
+
+    return metrics
+
+
+def per_horizon_errors(errors, horizon):
+    """
+    按预测步分解误差：第 i 个点属于第 i % horizon 步
+    返回每一步的 MAE 和 RMSE（多列数据先在列上取平均）
+    """
+    errors = np.asarray(errors, dtype=np.float64)
+    if errors.ndim == 2:
+        abs_errors = np.nanmean(np.abs(errors), axis=1)
+        sq_errors = np.nanmean(np.square(errors), axis=1)
+    else:
+        abs_errors = np.abs(errors)
+        sq_errors = np.square(errors)
+
+    steps = np.arange(len(errors)) % horizon
+    counts = np.bincount(steps, minlength=horizon)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mae = np.bincount(steps, weights=abs_errors, minlength=horizon) / counts
+        rmse = np.sqrt(np.bincount(steps, weights=sq_errors, minlength=horizon) / counts)
+    return {'mae': mae, 'rmse': rmse}
+
+
+def to_json_metrics(metrics, precision=PRECISION):
+    """
+    将指标中的NumPy类型转换为可JSON序列化的Python类型（NaN/Inf转换为None）
+    """
+    if isinstance(metrics, dict):
+        return {k: to_json_metrics(v, precision) for k, v in metrics.items()}
+    if isinstance(metrics, np.ndarray):
+        rounded = np.round(metrics.astype(np.float64), precision)
+        return [None if not np.isfinite(v) else v for v in rounded.tolist()]
+    if isinstance(metrics, (float, np.floating)):
+        value = float(metrics)
+        return round(value, precision) if np.isfinite(value) else None
+    if isinstance(metrics, np.integer):
+        return int(metrics)
+    return metrics
+
+
+if __name__ == '__main__':
+    # 基准测试: python -m services.metrics
+    import time
+
+    n = 10 ** 6
+    real_values = np.sin(np.linspace(0, 10, n))
+    predicted_values = np.sin(np.linspace(0.1, 10.1, n))
+
+    # 原实现：转换为列表后逐元素计算
+    start = time.perf_counter()
+    real_list = real_values.tolist()
+    predicted_list = predicted_values.tolist()
+    upper_bound = [v + 0.2 for v in predicted_list]
+    lower_bound = [v - 0.2 for v in predicted_list]
+    errors = [abs(r - p) for r, p in zip(real_list, predicted_list)]
+    mse = np.mean(np.square(errors))
+    mae = np.mean(errors)
+    rmse = np.sqrt(mse)
+    legacy_time = time.perf_counter() - start
+
+    # 向量化实现（包含更多指标和按预测步分解）
+    start = time.perf_counter()
+    upper = predicted_values + 0.2
+    lower = predicted_values - 0.2
+    metrics = compute_metrics(real_values, predicted_values, horizon=24)
+    vectorized_time = time.perf_counter() - start
+
+    print(f'数据点数: {n}')
+    print(f'原实现（MSE/MAE/RMSE）: {legacy_time:.3f}s')
+    print(f'向量化实现（全部指标）: {vectorized_time:.3f}s')
+    print(f'加速比: {legacy_time / vectorized_time:.1f}x')
+    assert abs(metrics['mse'] - mse) < 1e-9 and abs(metrics['mae'] - mae) < 1e-9
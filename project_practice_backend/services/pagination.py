@@ -0,0 +1,83 @@
+import json
+import base64
+import binascii
+from datetime import datetime
+
+from database.db import db
+
+# 近似总数最多统计的行数，超过时返回该上限并标记为不精确
+APPROX_COUNT_LIMIT = 10000
+
+
+def encode_cursor(item):
+    """
+    由一页最后一条记录的 (created_at, id) 生成不透明的游标字符串
+    """
+    payload = json.dumps([item.created_at.isoformat() if item.created_at else None, item.id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    解析游标字符串，返回 (created_at, id)，created_at 为空的记录返回 (None, id)，格式无效时抛出 ValueError
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if created_at is not None:
+            created_at = datetime.fromisoformat(created_at)
+        return created_at, int(item_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise ValueError('无效的分页游标')
+
+
+def paginate_keyset(query, model, per_page, cursor=None, descending=True):
+    """
+    按 (created_at, id) 的游标分页（keyset pagination）
+    从上一页最后一条记录之后继续读取，不使用 OFFSET，也不执行 COUNT(*)，翻到多深耗时都相同
+    返回 (本页记录, 下一页游标)，没有下一页时游标为 None
+    """
+    per_page = max(1, per_page)
+    if cursor:
+        created_at, item_id = decode_cursor(cursor)
+        query = query.filter(_after_cursor(model, created_at, item_id, descending))
+    # created_at 为空的记录（早期数据）无论升序降序都排在最后，MySQL 不支持 NULLS LAST，按是否为空排序
+    if descending:
+        query = query.order_by(model.created_at.is_(None), model.created_at.desc(), model.id.desc())
+    else:
+        query = query.order_by(model.created_at.is_(None), model.created_at, model.id)
+
+    # 多取一条判断是否还有下一页
+    items = query.limit(per_page + 1).all()
+    if len(items) <= per_page:
+        return items, None
+    items = items[:per_page]
+    return items, encode_cursor(items[-1])
+
+
+def _after_cursor(model, created_at, item_id, descending):
+    """
+    排在游标 (created_at, id) 之后的记录的过滤条件，与 paginate_keyset 的排序（空值在最后）一致
+    """
+    id_after = model.id < item_id if descending else model.id > item_id
+    if created_at is None:
+        return db.and_(model.created_at.is_(None), id_after)
+    created_after = model.created_at < created_at if descending else model.created_at > created_at
+    return db.or_(
+        created_after,
+        db.and_(model.created_at == created_at, id_after),
+        model.created_at.is_(None)
+    )
+
+
+def count_total(query, mode):
+    """
+    按需统计总数：mode 为 exact 时精确统计；approx 时最多统计 APPROX_COUNT_LIMIT 行；
+    其他值不统计，返回 (None, None)。返回 (总数, 是否精确)
+    """
+    if mode == 'exact':
+        return query.order_by(None).count(), True
+    if mode == 'approx':
+        total = query.order_by(None).limit(APPROX_COUNT_LIMIT + 1).count()
+        return min(total, APPROX_COUNT_LIMIT), total <= APPROX_COUNT_LIMIT
+    return None, None
@@ -0,0 +1,612 @@
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import Future, CancelledError, wait, FIRST_COMPLETED
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app
+
+from database.db import db
+from database.models import Task
+from services.executor import inference_executor
+from services.result_store import save_result, build_pyramid
+from services.result_cache import result_cache
+from services.sweep import build_trials, score_of, EarlyStopping, DEFAULT_METRIC
+from services.task_events import task_events
+
+# 创建日志记录器
+logger = logging.getLogger(__name__)
+
+# 扫参默认的并发试验数上限
+DEFAULT_SWEEP_CONCURRENCY = 4
+
+# 扫参默认的试验数上限
+DEFAULT_SWEEP_MAX_TRIALS = 200
+
+# 等待预测结果时检查取消请求和超时的间隔（秒）
+CANCEL_POLL_INTERVAL = 1.0
+
+# 任务默认的最大尝试次数（工作进程异常退出或服务重启后重新执行）
+DEFAULT_MAX_ATTEMPTS = 3
+
+# 进程内的取消请求（任务ID），由执行任务的工作线程轮询
+_cancel_requests = set()
+_cancel_lock = threading.Lock()
+
+# 租约已被回收的任务（任务ID），执行该任务的工作线程停止执行且不再写入任务状态
+_lost_leases = set()
+
+
+class TaskInterrupted(Exception):
+    """
+    任务被取消或执行超时，status 为任务的最终状态
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class LeaseLost(Exception):
+    """
+    任务的租约已被回收（由其他工作进程重新执行或已结束），本进程停止执行，不写入任务状态
+    """
+
+
+def run_task(task_id, worker_id=None):
+    """
+    执行预测任务（由后台工作线程调用）
+    任务状态流转: pending -> running -> completed/failed/cancelled
+    worker_id 不为空时任务已由任务队列认领（状态为running，worker_id为当前工作进程）；
+    否则在执行前认领，同一任务被重复入队时只有一个工作线程执行
+    """
+    if worker_id is None and not claim_task(task_id):
+        logger.info(f'任务 {task_id} 不在排队中或已被其他工作线程认领，跳过执行')
+        return
+    task = Task.query.get(task_id)
+    if not task:
+        logger.warning(f'任务不存在: {task_id}')
+        return
+    if task.status != 'running' or (worker_id and task.worker_id != worker_id):
+        logger.info(f'任务 {task_id} 状态为 {task.status}，跳过执行')
+        return
+
+    # 超参数扫描任务
+    if task.task_type == 'sweep':
+        run_sweep(task, worker_id)
+        return
+
+    # 相同输入已有缓存结果时直接完成
+    if complete_from_cache(task, worker_id):
+        return
+
+    start_running(task)
+    start_time = time.time()
+    future = submit_prediction(task, progress=shard_progress(task))
+    finish_task(task, future, start_time, worker_id)
+
+
+def claim_task(task_id, worker_id=None, lease_seconds=None):
+    """
+    用带 status='pending' 条件的 UPDATE 认领排队中的任务，返回是否认领成功
+    指定 worker_id 时同时写入认领的工作进程和租约到期时间
+    """
+    values = {'status': 'running'}
+    if worker_id:
+        now = datetime.utcnow()
+        values.update(worker_id=worker_id, heartbeat_at=now,
+                      lease_expires_at=now + timedelta(seconds=lease_seconds or 0))
+    claimed = Task.query.filter(Task.id == task_id, Task.status == 'pending').update(
+        values, synchronize_session=False)
+    db.session.commit()
+    return bool(claimed)
+
+
+def update_owned(task, worker_id, **values):
+    """
+    用带 status='running' 和 worker_id 条件的 UPDATE 更新本工作进程执行中的任务，返回是否更新
+    租约已被回收（任务由其他工作进程重新认领或已结束）时不写入，由调用方提交事务
+    """
+    query = Task.query.filter(Task.id == task.id, Task.status == 'running')
+    if worker_id:
+        query = query.filter(Task.worker_id == worker_id)
+    return bool(query.update(values, synchronize_session=False))
+
+
+def submit_prediction(task, progress=None):
+    """
+    交给对应模型类型的进程池执行预测，提交失败时返回带异常的Future
+    """
+    model_type = task.model.model_type if task.model else None
+    try:
+        return inference_executor.submit(model_type, task.data_path, task.hyperparams or {}, progress=progress)
+    except Exception as e:
+        future = Future()
+        future.set_exception(e)
+        return future
+
+
+def start_running(task, progress=None, worker_id=None):
+    """
+    将任务标记为执行中并累计尝试次数，worker_id 用于扫参试验记录执行它的工作进程
+    """
+    task.status = 'running'
+    task.attempts = (task.attempts or 0) + 1
+    if worker_id:
+        task.worker_id = worker_id
+    db.session.commit()
+    publish_status(task, progress=progress)
+
+
+def request_cancel(task_id):
+    """
+    请求取消正在执行的任务，执行该任务的工作线程在下次检查时终止预测
+    """
+    with _cancel_lock:
+        _cancel_requests.add(task_id)
+
+
+def is_cancel_requested(task_id):
+    with _cancel_lock:
+        return task_id in _cancel_requests
+
+
+def clear_cancel(task_id):
+    with _cancel_lock:
+        _cancel_requests.discard(task_id)
+        _lost_leases.discard(task_id)
+
+
+def mark_lease_lost(task_id):
+    """
+    任务的租约已被回收，执行该任务的工作线程在下次检查时停止执行（不同于取消，不写入任务状态）
+    """
+    with _cancel_lock:
+        _lost_leases.add(task_id)
+
+
+def is_lease_lost(task_id):
+    with _cancel_lock:
+        return task_id in _lost_leases
+
+
+def task_timeout(task):
+    """
+    任务的执行超时（秒）：任务指定的超时和模型类型的超时取较小值，都未设置时不限制
+    """
+    model_type = task.model.model_type if task.model else None
+    model_timeout = current_app.config.get('INFERENCE_MODEL_TIMEOUTS', {}).get(
+        model_type, current_app.config.get('INFERENCE_TIMEOUT'))
+    limits = [t for t in (task.timeout, model_timeout) if t]
+    return min(limits) if limits else None
+
+
+def check_interrupted(task, start_time, timeout):
+    """
+    任务已请求取消或超过执行时限时抛出 TaskInterrupted，租约已被回收时抛出 LeaseLost
+    """
+    if is_lease_lost(task.id):
+        raise LeaseLost(f'任务 {task.id} 的租约已被回收')
+    if is_cancel_requested(task.id):
+        raise TaskInterrupted('cancelled', '任务已取消')
+    if timeout and time.time() - start_time > timeout:
+        raise TaskInterrupted('failed', f'任务执行超时（超过 {timeout} 秒）')
+
+
+def wait_result(task, future, start_time):
+    """
+    等待预测结果，期间检查取消请求和执行超时，取消或超时时终止正在执行的预测
+    工作进程异常退出（进程崩溃）时重新提交一次；进程池因其他任务取消被终止时由执行引擎重新执行，不会在此失败
+    """
+    timeout = task_timeout(task)
+    retried = False
+    while True:
+        try:
+            return future.result(timeout=CANCEL_POLL_INTERVAL)
+        except FuturesTimeoutError:
+            pass
+        except (BrokenProcessPool, CancelledError):
+            if retried or is_cancel_requested(task.id) or is_lease_lost(task.id):
+                raise
+            retried = True
+            logger.warning(f'任务 {task.id} 的工作进程异常退出，重新提交')
+            future = submit_prediction(task, progress=shard_progress(task))
+            continue
+        try:
+            check_interrupted(task, start_time, timeout)
+        except (TaskInterrupted, LeaseLost):
+            inference_executor.cancel(future)
+            raise
+
+
+def finish_task(task, future, start_time, worker_id=None):
+    """
+    等待预测完成，保存结果并更新任务状态，成功时记录到预测结果缓存
+    任务被取消或超时时状态为 cancelled/failed；最终状态只在任务仍由本工作进程执行时写入
+    """
+    try:
+        result = wait_result(task, future, start_time)
+        if is_lease_lost(task.id):
+            raise LeaseLost(f'任务 {task.id} 的租约已被回收')
+
+        # 按列保存预测结果
+        result_path = save_result(task.id, result)
+        build_pyramid(result_path)
+
+        # 更新任务状态
+        finished = update_owned(task, worker_id,
+                                status='completed',
+                                completed_at=datetime.utcnow(),
+                                duration=time.time() - start_time,
+                                result_path=result_path,
+                                metrics=result['metrics'])
+        db.session.commit()
+        if not finished:
+            raise LeaseLost(f'任务 {task.id} 已不由本工作进程执行')
+        logger.info(f'任务执行完成: {task.id}')
+
+    except LeaseLost as e:
+        db.session.rollback()
+        logger.warning(f'{str(e)}，停止执行且不更新任务状态')
+        return
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f'任务 {task.id} 执行失败: {str(e)}')
+        finished = update_owned(task, worker_id,
+                                status=e.status if isinstance(e, TaskInterrupted) else 'failed',
+                                error_message=str(e) or type(e).__name__,
+                                completed_at=datetime.utcnow(),
+                                duration=time.time() - start_time)
+        db.session.commit()
+        if finished:
+            publish_status(task)
+        else:
+            logger.warning(f'任务 {task.id} 已不由本工作进程执行，不更新任务状态')
+        return
+    finally:
+        clear_cancel(task.id)
+
+    publish_status(task)
+
+    # 记录到预测结果缓存，失败不影响任务结果
+    try:
+        result_cache.store(task)
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f'任务 {task.id} 结果写入缓存失败: {str(e)}')
+
+
+def complete_from_cache(task, worker_id=None):
+    """
+    计算任务的结果缓存键，命中缓存时直接完成任务，返回是否命中
+    任务设置 use_cache=False 时跳过查找（结果仍会写入缓存）
+    已被工作进程认领的任务只在仍由该工作进程执行时写入，租约已被回收时同样返回 True（不再执行）
+    """
+    if task.task_type == 'sweep':
+        return False
+    if task.cache_key is None:
+        model_type = task.model.model_type if task.model else None
+        task.cache_key = result_cache.make_key(task.data_path, model_type, task.hyperparams)
+        db.session.commit()
+    if task.use_cache is False:
+        return False
+    entry = result_cache.lookup(task.cache_key)
+    if not entry:
+        return False
+    if task.status != 'running':
+        result_cache.apply(task, entry)
+    else:
+        finished = update_owned(task, worker_id, **result_cache.completion(entry))
+        db.session.commit()
+        if not finished:
+            logger.warning(f'任务 {task.id} 已不由本工作进程执行，不写入缓存结果')
+            return True
+        logger.info(f'任务 {task.id} 命中预测结果缓存')
+    publish_status(task)
+    return True
+
+
+def publish_status(task, progress=None, **extra):
+    """
+    发布任务状态事件（状态、进度百分比，完成时附带指标，失败时附带错误信息）
+    """
+    event = {
+        'type': 'status',
+        'task_id': task.id,
+        'user_id': task.user_id,
+        'parent_id': task.parent_id,
+        'batch_id': task.batch_id,
+        'task_type': task.task_type,
+        'status': task.status,
+        'progress': 100.0 if task.status == 'completed' else progress
+    }
+    if task.status == 'completed':
+        event['metrics'] = task.metrics
+        event['cache_hit'] = bool(task.cache_hit)
+    elif task.status in ('failed', 'cancelled'):
+        event['error_message'] = task.error_message
+    event.update(extra)
+    task_events.publish(event)
+
+
+def shard_progress(task):
+    """
+    分片执行（按列或按折）时每个分片完成后发布进度和该分片的部分结果
+    回调在执行引擎的线程中调用，只使用预先取出的字段，不访问数据库
+    """
+    task_id, user_id, parent_id, batch_id = task.id, task.user_id, task.parent_id, task.batch_id
+
+    def on_progress(done, total, result):
+        task_events.publish({
+            'type': 'progress',
+            'task_id': task_id,
+            'user_id': user_id,
+            'parent_id': parent_id,
+            'batch_id': batch_id,
+            'status': 'running',
+            'progress': round(100.0 * done / total, 1),
+            'partial': {
+                'columns': result.get('columns'),
+                'info': result.get('info'),
+                'metrics': result.get('metrics')
+            }
+        })
+    return on_progress
+
+
+def run_sweep(task, worker_id=None):
+    """
+    执行超参数扫描任务
+    每个试验是一个子任务，按有界并发提交到模型进程池；所有试验使用同一数据文件，
+    每个工作进程只在第一次使用时加载数据集（进程内数据集缓存）
+    连续若干试验没有改进最优分数时提前停止，剩余试验标记为cancelled
+    扫参任务被取消或超过任务的执行时限时，终止正在执行的试验，未完成的试验标记为cancelled；
+    单个试验超过模型的执行时限时该试验失败
+    试验记录执行它的工作进程，扫参任务的租约被回收后本进程不再写入扫参任务和试验的状态
+    """
+    spec = task.hyperparams or {}
+    start_running(task, progress=0.0)
+
+    start_time = time.time()
+    max_attempts = current_app.config.get('TASK_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+    children = []
+    running = {}
+    try:
+        children = Task.query.filter_by(parent_id=task.id).order_by(Task.id).all()
+        if not children:
+            children = create_sweep_trials(task)
+
+        metric = spec.get('metric', DEFAULT_METRIC)
+        early_stopping = spec.get('earlyStopping') or {}
+        stopper = EarlyStopping(
+            patience=early_stopping.get('patience'),
+            min_delta=early_stopping.get('minDelta', 0.0),
+            mode=spec.get('mode', 'min')
+        )
+        limit = current_app.config.get('SWEEP_MAX_CONCURRENCY', DEFAULT_SWEEP_CONCURRENCY)
+        max_concurrency = max(1, min(spec.get('maxConcurrency') or limit, limit))
+
+        # 服务重启后恢复执行的扫参：中断的试验重新执行，已完成的试验参与最优结果比较
+        best = None
+        for child in children:
+            if child.status == 'running':
+                child.status = 'pending'
+            elif child.status == 'completed' and stopper.update(score_of(child.metrics, metric)):
+                best = child
+        db.session.commit()
+        finished = len([c for c in children if c.status != 'pending'])
+
+        def report(child):
+            # 每个试验结束后发布扫参进度和当前最优结果
+            publish_status(task, progress=round(100.0 * finished / len(children), 1), type='progress', partial={
+                'trial_id': child.id,
+                'trial_status': child.status,
+                'trial_score': score_of(child.metrics, metric),
+                'best_score': stopper.best,
+                'best_task_id': best.id if best else None
+            })
+
+        stopped_early = False
+        pending = [c for c in children if c.status == 'pending']
+        while pending or running:
+            check_interrupted(task, start_time, task.timeout)
+
+            # 在并发上限内提交试验
+            while pending and len(running) < max_concurrency and not stopper.should_stop:
+                child = pending.pop(0)
+                if complete_from_cache(child):
+                    if stopper.update(score_of(child.metrics, metric)):
+                        best = child
+                    finished += 1
+                    report(child)
+                    continue
+                start_running(child, worker_id=worker_id)
+                running[submit_prediction(child)] = (child, time.time())
+
+            if stopper.should_stop and pending:
+                stopped_early = True
+                # 与扫参任务的条件更新在同一事务中，租约已被回收时不修改试验
+                if not update_owned(task, worker_id, heartbeat_at=datetime.utcnow()):
+                    raise LeaseLost(f'扫参任务 {task.id} 的租约已被回收')
+                Task.query.filter(Task.id.in_([c.id for c in pending]), Task.status == 'pending').update({
+                    'status': 'cancelled',
+                    'error_message': '扫参提前停止，试验未执行'
+                }, synchronize_session=False)
+                db.session.commit()
+                for child in pending:
+                    publish_status(child)
+                finished += len(pending)
+                pending = []
+
+            if not running:
+                continue
+            done, _ = wait(running, timeout=CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                child, child_start = running.pop(future)
+                # 工作进程异常退出，未达到最大尝试次数时重新执行
+                if (isinstance(future.exception(), (BrokenProcessPool, CancelledError))
+                        and child.attempts < max_attempts):
+                    if not update_owned(child, worker_id, status='pending'):
+                        raise LeaseLost(f'扫参任务 {task.id} 的试验已由其他工作进程执行')
+                    db.session.commit()
+                    pending.insert(0, child)
+                    continue
+                finish_task(child, future, child_start, worker_id)
+                if child.status == 'completed' and stopper.update(score_of(child.metrics, metric)):
+                    best = child
+                finished += 1
+                report(child)
+
+            # 单个试验超过执行时限
+            for future, (child, child_start) in list(running.items()):
+                timeout = task_timeout(child)
+                if timeout and time.time() - child_start > timeout:
+                    running.pop(future)
+                    inference_executor.cancel(future)
+                    timed_out = update_owned(child, worker_id,
+                                             status='failed',
+                                             error_message=f'任务执行超时（超过 {timeout} 秒）',
+                                             completed_at=datetime.utcnow(),
+                                             duration=time.time() - child_start)
+                    db.session.commit()
+                    if not timed_out:
+                        raise LeaseLost(f'扫参任务 {task.id} 的试验已由其他工作进程执行')
+                    publish_status(child)
+                    finished += 1
+                    report(child)
+
+        # 汇总扫参结果，父任务的结果指向最优试验
+        counts = {}
+        for child in children:
+            counts[child.status] = counts.get(child.status, 0) + 1
+        values = {
+            'metrics': {
+                'metric': metric,
+                'mode': stopper.mode,
+                'best_score': stopper.best,
+                'best_task_id': best.id if best else None,
+                'best_params': best.hyperparams if best else None,
+                'trials': len(children),
+                'status_counts': counts,
+                'stopped_early': stopped_early
+            },
+            'completed_at': datetime.utcnow(),
+            'duration': time.time() - start_time
+        }
+        if best:
+            values.update(status='completed', result_path=best.result_path)
+        else:
+            values.update(status='failed', error_message='没有成功完成的试验')
+        finished = update_owned(task, worker_id, **values)
+        db.session.commit()
+        if not finished:
+            raise LeaseLost(f'扫参任务 {task.id} 的租约已被回收')
+        publish_status(task)
+        logger.info(f'扫参任务完成: {task.id}，最优试验: {task.metrics["best_task_id"]}')
+
+    except LeaseLost as e:
+        db.session.rollback()
+        logger.warning(f'{str(e)}，停止执行且不更新任务状态')
+        for future in running:
+            inference_executor.cancel(future)
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f'扫参任务 {task.id} 执行失败: {str(e)}')
+        # 终止正在执行的试验，未完成的试验随扫参任务取消
+        for future in running:
+            inference_executor.cancel(future)
+        finished = update_owned(task, worker_id,
+                                status=e.status if isinstance(e, TaskInterrupted) else 'failed',
+                                error_message=str(e),
+                                completed_at=datetime.utcnow(),
+                                duration=time.time() - start_time)
+        if finished:
+            Task.query.filter(Task.parent_id == task.id, Task.status.in_(('pending', 'running'))).update({
+                'status': 'cancelled',
+                'error_message': str(e)
+            }, synchronize_session=False)
+        db.session.commit()
+        if finished:
+            publish_status(task)
+        else:
+            logger.warning(f'扫参任务 {task.id} 已不由本工作进程执行，不更新任务状态')
+    finally:
+        clear_cancel(task.id)
+
+
+def create_sweep_trials(task):
+    """
+    根据扫参配置批量创建子任务，返回按ID排序的子任务列表
+    """
+    spec = task.hyperparams or {}
+    max_trials = current_app.config.get('SWEEP_MAX_TRIALS', DEFAULT_SWEEP_MAX_TRIALS)
+    trials = build_trials(spec.get('search'), max_trials)
+    base_params = spec.get('hyperParams') or {}
+    created_at = datetime.utcnow()
+    rows = [{
+        'name': f'{task.name} #{i + 1}',
+        'user_id': task.user_id,
+        'dataset_id': task.dataset_id,
+        'model_id': task.model_id,
+        'parent_id': task.id,
+        'task_type': 'prediction',
+        'status': 'pending',
+        'hyperparams': {**base_params, **params},
+        'data_path': task.data_path,
+        'use_cache': task.use_cache,
+        'created_at': created_at
+    } for i, params in enumerate(trials)]
+    db.session.execute(db.insert(Task), rows)
+    db.session.commit()
+    return Task.query.filter_by(parent_id=task.id).order_by(Task.id).all()
+
+
+def recover_orphaned_tasks():
+    """
+    恢复服务重启前未执行完的任务（在启动后台任务队列时调用），返回需要重新入队的 (任务ID, 用户ID, 优先级)
+    内存中的任务队列随重启丢失：pending 任务重新入队（其他进程已入队的任务由认领保证只执行一次）；
+    只处理租约已过期或没有租约的 running 任务，其他进程仍在执行（持续续约）的任务不受影响，
+    已请求取消的标记为 cancelled，达到最大尝试次数的标记为 failed，其余重置为 pending 后重新入队
+    重启前仍在租约内的任务在租约过期后由心跳线程回收
+    扫参试验由所属的扫参任务重新执行，不单独入队
+    """
+    orphaned = Task.query.filter(
+        Task.status == 'running', Task.parent_id.is_(None),
+        db.or_(Task.lease_expires_at.is_(None), Task.lease_expires_at < datetime.utcnow())
+    ).all()
+    release_interrupted(orphaned, '服务重启')
+    if orphaned:
+        logger.warning(f'恢复服务重启前中断的任务: {len(orphaned)}个')
+
+    return [tuple(t) for t in Task.query.with_entities(Task.id, Task.user_id, Task.priority)
+            .filter(Task.status == 'pending', Task.parent_id.is_(None))
+            .order_by(Task.created_at, Task.id)]
+
+
+def release_interrupted(tasks, reason):
+    """
+    处理执行中断的任务（服务重启或工作进程租约过期）：已请求取消的标记为 cancelled，
+    达到最大尝试次数的标记为 failed，其余重置为 pending 等待重新执行
+    """
+    max_attempts = current_app.config.get('TASK_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+    now = datetime.utcnow()
+    for task in tasks:
+        task.worker_id = None
+        task.lease_expires_at = None
+        if task.cancel_requested:
+            task.status = 'cancelled'
+            task.error_message = '任务已取消'
+        elif (task.attempts or 0) >= max_attempts:
+            task.status = 'failed'
+            task.error_message = f'{reason}导致任务中断，已达到最大尝试次数 ({max_attempts})'
+        else:
+            task.status = 'pending'
+            continue
+        task.completed_at = now
+        # 不再恢复的扫参任务，其未完成的试验随之取消
+        for child in task.children.filter(Task.status.in_(('pending', 'running'))):
+            child.status = 'cancelled'
+            child.error_message = task.error_message
+    db.session.commit()
@@ -0,0 +1,208 @@
+import json
+import hashlib
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from database.db import db
+from database.models import Task, ResultCacheEntry
+from services.dataset_store import content_hash
+from services.forecasters import get_forecaster_version
+from services.result_store import result_exists, delete_result
+
+# 创建日志记录器
+logger = logging.getLogger(__name__)
+
+# 默认缓存有效期（秒）
+DEFAULT_TTL = 7 * 24 * 3600
+
+# 默认最多保留的缓存条目数
+DEFAULT_MAX_ENTRIES = 1000
+
+# 不影响预测结果、不参与缓存键计算的超参数
+IGNORED_HYPERPARAMS = ('useCache',)
+
+
+class ResultCache:
+    """
+    预测结果缓存
+    键为 (数据集内容哈希, 模型类型, 模型版本, 规范化后的超参数) 的SHA-256，
+    命中时新任务直接引用已有的结果目录，不再重新计算
+    结果目录可能被多个任务和缓存条目共享，只有不再被引用时才删除
+    """
+
+    def __init__(self, enabled=True, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def init_app(self, app):
+        """
+        从应用配置读取缓存开关、有效期和条目上限
+        """
+        self.enabled = app.config.get('RESULT_CACHE_ENABLED', True)
+        self.ttl = app.config.get('RESULT_CACHE_TTL', DEFAULT_TTL)
+        self.max_entries = app.config.get('RESULT_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
+        app.extensions['result_cache'] = self
+
+    def make_key(self, data_path, model_type, hyperparams):
+        """
+        计算缓存键，数据文件无法读取时返回None
+        """
+        try:
+            data_hash = content_hash(data_path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f'计算数据集内容哈希失败: {data_path} ({str(e)})')
+            return None
+        params = {k: v for k, v in (hyperparams or {}).items() if k not in IGNORED_HYPERPARAMS}
+        payload = json.dumps({
+            'data': data_hash,
+            'model_type': model_type,
+            'model_version': get_forecaster_version(model_type),
+            'hyperparams': params
+        }, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def lookup(self, cache_key):
+        """
+        查找有效的缓存条目，过期或结果文件已丢失的条目被删除
+        """
+        if not self.enabled or not cache_key:
+            return None
+        entry = ResultCacheEntry.query.filter_by(cache_key=cache_key).first()
+        if not entry:
+            return None
+        if self._expired(entry) or not result_exists(entry.result_path):
+            self._remove(entry)
+            db.session.commit()
+            return None
+        return entry
+
+    def apply(self, task, entry):
+        """
+        用缓存条目直接完成任务
+        """
+        for key, value in self.completion(entry).items():
+            setattr(task, key, value)
+        db.session.commit()
+        logger.info(f'任务 {task.id} 命中预测结果缓存')
+
+    def completion(self, entry):
+        """
+        用缓存条目完成任务时写入任务的字段，同时记录一次命中（随调用方的事务提交）
+        """
+        now = datetime.utcnow()
+        entry.hit_count = (entry.hit_count or 0) + 1
+        entry.last_used_at = now
+        return {
+            'status': 'completed',
+            'result_path': entry.result_path,
+            'metrics': entry.metrics,
+            'completed_at': now,
+            'duration': 0.0,
+            'cache_hit': True
+        }
+
+    def store(self, task):
+        """
+        记录已完成任务的结果（同一缓存键已存在时替换为最新结果）
+        """
+        if not self.enabled or not task.cache_key or not task.result_path:
+            return
+        try:
+            entry = ResultCacheEntry.query.filter_by(cache_key=task.cache_key).first()
+            now = datetime.utcnow()
+            if entry:
+                old_path = entry.result_path
+                entry.result_path = task.result_path
+                entry.metrics = task.metrics
+                entry.source_task_id = task.id
+                entry.hit_count = 0
+                entry.created_at = now
+                entry.last_used_at = now
+                db.session.flush()
+                if old_path != task.result_path:
+                    self._release(old_path)
+            else:
+                db.session.add(ResultCacheEntry(
+                    cache_key=task.cache_key,
+                    model_type=task.model.model_type if task.model else None,
+                    result_path=task.result_path,
+                    metrics=task.metrics,
+                    source_task_id=task.id,
+                    hit_count=0,
+                    created_at=now,
+                    last_used_at=now
+                ))
+            db.session.commit()
+        except IntegrityError:
+            # 相同输入的任务同时完成，另一个任务已写入缓存
+            db.session.rollback()
+            return
+        self.evict()
+
+    def evict(self):
+        """
+        删除过期条目，并在条目数超过上限时按最近使用时间淘汰
+        """
+        expired = ResultCacheEntry.query.filter(
+            ResultCacheEntry.created_at < datetime.utcnow() - timedelta(seconds=self.ttl)
+        ).all()
+        for entry in expired:
+            self._remove(entry)
+
+        overflow = ResultCacheEntry.query.count() - self.max_entries
+        if overflow > 0:
+            for entry in ResultCacheEntry.query.order_by(ResultCacheEntry.last_used_at).limit(overflow).all():
+                self._remove(entry)
+        db.session.commit()
+
+    def is_referenced(self, result_path, exclude_task_id=None):
+        """
+        结果目录是否仍被任务或缓存条目引用
+        """
+        query = Task.query.filter(Task.result_path == result_path)
+        if exclude_task_id is not None:
+            query = query.filter(Task.id != exclude_task_id)
+        if query.first():
+            return True
+        return ResultCacheEntry.query.filter_by(result_path=result_path).first() is not None
+
+    def stats(self):
+        """
+        缓存统计信息
+        """
+        total_hits = db.session.query(db.func.sum(ResultCacheEntry.hit_count)).scalar()
+        return {
+            'enabled': self.enabled,
+            'entries': ResultCacheEntry.query.count(),
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            'hits': int(total_hits or 0)
+        }
+
+    def _expired(self, entry):
+        return entry.created_at is not None and entry.created_at < datetime.utcnow() - timedelta(seconds=self.ttl)
+
+    def _remove(self, entry):
+        result_path = entry.result_path
+        db.session.delete(entry)
+        db.session.flush()
+        self._release(result_path)
+
+    def _release(self, result_path):
+        # 结果目录不再被引用时删除
+        if result_path and not self.is_referenced(result_path):
+            delete_result(result_path)
+
+
+# 全局预测结果缓存实例
+result_cache = ResultCache()
+
+
+def init_result_cache(app):
+    """
+    初始化预测结果缓存
+    """
+    result_cache.init_app(app)
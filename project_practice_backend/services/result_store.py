@@ -0,0 +1,326 @@
+import os
+import json
+import shutil
+import logging
+import numpy as np
+
+from services.downsample import downsample_indices
+
+# 创建日志记录器
+logger = logging.getLogger(__name__)
+
+# 预测结果保存目录
+RESULT_DIR = 'results'
+
+# 结果元数据文件名
+META_FILE = 'meta.json'
+
+# 结果存储格式版本
+FORMAT_VERSION = 1
+
+# 保存结果时预先计算的降采样金字塔层级（点数）
+PYRAMID_LEVELS = (256, 1024, 4096)
+
+# 降采样金字塔最小层级
+MIN_PYRAMID_LEVEL = 16
+
+
+def save_result(task_id, result):
+    """
+    将预测结果按列保存为二进制数组
+    目录结构: results/task_<id>/meta.json + 每个字段一个 .npy 文件
+    返回结果目录路径
+    """
+    result_dir = os.path.join(RESULT_DIR, f'task_{task_id}')
+    os.makedirs(result_dir, exist_ok=True)
+
+    fields = {}
+    length = 0
+    for name, values in result['data'].items():
+        array = to_stored_array(values)
+        np.save(os.path.join(result_dir, f'{name}.npy'), array)
+        fields[name] = {'dtype': array.dtype.str, 'shape': list(array.shape)}
+        length = max(length, len(array))
+
+    timestamps = result['data'].get('timestamps')
+    meta = {
+        'version': FORMAT_VERSION,
+        'length': length,
+        'fields': fields,
+        'sorted_timestamps': _is_sorted(timestamps) if timestamps is not None else False,
+        'columns': result.get('columns'),
+        'metrics': result.get('metrics')
+    }
+    with open(os.path.join(result_dir, META_FILE), 'w') as f:
+        json.dump(meta, f)
+
+    return result_dir
+
+
+def to_stored_array(values):
+    """
+    转换为结果文件中保存的数组类型：整数转为float64，时间和对象转为字符串
+    """
+    array = np.asarray(values)
+    if array.dtype.kind in 'iub':
+        array = array.astype(np.float64)
+    elif array.dtype.kind == 'M':
+        array = np.datetime_as_string(array, unit='s')
+    elif array.dtype.kind == 'O':
+        array = array.astype(str)
+    return array
+
+
+def read_meta(result_path):
+    """
+    读取结果元数据（不加载数组）
+    """
+    with open(os.path.join(result_path, META_FILE), 'r') as f:
+        return json.load(f)
+
+
+def result_exists(result_path):
+    """
+    判断结果是否存在（兼容旧版JSON结果文件）
+    """
+    if not result_path:
+        return False
+    if _is_legacy(result_path):
+        return os.path.exists(result_path)
+    return os.path.exists(os.path.join(result_path, META_FILE))
+
+
+def open_series(result_path, name):
+    """
+    以内存映射方式打开单个结果字段，只有被切片访问的部分才会被读入内存
+    """
+    return np.load(os.path.join(result_path, f'{name}.npy'), mmap_mode='r')
+
+
+def load_result(result_path, start=None, end=None, fields=None, columns=None):
+    """
+    读取预测结果，可只读取 [start, end) 区间和指定字段
+    多列结果的二维字段可通过 columns 只读取指定列
+    返回与旧版JSON结果相同的结构: {'data': {...}, 'metrics': {...}}
+    """
+    if _is_legacy(result_path):
+        return _load_legacy(result_path, start, end, fields)
+
+    meta = read_meta(result_path)
+    names = [n for n in meta['fields'] if fields is None or n in fields]
+    column_index = _column_index(meta, columns)
+    data = {}
+    for name in names:
+        data[name] = _take_columns(open_series(result_path, name)[start:end], column_index).tolist()
+    return _with_columns({'data': data, 'metrics': meta.get('metrics')}, meta, columns)
+
+
+def load_downsampled(result_path, max_points, start=None, end=None, fields=None, method='lttb', columns=None):
+    """
+    读取降采样后的预测结果，返回 (result, total_points)
+    读取完整结果时使用按任务缓存的金字塔层级（不超过 max_points 的最大2的幂），
+    读取区间时只对区间内的数据即时降采样
+    """
+    if _is_legacy(result_path):
+        result = _load_legacy(result_path, start, end, None)
+        base = _base_series(result['data'])
+        total = len(base) if base is not None else 0
+        if base is None or total <= max_points:
+            return _select_fields(result, fields), total
+        indices = downsample_indices(base, max_points, method)
+        return _take(result, indices, fields), total
+
+    meta = read_meta(result_path)
+    total = len(range(meta['length'])[start:end])
+    if total <= max_points:
+        return load_result(result_path, start, end, fields, columns), total
+
+    if start is None and end is None and max_points >= MIN_PYRAMID_LEVEL:
+        indices = get_pyramid_level(result_path, max_points, method)
+    else:
+        base_name = _base_field(meta)
+        indices = downsample_indices(open_series(result_path, base_name)[start:end], max_points, method)
+        indices = indices + (range(meta['length'])[start:end].start)
+
+    names = [n for n in meta['fields'] if fields is None or n in fields]
+    column_index = _column_index(meta, columns)
+    data = {name: _take_columns(open_series(result_path, name)[indices], column_index).tolist() for name in names}
+    return _with_columns({'data': data, 'metrics': meta.get('metrics')}, meta, columns), total
+
+
+def get_pyramid_level(result_path, max_points, method='lttb'):
+    """
+    获取降采样金字塔层级的下标，不存在时计算并缓存到结果目录
+    """
+    level = _pyramid_level(max_points)
+    cache_file = os.path.join(result_path, f'{method}_{level}.npy')
+    if os.path.exists(cache_file):
+        return np.load(cache_file)
+
+    meta = read_meta(result_path)
+    indices = downsample_indices(open_series(result_path, _base_field(meta)), level, method)
+    # 先写临时文件再替换，避免并发请求读到不完整的缓存
+    tmp_file = f'{cache_file}.{os.getpid()}.tmp'
+    with open(tmp_file, 'wb') as f:
+        np.save(f, indices)
+    os.replace(tmp_file, cache_file)
+    return indices
+
+
+def build_pyramid(result_path, method='lttb'):
+    """
+    预先计算常用的降采样金字塔层级
+    """
+    length = read_meta(result_path)['length']
+    for level in PYRAMID_LEVELS:
+        if level < length:
+            get_pyramid_level(result_path, level, method)
+
+
+def time_range_to_index(result_path, start_time=None, end_time=None):
+    """
+    将时间范围 [start_time, end_time] 转换为下标区间 [start, end)
+    时间戳有序时使用二分查找，只访问内存映射中的少量页面
+    """
+    if _is_legacy(result_path):
+        with open(result_path, 'r') as f:
+            timestamps = np.asarray(json.load(f)['data']['timestamps'])
+        sorted_timestamps = _is_sorted(timestamps)
+    else:
+        timestamps = open_series(result_path, 'timestamps')
+        sorted_timestamps = read_meta(result_path).get('sorted_timestamps', False)
+
+    start_key = _coerce_time(timestamps, start_time)
+    end_key = _coerce_time(timestamps, end_time)
+
+    if sorted_timestamps:
+        start = 0 if start_key is None else int(np.searchsorted(timestamps, start_key, side='left'))
+        end = len(timestamps) if end_key is None else int(np.searchsorted(timestamps, end_key, side='right'))
+        return start, max(start, end)
+
+    # 时间戳无序时退化为全量扫描，返回覆盖所有匹配点的最小区间
+    mask = np.ones(len(timestamps), dtype=bool)
+    if start_key is not None:
+        mask &= timestamps >= start_key
+    if end_key is not None:
+        mask &= timestamps <= end_key
+    matched = np.flatnonzero(mask)
+    if len(matched) == 0:
+        return 0, 0
+    return int(matched[0]), int(matched[-1]) + 1
+
+
+def delete_result(result_path):
+    """
+    删除预测结果文件或目录
+    """
+    if not result_path or not os.path.exists(result_path):
+        return
+    if os.path.isdir(result_path):
+        shutil.rmtree(result_path)
+    else:
+        os.remove(result_path)
+
+
+def _is_legacy(result_path):
+    return result_path.endswith('.json')
+
+
+def _load_legacy(result_path, start, end, fields):
+    with open(result_path, 'r') as f:
+        result = json.load(f)
+    data = {}
+    for name, values in result.get('data', {}).items():
+        if fields is None or name in fields:
+            data[name] = values[start:end]
+    return {'data': data, 'metrics': result.get('metrics')}
+
+
+def _column_index(meta, columns):
+    """
+    将列名转换为二维字段的列下标，未指定或结果不是多列时返回None
+    """
+    if not columns or not meta.get('columns'):
+        return None
+    names = meta['columns']
+    missing = [c for c in columns if c not in names]
+    if missing:
+        raise ValueError(f'结果中不存在列: {missing}')
+    return [names.index(c) for c in columns]
+
+
+def _take_columns(values, column_index):
+    if column_index is None or values.ndim != 2:
+        return values
+    return values[:, column_index]
+
+
+def _with_columns(result, meta, columns):
+    if meta.get('columns'):
+        result['columns'] = list(columns) if columns else meta['columns']
+    return result
+
+
+def _pyramid_level(max_points):
+    """
+    不超过 max_points 的最大2的幂
+    """
+    level = MIN_PYRAMID_LEVEL
+    while level * 2 <= max_points:
+        level *= 2
+    return level
+
+
+def _base_field(meta):
+    """
+    选择用于计算降采样下标的基准序列
+    """
+    for name in ('real_values', 'predicted_values'):
+        if name in meta['fields']:
+            return name
+    for name, info in meta['fields'].items():
+        if np.dtype(info['dtype']).kind == 'f':
+            return name
+    return next(iter(meta['fields']))
+
+
+def _base_series(data):
+    for name in ('real_values', 'predicted_values'):
+        if name in data:
+            return data[name]
+    return None
+
+
+def _select_fields(result, fields):
+    if fields is None:
+        return result
+    return {'data': {k: v for k, v in result['data'].items() if k in fields}, 'metrics': result.get('metrics')}
+
+
+def _take(result, indices, fields):
+    data = {}
+    for name, values in result['data'].items():
+        if fields is None or name in fields:
+            data[name] = np.asarray(values)[indices].tolist()
+    return {'data': data, 'metrics': result.get('metrics')}
+
+
+def _is_sorted(values):
+    array = np.asarray(values)
+    if len(array) < 2:
+        return True
+    try:
+        return bool(np.all(array[1:] >= array[:-1]))
+    except TypeError:
+        return False
+
+
+def _coerce_time(timestamps, value):
+    """
+    将查询参数转换为与时间戳数组可比较的类型
+    """
+    if value is None or value == '':
+        return None
+    if timestamps.dtype.kind in 'iuf':
+        return float(value)
+    return str(value)
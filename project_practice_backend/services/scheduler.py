@@ -0,0 +1,168 @@
+import time
+import threading
+from collections import OrderedDict, deque
+
+# 优先级类别：交互式（单个预测、重新运行）和批量（批量预测、扫参、批量重新运行）
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_BATCH = 'batch'
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BATCH)
+
+# 各优先级类别默认的调度权重（两类都有积压时按权重比例分配工作线程）
+DEFAULT_WEIGHTS = {PRIORITY_INTERACTIVE: 4, PRIORITY_BATCH: 1}
+
+# 每个用户默认同时执行的任务数上限（None表示不限制）
+DEFAULT_USER_MAX_RUNNING = 2
+
+# 用于统计等待时间分位数的最近任务数
+WAIT_SAMPLES = 1000
+
+
+class FairScheduler:
+    """
+    带优先级和按用户公平分享的任务调度
+    优先级类别之间按权重做加权公平调度（stride scheduling）：每次从虚拟时间最小的非空类别出队，
+    出队后该类别的虚拟时间增加 1/权重，批量任务积压时交互式任务仍能按权重比例得到执行；
+    同一类别内各用户轮流出队，已达到并发上限的用户暂时跳过，一个用户的大量任务不会占满所有工作线程
+    """
+
+    # 队列只在内存中，服务重启后需要重新入队
+    persistent = False
+
+    def __init__(self, weights=None, user_max_running=DEFAULT_USER_MAX_RUNNING):
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
+        self.user_max_running = user_max_running
+        self._queues = {priority: OrderedDict() for priority in PRIORITIES}
+        self._pass = {priority: 0.0 for priority in PRIORITIES}
+        self._running = {}
+        self._closed = 0
+        self._waits = {priority: deque(maxlen=WAIT_SAMPLES) for priority in PRIORITIES}
+        self._dispatched = {priority: 0 for priority in PRIORITIES}
+        self._condition = threading.Condition()
+
+    def put(self, item, user_id=None, priority=PRIORITY_INTERACTIVE):
+        """
+        加入队列，未知的优先级按交互式处理
+        """
+        priority = priority if priority in PRIORITIES else PRIORITY_INTERACTIVE
+        with self._condition:
+            queues = self._queues[priority]
+            if not any(queues.values()):
+                # 空闲后重新有任务的类别不累积之前的份额
+                self._pass[priority] = max(self._pass[priority], self._min_pass())
+            queues.setdefault(user_id, deque()).append((item, time.time()))
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        """
+        取出下一个可执行的任务，返回 (任务, 用户ID)；没有可执行的任务时阻塞
+        close() 之后返回 None，超时返回 None
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._condition:
+            while True:
+                if self._closed:
+                    self._closed -= 1
+                    return None
+                entry = self._pop()
+                if entry is not None:
+                    return entry
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+
+    def done(self, item, user_id):
+        """
+        任务执行结束，释放该用户的并发名额
+        """
+        with self._condition:
+            count = self._running.get(user_id, 0) - 1
+            if count > 0:
+                self._running[user_id] = count
+            else:
+                self._running.pop(user_id, None)
+            self._condition.notify_all()
+
+    def close(self, count=1):
+        """
+        让 count 个等待中的 get() 返回 None（用于停止工作线程）
+        """
+        with self._condition:
+            self._closed += count
+            self._condition.notify_all()
+
+    def qsize(self):
+        with self._condition:
+            return sum(len(q) for queues in self._queues.values() for q in queues.values())
+
+    def stats(self):
+        """
+        队列深度、各用户排队/执行中的任务数和等待时间统计
+        """
+        with self._condition:
+            users = {}
+            queued = {}
+            for priority, queues in self._queues.items():
+                queued[priority] = sum(len(q) for q in queues.values())
+                for user_id, q in queues.items():
+                    if q:
+                        users.setdefault(user_id, {'queued': 0, 'running': 0})['queued'] += len(q)
+            for user_id, count in self._running.items():
+                users.setdefault(user_id, {'queued': 0, 'running': 0})['running'] = count
+            now = time.time()
+            oldest = {priority: max((now - q[0][1] for q in queues.values() if q), default=0.0)
+                      for priority, queues in self._queues.items()}
+            waits = {priority: summarize_waits(list(samples)) for priority, samples in self._waits.items()}
+            return {
+                'queued': dict(queued, total=sum(queued.values())),
+                'running': sum(self._running.values()),
+                'dispatched': dict(self._dispatched),
+                'oldest_wait_seconds': oldest,
+                'wait_seconds': waits,
+                'users': users,
+                'weights': dict(self.weights),
+                'user_max_running': self.user_max_running
+            }
+
+    def _pop(self):
+        # 按虚拟时间从小到大尝试各类别，跳过没有可执行任务的类别
+        for priority in sorted(PRIORITIES, key=lambda p: self._pass[p]):
+            queues = self._queues[priority]
+            for user_id in list(queues):
+                q = queues[user_id]
+                if not q:
+                    del queues[user_id]
+                    continue
+                if self.user_max_running and self._running.get(user_id, 0) >= self.user_max_running:
+                    continue
+                item, enqueued_at = q.popleft()
+                # 出队的用户移到队尾，同一类别内各用户轮流执行
+                queues.move_to_end(user_id)
+                if not q:
+                    del queues[user_id]
+                self._running[user_id] = self._running.get(user_id, 0) + 1
+                self._pass[priority] += 1.0 / max(self.weights.get(priority, 1), 1e-6)
+                self._waits[priority].append(time.time() - enqueued_at)
+                self._dispatched[priority] += 1
+                return item, user_id
+        return None
+
+    def _min_pass(self):
+        active = [self._pass[p] for p in PRIORITIES if any(self._queues[p].values())]
+        return min(active) if active else max(self._pass.values())
+
+
+def summarize_waits(samples):
+    """
+    等待时间统计: 样本数、平均值、中位数、P95、最大值（秒）
+    """
+    if not samples:
+        return {'count': 0, 'mean': None, 'p50': None, 'p95': None, 'max': None}
+    samples.sort()
+    return {
+        'count': len(samples),
+        'mean': round(sum(samples) / len(samples), 3),
+        'p50': round(samples[len(samples) // 2], 3),
+        'p95': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        'max': round(samples[-1], 3)
+    }
@@ -0,0 +1,132 @@
+import math
+import random
+import itertools
+
+# 支持的搜索方式
+SEARCH_TYPES = ('grid', 'random')
+
+# 默认优化的指标
+DEFAULT_METRIC = 'mse'
+
+
+def build_trials(search, max_trials):
+    """
+    根据搜索配置生成试验的超参数组合列表
+    grid:   {'type': 'grid', 'params': {'predictionLength': [12, 24, 48], ...}}
+    random: {'type': 'random', 'trials': 20, 'seed': 0, 'params': {
+                'predictionLength': [12, 24, 48],               # 从列表中随机选择
+                'learningRate': {'min': 1e-4, 'max': 1e-1, 'log': True},
+                'layers': {'min': 1, 'max': 4, 'type': 'int'}
+            }}
+    配置无效时抛出 ValueError
+    """
+    if not isinstance(search, dict):
+        raise ValueError('缺少搜索配置')
+    search_type = search.get('type', 'grid')
+    if search_type not in SEARCH_TYPES:
+        raise ValueError(f'不支持的搜索方式: {search_type}')
+    params = search.get('params')
+    if not isinstance(params, dict) or not params:
+        raise ValueError('搜索参数不能为空')
+
+    if search_type == 'grid':
+        trials = grid_trials(params)
+    else:
+        trials = random_trials(params, search.get('trials', 10), search.get('seed'))
+
+    if len(trials) > max_trials:
+        raise ValueError(f'试验数 {len(trials)} 超过上限 {max_trials}')
+    return trials
+
+
+def grid_trials(params):
+    """
+    网格搜索：所有参数取值的笛卡尔积
+    """
+    names = list(params)
+    for name in names:
+        if not isinstance(params[name], list) or not params[name]:
+            raise ValueError(f'网格搜索参数 {name} 必须是非空列表')
+    return [dict(zip(names, values)) for values in itertools.product(*(params[n] for n in names))]
+
+
+def random_trials(params, n, seed=None):
+    """
+    随机搜索：每个试验独立采样，列表参数随机选择，区间参数均匀（或对数均匀）采样
+    """
+    if not isinstance(n, int) or n <= 0:
+        raise ValueError('随机搜索的试验数必须是正整数')
+    rng = random.Random(seed)
+    trials = []
+    for _ in range(n):
+        trials.append({name: _sample(name, space, rng) for name, space in params.items()})
+    return trials
+
+
+def score_of(metrics, metric):
+    """
+    从任务指标中取出用于比较的分数，缺失或无效时返回None
+    """
+    value = (metrics or {}).get(metric)
+    if isinstance(value, (int, float)) and math.isfinite(value):
+        return float(value)
+    return None
+
+
+class EarlyStopping:
+    """
+    扫参提前停止
+    连续 patience 个试验没有使最优分数改进超过 min_delta 时停止提交剩余试验
+    """
+
+    def __init__(self, patience=None, min_delta=0.0, mode='min'):
+        self.patience = patience
+        self.min_delta = min_delta
+        self.mode = mode
+        self.best = None
+        self.stale = 0
+
+    def update(self, score):
+        """
+        记录一个试验的分数，返回该试验是否为当前最优
+        """
+        if score is None:
+            self.stale += 1
+            return False
+        if self.best is None or self._improves(score):
+            self.best = score
+            self.stale = 0
+            return True
+        self.stale += 1
+        return False
+
+    @property
+    def should_stop(self):
+        return bool(self.patience) and self.stale >= self.patience
+
+    def _improves(self, score):
+        if self.mode == 'max':
+            return score > self.best + self.min_delta
+        return score < self.best - self.min_delta
+
+
+def _sample(name, space, rng):
+    if isinstance(space, list):
+        if not space:
+            raise ValueError(f'随机搜索参数 {name} 的取值列表不能为空')
+        return rng.choice(space)
+    if isinstance(space, dict) and 'choices' in space:
+        return _sample(name, space['choices'], rng)
+    if isinstance(space, dict) and 'min' in space and 'max' in space:
+        low, high = space['min'], space['max']
+        if low > high:
+            raise ValueError(f'随机搜索参数 {name} 的区间无效')
+        if space.get('type') == 'int':
+            return rng.randint(int(low), int(high))
+        if space.get('log'):
+            if low <= 0:
+                raise ValueError(f'随机搜索参数 {name} 使用对数采样时区间必须为正')
+            return math.exp(rng.uniform(math.log(low), math.log(high)))
+        return rng.uniform(low, high)
+    # 固定值
+    return space
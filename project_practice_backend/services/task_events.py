@@ -0,0 +1,166 @@
+import json
+import queue
+import threading
+from datetime import datetime
+
+# 每个订阅者最多缓存的未发送事件数，超出时丢弃最旧的事件
+DEFAULT_QUEUE_SIZE = 100
+
+# 没有事件时发送心跳注释的间隔（秒），避免代理断开空闲连接
+DEFAULT_HEARTBEAT = 15
+
+# 任务的终止状态，单任务事件流在任务进入终止状态后结束
+TERMINAL_STATUSES = ('completed', 'failed', 'cancelled')
+
+
+class Subscription:
+    """
+    事件订阅：按任务订阅时接收该任务及其子任务（扫参试验）的事件，否则接收指定用户的所有任务事件
+    """
+
+    def __init__(self, task_id=None, user_id=None, queue_size=DEFAULT_QUEUE_SIZE):
+        self.task_id = task_id
+        self.user_id = user_id
+        self._queue = queue.Queue(queue_size)
+
+    def matches(self, event):
+        if self.task_id is not None:
+            return self.task_id in (event.get('task_id'), event.get('parent_id'))
+        return self.user_id is None or event.get('user_id') == self.user_id
+
+    def put(self, event):
+        """
+        放入事件，不阻塞发布方：队列已满时丢弃最旧的事件
+        """
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout):
+        """
+        等待下一个事件，超时返回None
+        """
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def is_finished(self, event):
+        """
+        单任务订阅的任务是否已进入终止状态
+        """
+        return (self.task_id is not None and event.get('task_id') == self.task_id
+                and event.get('status') in TERMINAL_STATUSES)
+
+
+class TaskEventBus:
+    """
+    任务事件的进程内发布/订阅
+    后台工作线程在任务状态变化和进度更新时发布事件，SSE连接按任务或按用户订阅，
+    前端不再需要轮询任务详情接口；发布不访问数据库，也不会因为消费慢的连接而阻塞
+    事件只在执行任务的进程内发布；任务在其他进程（独立工作进程、其他Web进程）执行时，
+    单任务事件流在每次心跳时从数据库读取任务状态，状态变化时推送，任务结束后关闭
+    """
+
+    def __init__(self, queue_size=DEFAULT_QUEUE_SIZE, heartbeat=DEFAULT_HEARTBEAT):
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """
+        从应用配置读取订阅队列长度和心跳间隔
+        """
+        self.queue_size = app.config.get('TASK_EVENTS_QUEUE_SIZE', DEFAULT_QUEUE_SIZE)
+        self.heartbeat = app.config.get('TASK_EVENTS_HEARTBEAT', DEFAULT_HEARTBEAT)
+        app.extensions['task_events'] = self
+
+    def subscribe(self, task_id=None, user_id=None):
+        subscription = Subscription(task_id, user_id, self.queue_size)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event):
+        """
+        发布事件到所有匹配的订阅者
+        """
+        event = dict(event, timestamp=datetime.utcnow().isoformat())
+        with self._lock:
+            subscriptions = [s for s in self._subscriptions if s.matches(event)]
+        for subscription in subscriptions:
+            subscription.put(event)
+
+    def stream(self, subscription, initial=None, poll=None):
+        """
+        生成SSE格式的事件流：先发送初始事件（如任务当前状态），之后推送新事件，空闲时发送心跳
+        poll 返回订阅任务当前的状态事件（从数据库读取），空闲时调用，状态与已发送的不同时推送
+        单任务订阅在任务结束后关闭，连接断开时取消订阅
+        """
+        status = None
+        try:
+            for event in list(initial or []):
+                status = _task_status(subscription, event, status)
+                yield format_event(event)
+                if subscription.is_finished(event):
+                    return
+            while True:
+                event = subscription.get(self.heartbeat)
+                if event is None and poll is not None:
+                    event = poll()
+                    if event is not None and event.get('status') == status:
+                        event = None
+                    elif event is not None:
+                        event = dict(event, timestamp=datetime.utcnow().isoformat())
+                if event is None:
+                    yield ': keep-alive\n\n'
+                    continue
+                status = _task_status(subscription, event, status)
+                yield format_event(event)
+                if subscription.is_finished(event):
+                    return
+        finally:
+            self.unsubscribe(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscriptions)
+
+
+def _task_status(subscription, event, status):
+    """
+    单任务订阅已发送的该任务的最新状态
+    """
+    if event.get('type') == 'status' and event.get('task_id') == subscription.task_id:
+        return event.get('status')
+    return status
+
+
+def format_event(event):
+    """
+    按SSE协议格式化事件
+    """
+    data = json.dumps(event, ensure_ascii=False, default=str)
+    return f"event: {event.get('type', 'message')}\ndata: {data}\n\n"
+
+
+# 全局任务事件实例
+task_events = TaskEventBus()
+
+
+def init_task_events(app):
+    """
+    初始化任务事件推送
+    """
+    task_events.init_app(app)
@@ -0,0 +1,142 @@
+import os
+import time
+import uuid
+import socket
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from database.db import db
+from database.models import Task
+from services.prediction_service import claim_task, request_cancel, mark_lease_lost, release_interrupted
+
+# 创建日志记录器
+logger = logging.getLogger(__name__)
+
+# 默认租约时长（秒），工作进程超过该时间没有心跳时任务被其他工作进程回收
+DEFAULT_LEASE_SECONDS = 60
+
+# 默认心跳间隔（秒），同时也是同步取消请求和回收过期租约的间隔
+DEFAULT_HEARTBEAT_INTERVAL = 10
+
+# 每次回收的过期任务数上限
+REAP_BATCH_SIZE = 100
+
+
+class TaskLeases:
+    """
+    执行中任务的租约
+    工作进程认领任务时写入 worker_id 和租约到期时间，心跳线程定期为本进程执行中的任务续约，
+    同步在其他进程提交的取消请求，并回收租约过期（执行它的进程已退出）的任务
+    内存任务队列和数据库任务队列共用，多个进程共享同一数据库时只回收真正中断的任务
+    """
+
+    def __init__(self, app=None, on_released=None):
+        self.app = None
+        self.worker_id = f'{socket.gethostname()[:40]}:{os.getpid()}:{uuid.uuid4().hex[:6]}'
+        self.lease_seconds = DEFAULT_LEASE_SECONDS
+        self.heartbeat_interval = DEFAULT_HEARTBEAT_INTERVAL
+        self.on_released = on_released
+        self._running = set()
+        self._lock = threading.Lock()
+        self._heartbeat = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        从应用配置读取租约时长和心跳间隔，启动心跳线程
+        """
+        self.app = app
+        self.lease_seconds = app.config.get('TASK_LEASE_SECONDS', DEFAULT_LEASE_SECONDS)
+        self.heartbeat_interval = app.config.get('TASK_HEARTBEAT_INTERVAL', DEFAULT_HEARTBEAT_INTERVAL)
+        if self._heartbeat is None:
+            self._heartbeat = threading.Thread(target=self._heartbeat_loop, name='task-heartbeat', daemon=True)
+            self._heartbeat.start()
+
+    def expires_at(self, now):
+        return now + timedelta(seconds=self.lease_seconds)
+
+    def claim(self, task_id):
+        """
+        认领排队中的任务并开始续约，返回是否认领成功
+        需要在应用上下文中调用
+        """
+        if not claim_task(task_id, self.worker_id, self.lease_seconds):
+            return False
+        self.track(task_id)
+        return True
+
+    def track(self, task_id):
+        with self._lock:
+            self._running.add(task_id)
+
+    def untrack(self, task_id):
+        with self._lock:
+            self._running.discard(task_id)
+
+    def running(self):
+        """
+        本进程执行中的任务数
+        """
+        with self._lock:
+            return len(self._running)
+
+    def heartbeat(self):
+        """
+        为本进程执行中的任务续约，并同步在其他进程提交的取消请求
+        租约已被回收（心跳中断超过租约时长）的任务在本进程中停止执行，不写入任务状态
+        需要在应用上下文中调用
+        """
+        with self._lock:
+            task_ids = list(self._running)
+        if not task_ids:
+            return
+        now = datetime.utcnow()
+        Task.query.filter(
+            Task.id.in_(task_ids), Task.worker_id == self.worker_id, Task.status == 'running'
+        ).update({
+            'heartbeat_at': now,
+            'lease_expires_at': self.expires_at(now)
+        }, synchronize_session=False)
+        db.session.commit()
+        rows = Task.query.with_entities(Task.id, Task.status, Task.worker_id, Task.cancel_requested) \
+            .filter(Task.id.in_(task_ids))
+        for row in rows:
+            if row.worker_id != self.worker_id:
+                logger.warning(f'任务 {row.id} 的租约已被回收，终止本进程中的执行')
+                mark_lease_lost(row.id)
+            elif row.status == 'running' and row.cancel_requested:
+                request_cancel(row.id)
+
+    def reap(self):
+        """
+        回收租约过期的任务（认领该任务的工作进程已退出或失去连接），返回重新排队的 (任务ID, 用户ID, 优先级)
+        没有租约的执行中任务（升级前启动的任务）同样视为中断
+        需要在应用上下文中调用
+        """
+        expired = (Task.query
+                   .filter(Task.status == 'running', Task.parent_id.is_(None),
+                           db.or_(Task.lease_expires_at.is_(None), Task.lease_expires_at < datetime.utcnow()))
+                   .order_by(Task.lease_expires_at)
+                   .limit(REAP_BATCH_SIZE)
+                   .with_for_update(skip_locked=True)
+                   .all())
+        if not expired:
+            db.session.rollback()
+            return []
+        logger.warning(f'回收租约过期的任务: {[t.id for t in expired]}')
+        release_interrupted(expired, '工作进程租约过期')
+        return [(t.id, t.user_id, t.priority) for t in expired if t.status == 'pending']
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(self.heartbeat_interval)
+            try:
+                with self.app.app_context():
+                    self.heartbeat()
+                    released = self.reap()
+                if released and self.on_released:
+                    self.on_released(released)
+            except Exception as e:
+                logger.error(f'任务心跳失败: {str(e)}')
@@ -0,0 +1,177 @@
+import time
+import logging
+import threading
+from functools import partial
+
+from services.prediction_service import run_task, recover_orphaned_tasks
+from services.scheduler import FairScheduler, PRIORITY_INTERACTIVE, DEFAULT_WEIGHTS, DEFAULT_USER_MAX_RUNNING
+from services.db_queue import DatabaseQueue
+from services.task_lease import TaskLeases
+
+# 创建日志记录器
+logger = logging.getLogger(__name__)
+
+# 默认后台工作线程数
+DEFAULT_WORKERS = 4
+
+# 分批入队时检查队列积压的间隔（秒）
+THROTTLE_INTERVAL = 0.5
+
+
+class TaskQueue:
+    """
+    后台任务队列
+    HTTP请求只负责入队任务ID，由工作线程池在应用上下文中执行任务
+    任务按优先级类别和所属用户由 FairScheduler 决定执行顺序，不再先进先出
+    使用内存调度时工作线程出队后先认领任务（写入租约），同一任务只执行一次，
+    其他进程可通过租约判断任务是否仍在执行
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.handler = None
+        self._queue = FairScheduler()
+        self.leases = None
+        self._workers = []
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, handler=None, scheduler=None, leases=None):
+        """
+        绑定Flask应用并启动工作线程，scheduler 用于替换默认的内存调度（如数据库任务队列）
+        leases 不为空时工作线程出队后先认领任务并续约（数据库任务队列认领时已写入租约，不需要）
+        """
+        self.app = app
+        if handler is not None:
+            self.handler = handler
+        if scheduler is not None:
+            self._queue = scheduler
+        if leases is not None:
+            self.leases = leases
+            leases.init_app(app)
+        self._queue.weights = dict(app.config.get('TASK_PRIORITY_WEIGHTS', DEFAULT_WEIGHTS))
+        self._queue.user_max_running = app.config.get('TASK_USER_MAX_RUNNING', DEFAULT_USER_MAX_RUNNING)
+        num_workers = app.config.get('TASK_QUEUE_WORKERS', DEFAULT_WORKERS)
+        self.start(num_workers)
+        app.extensions['task_queue'] = self
+
+    def start(self, num_workers):
+        """
+        启动指定数量的工作线程（重复调用不会重复启动）
+        """
+        with self._lock:
+            if self._workers:
+                return
+            for i in range(num_workers):
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    name=f'task-worker-{i}',
+                    daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+        logger.info(f'任务队列已启动，工作线程数: {num_workers}')
+
+    def submit(self, task_id, user_id=None, priority=PRIORITY_INTERACTIVE):
+        """
+        将任务加入队列
+        """
+        self._queue.put(task_id, user_id, priority)
+        logger.info(f'任务已入队: {task_id}')
+
+    def submit_throttled(self, tasks, batch_size, max_pending=None, interval=THROTTLE_INTERVAL):
+        """
+        分批将大量任务加入队列（在后台线程中执行，立即返回）
+        tasks 为 (任务ID, 用户ID, 优先级) 元组的列表
+        每批入队前等待队列积压降到 max_pending 以下，避免一次占满队列、阻塞其他新提交的任务
+        """
+        tasks = list(tasks)
+        if self._queue.persistent:
+            # 任务已在数据库中排队，由工作线程直接认领，只需唤醒
+            for task_id, user_id, priority in tasks:
+                self._queue.put(task_id, user_id, priority)
+            return None
+        max_pending = batch_size if max_pending is None else max_pending
+
+        def feed():
+            for i in range(0, len(tasks), batch_size):
+                while self.qsize() > max_pending:
+                    time.sleep(interval)
+                for task_id, user_id, priority in tasks[i:i + batch_size]:
+                    self._queue.put(task_id, user_id, priority)
+                logger.info(f'分批入队: {min(i + batch_size, len(tasks))}/{len(tasks)}')
+
+        feeder = threading.Thread(target=feed, name='task-feeder', daemon=True)
+        feeder.start()
+        return feeder
+
+    def qsize(self):
+        """
+        当前排队中的任务数
+        """
+        return self._queue.qsize()
+
+    def stats(self):
+        """
+        队列深度、等待时间等调度指标（用于确定工作线程数）
+        """
+        stats = self._queue.stats()
+        stats['workers'] = len(self._workers)
+        if self.leases is not None:
+            stats['worker_id'] = self.leases.worker_id
+        return stats
+
+    def shutdown(self, wait=True):
+        """
+        停止所有工作线程
+        """
+        with self._lock:
+            workers, self._workers = self._workers, []
+        self._queue.close(len(workers))
+        if wait:
+            for worker in workers:
+                worker.join()
+
+    def _worker_loop(self):
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                break
+            task_id, user_id = entry
+            try:
+                with self.app.app_context():
+                    if self.leases is None or self.leases.claim(task_id):
+                        self.handler(task_id)
+                    else:
+                        logger.info(f'任务 {task_id} 不在排队中或已被其他工作线程认领，跳过执行')
+            except Exception as e:
+                logger.error(f'执行任务 {task_id} 时发生未处理异常: {str(e)}')
+            finally:
+                if self.leases is not None:
+                    self.leases.untrack(task_id)
+                self._queue.done(task_id, user_id)
+
+
+# 全局任务队列实例
+task_queue = TaskQueue()
+
+
+def init_task_queue(app):
+    """
+    初始化后台任务队列，并重新入队服务重启前未执行完的任务
+    TASK_QUEUE_BACKEND 为 database 时使用数据库任务队列，中断的任务由租约过期回收，启动时不做恢复
+    使用内存任务队列时，租约过期回收的任务重新加入本进程的队列
+    """
+    if app.config.get('TASK_QUEUE_BACKEND', 'memory') == 'database':
+        scheduler = DatabaseQueue(app)
+        task_queue.init_app(app, handler=partial(run_task, worker_id=scheduler.worker_id), scheduler=scheduler)
+        return
+    batch_size = app.config.get('TASK_RERUN_BATCH_SIZE', 100)
+    leases = TaskLeases(on_released=lambda tasks: task_queue.submit_throttled(tasks, batch_size))
+    task_queue.init_app(app, handler=partial(run_task, worker_id=leases.worker_id), leases=leases)
+    if app.config.get('TASK_RECOVER_ON_START', True):
+        with app.app_context():
+            tasks = recover_orphaned_tasks()
+        if tasks:
+            task_queue.submit_throttled(tasks, batch_size)
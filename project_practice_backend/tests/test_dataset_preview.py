@@ -0,0 +1,34 @@
+"""
+数据集预览：预览文件只保存前 PREVIEW_ROWS 行，请求更多行时从数据文件读取
+"""
+import pandas as pd
+import pytest
+
+from services.dataset_store import ingest_csv, read_preview, PREVIEW_ROWS
+
+
+@pytest.fixture
+def dataset_path(tmp_path):
+    rows = PREVIEW_ROWS + 30
+    csv_path = tmp_path / 'data.csv'
+    pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=rows, freq='h').strftime('%Y-%m-%d %H:%M:%S'),
+        'value': range(rows)
+    }).to_csv(csv_path, index=False)
+    path, _ = ingest_csv(str(csv_path), str(tmp_path / 'data.columnar'))
+    return path
+
+
+@pytest.mark.parametrize('preview_rows, expected', [
+    (10, 10),
+    (PREVIEW_ROWS, PREVIEW_ROWS),
+    (PREVIEW_ROWS + 20, PREVIEW_ROWS + 20),
+    (PREVIEW_ROWS + 30, PREVIEW_ROWS + 30),
+    (1000, PREVIEW_ROWS + 30),
+])
+def test_preview_returns_requested_rows(dataset_path, preview_rows, expected):
+    records, schema = read_preview(dataset_path, preview_rows)
+
+    assert len(records) == expected
+    assert [r['value'] for r in records] == list(range(expected))
+    assert [c['name'] for c in schema] == ['date', 'value']
@@ -0,0 +1,24 @@
+"""
+降采样返回的点数不超过 max_points
+"""
+import numpy as np
+import pytest
+
+from services.downsample import downsample_indices, METHODS
+
+
+@pytest.mark.parametrize('method', METHODS)
+@pytest.mark.parametrize('max_points', [1, 2, 3, 7, 100])
+def test_returns_at_most_max_points(method, max_points):
+    values = np.sin(np.linspace(0, 20, 1000))
+    indices = downsample_indices(values, max_points, method)
+
+    assert 0 < len(indices) <= max_points
+    assert np.all(np.diff(indices) > 0)
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_short_series_returned_unchanged(method):
+    values = np.arange(5, dtype=np.float64)
+
+    assert list(downsample_indices(values, 10, method)) == [0, 1, 2, 3, 4]
@@ -0,0 +1,42 @@
+"""
+预测执行引擎：取消预测时终止进程池，同一进程池中的其他预测重新执行，不会失败
+"""
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.executor import InferenceExecutor
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    path = tmp_path / 'data.csv'
+    dates = pd.date_range('2024-01-01', periods=100, freq='h')
+    pd.DataFrame({'date': dates.strftime('%Y-%m-%d %H:%M:%S'), 'v0': np.random.rand(100)}).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def executor():
+    executor = InferenceExecutor()
+    executor.workers_per_model = 2
+    yield executor
+    executor.shutdown(wait=False)
+
+
+def test_cancel_keeps_sibling_predictions(executor, data_path):
+    executor.prewarm('CrossGNN')
+    cancelled = executor.submit('CrossGNN', data_path, {'valueColumn': 'v0'})
+    running = executor.submit('CrossGNN', data_path, {'valueColumn': 'v0', 'predictionLength': 3})
+    queued = executor.submit('CrossGNN', data_path, {'valueColumn': 'v0', 'predictionLength': 4})
+    time.sleep(0.5)
+
+    assert executor.cancel(cancelled)
+    with pytest.raises(BrokenProcessPool):
+        cancelled.result(timeout=30)
+    assert running.result(timeout=60)['metrics'] is not None
+    assert queued.result(timeout=60)['metrics'] is not None
+    assert not executor.cancel(running)
@@ -0,0 +1,79 @@
+"""
+游标分页：逐页读取不重复、不遗漏，created_at 为空的记录排在最后
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from database.db import db
+from database.models import Model
+from services.pagination import paginate_keyset, count_total, encode_cursor, decode_cursor
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI='sqlite://')
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        seed_models()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def seed_models():
+    """
+    30个模型：每3个共用同一创建时间，其中id为5、12、20、27的模型没有创建时间
+    """
+    start = datetime(2024, 1, 1)
+    for i in range(30):
+        db.session.add(Model(name=f'model{i}', model_type='CrossGNN', created_at=start + timedelta(hours=i // 3)))
+    db.session.commit()
+    Model.query.filter(Model.id.in_([5, 12, 20, 27])).update({'created_at': None}, synchronize_session=False)
+    db.session.commit()
+
+
+def read_all(per_page, descending):
+    items, cursor = paginate_keyset(Model.query, Model, per_page, None, descending)
+    pages = [items]
+    while cursor:
+        items, cursor = paginate_keyset(Model.query, Model, per_page, cursor, descending)
+        pages.append(items)
+    return [item for page in pages for item in page]
+
+
+def expected_order(descending):
+    models = Model.query.all()
+    dated = [m for m in models if m.created_at is not None]
+    undated = [m for m in models if m.created_at is None]
+    dated.sort(key=lambda m: (m.created_at, m.id), reverse=descending)
+    undated.sort(key=lambda m: m.id, reverse=descending)
+    return dated + undated
+
+
+@pytest.mark.parametrize('descending', [True, False])
+@pytest.mark.parametrize('per_page', [1, 4, 7, 30])
+def test_pages_cover_all_rows_with_null_created_at(app, per_page, descending):
+    items = read_all(per_page, descending)
+
+    assert [m.id for m in items] == [m.id for m in expected_order(descending)]
+
+
+def test_cursor_round_trip_without_created_at(app):
+    model = Model.query.get(5)
+
+    assert decode_cursor(encode_cursor(model)) == (None, 5)
+
+
+def test_invalid_cursor():
+    with pytest.raises(ValueError):
+        decode_cursor('not-a-cursor')
+
+
+def test_count_total_modes(app):
+    assert count_total(Model.query, 'exact') == (30, True)
+    assert count_total(Model.query, 'approx') == (30, True)
+    assert count_total(Model.query, None) == (None, None)
@@ -0,0 +1,93 @@
+"""
+单任务事件流：任务在其他进程执行时本进程收不到事件，事件流在心跳时从数据库读取任务状态
+"""
+import json
+
+import jwt
+import pytest
+from flask import Flask
+
+from database.db import db
+from database.models import User, Dataset, Model, Task
+from api.task import task_bp
+from services.task_events import TaskEventBus, init_task_events, task_events
+
+SECRET_KEY = 'task-events-test-secret-key-0123456789'
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True,
+        SECRET_KEY=SECRET_KEY,
+        SQLALCHEMY_DATABASE_URI='sqlite://',
+        TASK_EVENTS_HEARTBEAT=0.01
+    )
+    db.init_app(app)
+    init_task_events(app)
+    app.register_blueprint(task_bp, url_prefix='/api/task')
+    with app.app_context():
+        db.create_all()
+        user = User(username='admin', email='admin@example.com', password_hash='x', is_admin=True)
+        dataset = Dataset(name='dataset', file_path='datasets/0.csv')
+        model = Model(name='model', model_type='CrossGNN', default_params={})
+        db.session.add_all([user, dataset, model])
+        db.session.flush()
+        db.session.add(Task(name='task', user_id=user.id, dataset_id=dataset.id, model_id=model.id,
+                            status='pending'))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def parse_events(chunks):
+    """
+    解析SSE数据块中的事件，忽略心跳注释
+    """
+    events = []
+    for chunk in chunks:
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        for block in chunk.split('\n\n'):
+            data = [line[len('data: '):] for line in block.split('\n') if line.startswith('data: ')]
+            if data:
+                events.append(json.loads(data[0]))
+    return events
+
+
+def test_stream_polls_status_when_idle():
+    bus = TaskEventBus(heartbeat=0.01)
+    statuses = iter(['pending', 'pending', 'running', 'running', 'completed'])
+    subscription = bus.subscribe(task_id=1)
+
+    def poll():
+        return {'type': 'status', 'task_id': 1, 'status': next(statuses)}
+
+    events = parse_events(bus.stream(subscription, [{'type': 'status', 'task_id': 1, 'status': 'pending'}],
+                                     poll=poll))
+
+    assert [e['status'] for e in events] == ['pending', 'running', 'completed']
+    assert bus.subscriber_count() == 0
+
+
+def test_event_stream_follows_task_updated_by_other_process(app):
+    client = app.test_client()
+    token = jwt.encode({'user_id': 1, 'is_admin': True}, SECRET_KEY, algorithm='HS256')
+    response = client.get('/api/task/1/events', query_string={'token': token}, buffered=False)
+    assert response.status_code == 200
+    chunks = response.response
+
+    # 其他进程更新任务状态，不在本进程发布事件
+    received = parse_events([next(chunks)])
+    Task.query.filter_by(id=1).update({'status': 'running'})
+    db.session.commit()
+    while not any(e['status'] == 'running' for e in received):
+        received += parse_events([next(chunks)])
+    Task.query.filter_by(id=1).update({'status': 'completed', 'metrics': {'mse': 0.5}})
+    db.session.commit()
+    received += parse_events(chunks)
+
+    assert [e['status'] for e in received] == ['pending', 'running', 'completed']
+    assert received[-1]['metrics'] == {'mse': 0.5}
+    assert task_events.subscriber_count() == 0
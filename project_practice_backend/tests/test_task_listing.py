@@ -0,0 +1,117 @@
+"""
+任务列表接口的查询次数：每页返回的任务数不影响执行的SQL语句数（数据集、模型、用户随任务一起加载）
+分页查询只执行一条连接加载的查询，分页模式另加一条COUNT查询，游标分页只在请求总数时统计
+"""
+from contextlib import contextmanager
+
+import jwt
+import pytest
+from flask import Flask
+from sqlalchemy import event
+
+from database.db import db
+from database.models import User, Dataset, Model, Task
+from api.task import task_bp
+from api.prediction import prediction_bp
+
+SECRET_KEY = 'task-listing-test-secret-key-0123456789'
+
+LISTING_URLS = ('/api/task/', '/api/prediction/tasks')
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True,
+        SECRET_KEY=SECRET_KEY,
+        SQLALCHEMY_DATABASE_URI='sqlite://'
+    )
+    db.init_app(app)
+    app.register_blueprint(task_bp, url_prefix='/api/task')
+    app.register_blueprint(prediction_bp, url_prefix='/api/prediction')
+    with app.app_context():
+        db.create_all()
+        seed_tasks(100)
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def headers():
+    token = jwt.encode({'user_id': 1, 'is_admin': True}, SECRET_KEY, algorithm='HS256')
+    return {'Authorization': f'Bearer {token}'}
+
+
+def seed_tasks(count):
+    """
+    每个任务使用不同的用户、数据集和模型，逐行延迟加载时查询次数会随任务数增加
+    """
+    for i in range(count):
+        user = User(username=f'user{i}', email=f'user{i}@example.com', password_hash='x', is_admin=(i == 0))
+        dataset = Dataset(name=f'dataset{i}', file_path=f'datasets/{i}.csv')
+        model = Model(name=f'model{i}', model_type='CrossGNN', default_params={})
+        db.session.add_all([user, dataset, model])
+        db.session.flush()
+        db.session.add(Task(name=f'task{i}', user_id=user.id, dataset_id=dataset.id, model_id=model.id,
+                            status='completed'))
+    db.session.commit()
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', on_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', on_execute)
+
+
+def list_tasks(client, headers, url, **params):
+    db.session.remove()
+    with count_queries() as statements:
+        response = client.get(url, query_string=params, headers=headers)
+    assert response.status_code == 200
+    return response.get_json(), len(statements)
+
+
+@pytest.mark.parametrize('url', LISTING_URLS)
+@pytest.mark.parametrize('per_page', [10, 100])
+def test_query_count_independent_of_page_size(client, headers, url, per_page):
+    data, count = list_tasks(client, headers, url, per_page=per_page)
+
+    assert len(data['tasks']) == per_page
+    # 分页查询和总数查询
+    assert count == 2
+
+
+@pytest.mark.parametrize('url', LISTING_URLS)
+def test_listing_includes_related_names(client, headers, url):
+    data, _ = list_tasks(client, headers, url, per_page=100)
+
+    for task in data['tasks']:
+        i = task['name'][len('task'):]
+        assert task['dataset'] == f'dataset{i}'
+        assert task['model'] == f'model{i}'
+        assert task['username'] == f'user{i}'
+
+
+@pytest.mark.parametrize('per_page', [10, 100])
+@pytest.mark.parametrize('total, expected', [(None, 1), ('exact', 2)])
+def test_cursor_query_count_independent_of_page_size(client, headers, per_page, total, expected):
+    params = {'total': total} if total else {}
+    data, count = list_tasks(client, headers, '/api/task/', per_page=per_page, cursor='', **params)
+
+    assert len(data['tasks']) == per_page
+    assert count == expected
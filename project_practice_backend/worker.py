@@ -0,0 +1,41 @@
+"""
+独立的预测工作进程（数据库任务队列）
+多台机器共享同一数据库时，在每台机器上运行 python worker.py [--workers N]，
+从 tasks 表认领并执行任务，不启动HTTP服务
+"""
+import os
+import signal
+import logging
+import argparse
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='预测任务工作进程')
+    parser.add_argument('--workers', type=int, help='工作线程数（默认使用 TASK_QUEUE_WORKERS 配置）')
+    args = parser.parse_args()
+
+    # 在导入应用（初始化任务队列）之前设置队列配置
+    os.environ['TASK_QUEUE_BACKEND'] = 'database'
+    if args.workers is not None:
+        os.environ['TASK_QUEUE_WORKERS'] = str(args.workers)
+
+    from app import app
+    from services.task_queue import task_queue
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    logger.info('工作进程已启动')
+    while not stop.wait(1):
+        pass
+
+    # 停止认领新任务，等待执行中的任务完成
+    logger.info('工作进程正在停止，等待执行中的任务完成')
+    task_queue.shutdown(wait=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -86,6 +86,25 @@ export const datasetAPI = {
     })
   },
   
+  // 按时间范围获取数据集片段
+  getDatasetRange(id, params) {
+    return api.get(`/dataset/${id}/range`, { params })
+  },
+  
+  // 下载数据集原始文件
+  downloadDataset(id) {
+    return api.get(`/dataset/${id}/download`, { responseType: 'blob' })
+  },
+  
+  // 向数据集追加数据
+  appendDataset(id, formData) {
+    return api.post(`/dataset/${id}/append`, formData, {
+      headers: {
+        'Content-Type': 'multipart/form-data'
+      }
+    })
+  },
+  
   // 删除数据集
   deleteDataset(id) {
     return api.delete(`/dataset/${id}`)
@@ -117,14 +136,44 @@ export const predictionAPI = {
     return api.post('/prediction/predict', data)
   },
   
+  // 批量提交预测作业
+  predictBatch(data) {
+    return api.post('/prediction/batch', data)
+  },
+  
+  // 获取批量预测进度
+  getBatch(batchId, params) {
+    return api.get(`/prediction/batch/${batchId}`, { params })
+  },
+  
+  // 创建超参数扫描任务
+  createSweep(data) {
+    return api.post('/prediction/sweep', data)
+  },
+  
+  // 获取扫参任务进度和试验结果
+  getSweep(id) {
+    return api.get(`/prediction/sweep/${id}`)
+  },
+  
+  // 创建滚动回测任务
+  createBacktest(data) {
+    return api.post('/prediction/backtest', data)
+  },
+  
   // 获取任务列表
   getTasks(params) {
     return api.get('/task', { params })
   },
   
   // 获取单个任务详情
-  getTask(id) {
-    return api.get(`/task/${id}`)
+  getTask(id, params) {
+    return api.get(`/task/${id}`, { params })
+  },
+  
+  // 按区间获取任务预测结果
+  getTaskResult(id, params) {
+    return api.get(`/task/${id}/result`, { params })
   },
   
   // 删除任务
@@ -137,11 +186,43 @@ export const predictionAPI = {
     return api.post(`/task/${id}/rerun`)
   },
   
+  // 取消任务
+  cancelTask(id) {
+    return api.post(`/task/${id}/cancel`)
+  },
+  
+  // 按条件批量重新运行任务
+  rerunTasks(data) {
+    return api.post('/task/rerun', data)
+  },
+  
+  // 订阅任务进度事件（Server-Sent Events），EventSource不能设置请求头，令牌通过查询参数传递
+  subscribeTaskEvents(id) {
+    const token = localStorage.getItem('token')
+    return new EventSource(`${api.defaults.baseURL}/task/${id}/events?token=${encodeURIComponent(token)}`)
+  },
+  
+  // 订阅当前用户所有任务的进度事件
+  subscribeUserEvents() {
+    const token = localStorage.getItem('token')
+    return new EventSource(`${api.defaults.baseURL}/task/events?token=${encodeURIComponent(token)}`)
+  },
+  
+  // 数据集追加数据后增量更新任务的预测结果
+  updateTaskForecast(id, data) {
+    return api.post(`/task/${id}/update`, data)
+  },
+  
   // 获取任务统计信息
   getTaskStatistics() {
     return api.get('/task/statistics')
   },
   
+  // 获取任务队列统计信息（排队数、等待时间）
+  getQueueStats() {
+    return api.get('/task/queue')
+  },
+  
   // 上传数据集
   uploadDataset(formData) {
     return api.post('/dataset', formData, {